@@ -0,0 +1,32 @@
+import logging
+from os import environ
+
+
+# Dataset sizes (total seeded to-dos) selectable with --scale. Kept free of
+# src imports: the CLI must point DATABASE_URL at the benchmark database
+# before src.resources.config is first imported.
+BENCHMARK_SCALES: dict[str, int] = {
+	"1k": 1_000,
+	"10k": 10_000,
+	"100k": 100_000,
+	"1m": 1_000_000,
+	"10m": 10_000_000,
+}
+BENCHMARK_TODOS_PER_USER: int = 100
+BENCHMARK_PASSWORD: str = "benchmark"
+BENCHMARK_RANDOM_SEED: int = 1234
+
+
+def prepare_environment(database: str) -> None:
+	# Must happen before the first import of src.resources.config.
+	environ["DATABASE_URL"] = f"sqlite:///{database}"
+	environ.pop("DATABASE_ASYNC_URL", None)
+	environ.pop("DATABASE_READ_URL", None)
+	environ["SCHEDULER_ENABLED"] = "false"
+	# A few principals replay every route at full speed; throttling them
+	# would measure 429s. benchmarks.rate_limit measures the limiter itself.
+	environ["RATE_LIMIT_ENABLED"] = "false"
+
+	# Lock waits under write contention would flood the output with slow
+	# query warnings; the report already carries the latencies.
+	logging.getLogger("src.resources.metrics").setLevel(logging.ERROR)
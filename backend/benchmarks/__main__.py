@@ -0,0 +1,110 @@
+import sys
+from os import environ, remove
+from os.path import exists, join
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from secrets import token_hex
+from typing import Any
+
+from benchmarks import (
+	BENCHMARK_SCALES,
+	BENCHMARK_TODOS_PER_USER,
+	BENCHMARK_RANDOM_SEED,
+	prepare_environment,
+)
+
+
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks",
+		description="Seed a synthetic dataset and benchmark every API route."
+	)
+	parser.add_argument("--scale", choices=BENCHMARK_SCALES, default="10k")
+	parser.add_argument("--todos-per-user", type=int, default=BENCHMARK_TODOS_PER_USER)
+	parser.add_argument("--database", help="SQLite file (default: src/db/benchmark_<scale>.db)")
+	parser.add_argument("--reuse", action="store_true", help="keep an already seeded database")
+	parser.add_argument("--driver", choices=("asgi", "uvicorn"), default="asgi")
+	parser.add_argument("--workers", type=int, default=1, help="worker processes of python -m src.server")
+	parser.add_argument("--port", type=int, default=8765)
+	parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+	parser.add_argument("--warmup", type=int, default=10, help="untimed requests per scenario")
+	parser.add_argument("--concurrency", type=int, default=8)
+	parser.add_argument("--scenario", action="append", help="run only these scenarios")
+	parser.add_argument("--seed", type=int, default=BENCHMARK_RANDOM_SEED)
+	parser.add_argument("--output", help="write the JSON report to this file")
+	parser.add_argument("--baseline", help="compare against a previous JSON report")
+	parser.add_argument(
+		"--threshold", type=float, default=0.10,
+		help="relative throughput/p95 change counted as a regression (default: 0.10)"
+	)
+	return parser.parse_args()
+
+
+async def benchmark(args: Namespace, database: str) -> int:
+	from src.resources.config import DB_URL
+
+	# Seeding wipes the database file: refuse to run against anything but
+	# the benchmark database.
+	if DB_URL != environ["DATABASE_URL"]:
+		print(f"Refusing to benchmark: the application is configured for {DB_URL}")
+		return 2
+
+	from benchmarks.seed import BenchmarkDataset, seed_database
+	from benchmarks.scenarios import SCENARIOS, BenchmarkState, Scenario
+	from benchmarks.runner import asgi_client, run_benchmark, uvicorn_client
+	from benchmarks.report import build_report, compare_reports, load_report, save_report
+
+	dataset: BenchmarkDataset = BenchmarkDataset.for_scale(
+		BENCHMARK_SCALES[args.scale], args.todos_per_user
+	)
+	if not (args.reuse and exists(database)):
+		for suffix in ("", "-wal", "-shm"):
+			if exists(database + suffix):
+				remove(database + suffix)
+		seconds: float = seed_database(dataset, args.seed)
+		print(f"Seeded {dataset.users} users and {dataset.todos} to-dos in {seconds:.1f} s")
+
+	scenarios: list[Scenario] = [
+		scenario for scenario in SCENARIOS
+		if not args.scenario or scenario.name in args.scenario
+	]
+	state: BenchmarkState = BenchmarkState(dataset=dataset, run_id=token_hex(3))
+
+	client_context = (
+		asgi_client() if args.driver == "asgi"
+		else uvicorn_client(args.concurrency, args.workers, args.port)
+	)
+	async with client_context as (client, server_pid):
+		results = await run_benchmark(
+			client, server_pid, scenarios, state,
+			args.requests, args.warmup, args.concurrency, args.seed
+		)
+
+	options: dict[str, Any] = {
+		key: value for key, value in vars(args).items()
+		if key not in ("output", "baseline", "threshold")
+	}
+	options.update({"users": dataset.users, "todos": dataset.todos})
+	report: dict[str, Any] = build_report(options, results)
+
+	if args.output:
+		save_report(args.output, report)
+		print(f"Report written to {args.output}")
+
+	if args.baseline:
+		regressions: list[str] = compare_reports(report, load_report(args.baseline), args.threshold)
+		if regressions:
+			print(f"Regressed scenarios: {', '.join(regressions)}")
+			return 1
+
+	return 0
+
+
+# Usage (from the backend directory):
+#   python -m benchmarks --scale 100k --driver uvicorn --workers 4 --output run.json
+#   python -m benchmarks --scale 100k --reuse --baseline run.json
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	database_path: str = arguments.database or join("src", "db", f"benchmark_{arguments.scale}.db")
+	prepare_environment(database_path)
+	sys.exit(run(benchmark(arguments, database_path)))
@@ -0,0 +1,184 @@
+import sys
+from os import environ, remove
+from os.path import exists, join
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from benchmarks import BENCHMARK_RANDOM_SEED, prepare_environment
+
+
+AccessPhase = tuple[str, bool]
+
+# Latency only: the query budget of each route is pinned by
+# tests/test_access.py.
+ACCESS_PHASES: tuple[AccessPhase, ...] = (("cached", True), ("uncached", False))
+
+
+###############################################################################
+##################################### Cases ###################################
+###############################################################################
+# Every request goes through the ownership dependencies; the negative cases
+# pin the 403/404 answers and show how much work a rejected request costs.
+@dataclass(frozen=True)
+class AccessCase:
+	name: str
+	method: str
+	# Builds (path, JSON body) for the index-th request of a phase.
+	build: Callable[[Any, int], tuple[str, dict[str, Any] | None]]
+	expected_status: int
+	as_admin: bool = False
+
+
+def build_cases(created_todos: list[int]) -> list[AccessCase]:
+	owner: Callable[[Any], int] = lambda dataset: dataset.user_id(0)
+	other: Callable[[Any], int] = lambda dataset: dataset.user_id(1)
+
+	return [
+		AccessCase("get_todo", "GET", lambda dataset, index: (
+			f"/users/{owner(dataset)}/todos/{dataset.todo_id(owner(dataset), index % dataset.todos_per_user)}",
+			None
+		), 200),
+		AccessCase("patch_todo", "PATCH", lambda dataset, index: (
+			f"/users/{owner(dataset)}/todos/{dataset.todo_id(owner(dataset), index % dataset.todos_per_user)}",
+			{"description": f"patched {index}"}
+		), 201),
+		AccessCase("create_todo", "POST", lambda dataset, index: (
+			f"/users/{owner(dataset)}/todos",
+			{"description": f"created {index}"}
+		), 201),
+		# Drains the to-dos made by create_todo, so the dataset is left as seeded.
+		AccessCase("delete_todo", "DELETE", lambda dataset, index: (
+			f"/users/{owner(dataset)}/todos/{created_todos.pop()}",
+			None
+		), 200),
+		AccessCase("get_user", "GET", lambda dataset, index: (
+			f"/users/{owner(dataset)}",
+			None
+		), 200),
+		AccessCase("get_user_todos", "GET", lambda dataset, index: (
+			f"/users/{owner(dataset)}/todos",
+			None
+		), 200),
+		AccessCase("forbidden", "GET", lambda dataset, index: (
+			f"/users/{other(dataset)}/todos/{dataset.todo_id(other(dataset), 0)}",
+			None
+		), 403),
+		AccessCase("foreign_todo", "GET", lambda dataset, index: (
+			f"/users/{owner(dataset)}/todos/{dataset.todo_id(other(dataset), 0)}",
+			None
+		), 404),
+		AccessCase("missing_user", "GET", lambda dataset, index: (
+			f"/users/{dataset.users + 1000}/todos/1",
+			None
+		), 404, as_admin=True),
+	]
+
+
+###############################################################################
+##################################### Runner ##################################
+###############################################################################
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.access",
+		description="Measure latency of the ownership checks per route, principal cache warm and cold."
+	)
+	parser.add_argument("--requests", type=int, default=200, help="requests per case and phase")
+	parser.add_argument("--database", default=join("src", "db", "benchmark_access.db"))
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+async def benchmark(args: Namespace) -> int:
+	from src.resources.config import DB_URL
+
+	if DB_URL != environ["DATABASE_URL"]:
+		print(f"Refusing to benchmark: the application is configured for {DB_URL}")
+		return 2
+
+	from httpx import AsyncClient, Response
+
+	from benchmarks.seed import BenchmarkDataset, seed_database
+	from benchmarks.scenarios import BenchmarkState
+	from benchmarks.runner import asgi_client
+	from src.resources.cache import principal_cache
+
+	for suffix in ("", "-wal", "-shm"):
+		if exists(args.database + suffix):
+			remove(args.database + suffix)
+	dataset: BenchmarkDataset = BenchmarkDataset.for_scale(1_000, 100)
+	seed_database(dataset, BENCHMARK_RANDOM_SEED)
+	state: BenchmarkState = BenchmarkState(dataset=dataset, run_id="access")
+
+	created_todos: list[int] = []
+	results: dict[str, dict[str, Any]] = {}
+	failures: list[str] = []
+
+	client: AsyncClient
+	async with asgi_client() as (client, _):
+		for case in build_cases(created_todos):
+			headers: dict[str, str] = (
+				state.admin_headers if case.as_admin else state.headers(dataset.user_id(0))
+			)
+			for phase, cached in ACCESS_PHASES:
+				latencies: list[float] = []
+				statuses: set[int] = set()
+				# Uncached runs with the principal cache switched off, which
+				# also skips its generation lookup.
+				principal_cache.clear()
+				principal_cache.entries.enabled = cached
+
+				for index in range(args.requests):
+					path, body = case.build(dataset, index)
+					if cached and index == 0:
+						await client.get(f"/users/{dataset.user_id(0)}", headers=headers)
+
+					started: float = perf_counter()
+					response: Response = await client.request(
+						case.method, path, headers=headers, json=body
+					)
+					latencies.append(perf_counter() - started)
+					statuses.add(response.status_code)
+					if case.name == "create_todo" and response.status_code == 201:
+						created_todos.append(response.json()["todo"]["id"])
+
+				latencies.sort()
+				summary: dict[str, Any] = {
+					"statuses": sorted(statuses),
+					"p50_ms": latencies[len(latencies) // 2] * 1000,
+					"p95_ms": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+				}
+				results[f"{case.name}:{phase}"] = summary
+				print(
+					f"{case.name:<16}{phase:<10}p50 {summary['p50_ms']:>7.2f} ms  p95 {summary['p95_ms']:>7.2f} ms"
+					f"  status {','.join(map(str, summary['statuses']))}"
+				)
+
+				if statuses != {case.expected_status}:
+					failures.append(f"{case.name} ({phase}) answered {sorted(statuses)}")
+
+			principal_cache.entries.enabled = True
+			cached_summary: dict[str, Any] = results[f"{case.name}:cached"]
+			cached_summary["p50_speedup"] = (
+				results[f"{case.name}:uncached"]["p50_ms"] / cached_summary["p50_ms"]
+			)
+			print(f"{case.name:<16}principal cache off/on p50 ratio {cached_summary['p50_speedup']:.2f}x")
+
+	if args.output:
+		from benchmarks.report import save_report
+
+		save_report(args.output, results)
+		print(f"Report written to {args.output}")
+
+	for failure in failures:
+		print(f"FAILED: {failure}")
+	return 1 if failures else 0
+
+
+# Usage (from the backend directory): python -m benchmarks.access
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	prepare_environment(arguments.database)
+	sys.exit(run(benchmark(arguments)))
@@ -0,0 +1,119 @@
+import sys
+from os import environ, remove
+from os.path import exists, join
+from random import Random
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from typing import Any
+
+from benchmarks import BENCHMARK_RANDOM_SEED, prepare_environment
+
+
+CONCURRENCY_LEVELS: tuple[int, ...] = (50, 200, 1000)
+# Share of writes in the request mix; the rest are split between the
+# to-do page and single to-do reads.
+WRITE_SHARE: float = 0.1
+
+
+# Throughput of the request sessions served from the sync engine (every
+# query blocks the event loop, as before the async engine) and from the
+# async engine, with 50, 200 and 1000 concurrent clients against one server
+# process running a read-mostly mix.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.engines",
+		description="Compare the sync and async request sessions under concurrent clients."
+	)
+	parser.add_argument(
+		"--concurrency", type=int, nargs="+", default=list(CONCURRENCY_LEVELS),
+		help="concurrent clients to compare"
+	)
+	parser.add_argument("--requests", type=int, default=3000, help="requests per mode and level")
+	parser.add_argument("--workers", type=int, default=1, help="worker processes of python -m src.server")
+	parser.add_argument("--port", type=int, default=8768)
+	parser.add_argument("--database", default=join("src", "db", "benchmark_engines.db"))
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+async def benchmark(args: Namespace) -> int:
+	from src.resources.config import DB_URL, DB_SESSION_MODES
+
+	if DB_URL != environ["DATABASE_URL"]:
+		print(f"Refusing to benchmark: the application is configured for {DB_URL}")
+		return 2
+
+	from httpx import AsyncClient
+
+	from benchmarks.seed import BenchmarkDataset, seed_database
+	from benchmarks.scenarios import (
+		BenchmarkState,
+		RequestSpec,
+		Scenario,
+		build_get_todo,
+		build_get_user_todos,
+		build_patch_todo,
+	)
+	from benchmarks.runner import ScenarioResult, run_scenario, uvicorn_client
+
+	for suffix in ("", "-wal", "-shm"):
+		if exists(args.database + suffix):
+			remove(args.database + suffix)
+	dataset: BenchmarkDataset = BenchmarkDataset.for_scale(100_000, 100)
+	seed_database(dataset, BENCHMARK_RANDOM_SEED)
+	state: BenchmarkState = BenchmarkState(dataset=dataset, run_id="engines")
+
+	def build_mix(state: BenchmarkState, rng: Random) -> RequestSpec:
+		draw: float = rng.random()
+		if draw < WRITE_SHARE:
+			return build_patch_todo(state, rng)
+		if draw < (1 + WRITE_SHARE) / 2:
+			return build_get_user_todos(state, rng)
+		return build_get_todo(state, rng)
+
+	mix: Scenario = Scenario("mix", build_mix)
+	levels: list[int] = sorted(args.concurrency)
+	results: dict[str, dict[str, Any]] = {}
+	failures: list[str] = []
+
+	client: AsyncClient
+	for index, mode in enumerate(reversed(DB_SESSION_MODES)):
+		environ["DB_SESSION_MODE"] = mode
+		async with uvicorn_client(levels[-1], args.workers, args.port + index) as (client, _):
+			for concurrency in levels:
+				result: ScenarioResult = await run_scenario(
+					client, mix, state, args.requests, concurrency, BENCHMARK_RANDOM_SEED
+				)
+				summary: dict[str, Any] = result.summary()
+				results[f"{mode}:{concurrency}"] = summary
+				print(
+					f"{mode:<6}{concurrency:>5} clients {summary['throughput']:>9.1f} req/s"
+					f"  p50 {summary['p50_ms']:>8.2f} ms  p95 {summary['p95_ms']:>8.2f} ms"
+					f"  p99 {summary['p99_ms']:>8.2f} ms  errors {result.errors}"
+				)
+				if result.errors:
+					failures.append(f"{mode} at {concurrency} clients answered {summary['status_codes']}")
+
+	for concurrency in levels:
+		speedup: float = (
+			results[f"async:{concurrency}"]["throughput"] / results[f"sync:{concurrency}"]["throughput"]
+		)
+		results[f"async:{concurrency}"]["speedup"] = speedup
+		print(f"{concurrency:>5} clients  async/sync throughput {speedup:.2f}x")
+
+	if args.output:
+		from benchmarks.report import save_report
+
+		save_report(args.output, results)
+		print(f"Report written to {args.output}")
+
+	for failure in failures:
+		print(f"FAILED: {failure}")
+	return 1 if failures else 0
+
+
+# Usage (from the backend directory): python -m benchmarks.engines
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	prepare_environment(arguments.database)
+	sys.exit(run(benchmark(arguments)))
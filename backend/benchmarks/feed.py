@@ -0,0 +1,172 @@
+import sys
+import tracemalloc
+from json import loads
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+from asyncio import Task, create_task, gather, run, sleep, wait_for
+from typing import Any
+
+
+# Fan-out cost and delivery latency of the change feed, measured in process
+# through the same SSE generator the route streams: idle subscribers that
+# never receive an event, active ones that follow a few busy users, and a
+# share of slow consumers that must be cut off by the backpressure policy
+# without delaying anyone else.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.feed",
+		description="Measure fan-out and delivery latency of the to-do change feed."
+	)
+	parser.add_argument("--idle", type=int, default=10_000, help="subscribers without events")
+	parser.add_argument("--active", type=int, default=1_000, help="subscribers receiving events")
+	parser.add_argument("--active-users", type=int, default=20, help="users the active ones follow")
+	parser.add_argument("--events", type=int, default=10_000)
+	parser.add_argument("--rate", type=float, default=2_000.0, help="published events per second")
+	parser.add_argument("--slow", type=float, default=0.05, help="share of slow active subscribers")
+	parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds a slow one spends per event")
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+def percentile(samples: list[float], share: float) -> float:
+	return samples[min(int(len(samples) * share), len(samples) - 1)] if samples else 0.0
+
+
+class Consumer:
+	def __init__(self, user_id: int, delay: float) -> None:
+		self.user_id: int = user_id
+		self.delay: float = delay
+		self.received: int = 0
+		self.resyncs: int = 0
+		self.latencies: list[float] = []
+
+	async def follow(self) -> None:
+		from src.feed.streams import stream_change_events
+
+		async for chunk in stream_change_events(self.user_id):
+			if not chunk.startswith("data: "):
+				continue
+
+			event: dict[str, Any] = loads(chunk[6:])
+			if event["event"] == "feed.resync":
+				self.resyncs += 1
+				continue
+
+			self.received += 1
+			self.latencies.append(perf_counter() - event["sent"])
+			if self.delay:
+				await sleep(self.delay)
+
+
+async def benchmark(args: Namespace) -> dict[str, Any]:
+	from src.feed.hub import change_hub
+
+	await change_hub.start()
+	idle_user_offset: int = args.active_users
+
+	tracemalloc.start()
+	started: float = perf_counter()
+	idle: list[Consumer] = [
+		Consumer(idle_user_offset + index + 1, 0.0) for index in range(args.idle)
+	]
+	slow_every: int = round(1 / args.slow) if args.slow > 0 else 0
+	active: list[Consumer] = [
+		Consumer(
+			index % args.active_users + 1,
+			args.slow_delay if slow_every and index % slow_every == 0 else 0.0
+		)
+		for index in range(args.active)
+	]
+	tasks: list[Task] = [create_task(consumer.follow()) for consumer in idle + active]
+	await sleep(0)
+	while change_hub.stats()["subscribers"] < len(tasks):
+		await sleep(0.01)
+	subscribe_seconds: float = perf_counter() - started
+	memory_bytes: int = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+
+	print(
+		f"{len(tasks)} subscribers in {subscribe_seconds:.2f} s,"
+		f" {memory_bytes / len(tasks) / 1024:.1f} KiB each"
+	)
+
+	# Publish in small bursts at the requested rate, timing each fan-out.
+	publish_latencies: list[float] = []
+	burst: int = max(1, int(args.rate / 100))
+	started = perf_counter()
+	for index in range(args.events):
+		user_id: int = index % args.active_users + 1
+		publish_started: float = perf_counter()
+		await change_hub.publish(
+			user_id,
+			{"event": "todo.updated", "user_id": user_id, "sent": publish_started}
+		)
+		publish_latencies.append(perf_counter() - publish_started)
+		if index % burst == burst - 1:
+			await sleep(max(0.0, started + (index + 1) / args.rate - perf_counter()))
+
+	fast: list[Consumer] = [consumer for consumer in active if not consumer.delay]
+	slow: list[Consumer] = [consumer for consumer in active if consumer.delay]
+	expected: int = args.events // args.active_users
+	try:
+		await wait_for(wait_for_delivery(fast, expected), 30.0)
+	except TimeoutError:
+		print("Timed out waiting for the fast subscribers")
+	publish_seconds: float = perf_counter() - started
+
+	await change_hub.stop()
+	await gather(*tasks, return_exceptions=True)
+
+	publish_latencies.sort()
+	delivery: list[float] = sorted(latency for consumer in fast for latency in consumer.latencies)
+	results: dict[str, Any] = {
+		"subscribers": len(tasks),
+		"subscribe_seconds": subscribe_seconds,
+		"memory_per_subscriber_bytes": memory_bytes / len(tasks),
+		"events": args.events,
+		"events_per_second": args.events / publish_seconds,
+		"publish_p50_us": percentile(publish_latencies, 0.5) * 1e6,
+		"publish_p99_us": percentile(publish_latencies, 0.99) * 1e6,
+		"delivery_p50_ms": percentile(delivery, 0.5) * 1000,
+		"delivery_p95_ms": percentile(delivery, 0.95) * 1000,
+		"delivery_p99_ms": percentile(delivery, 0.99) * 1000,
+		"fast_delivered": sum(consumer.received for consumer in fast),
+		"fast_expected": expected * len(fast),
+		"fast_resyncs": sum(consumer.resyncs for consumer in fast),
+		"slow_delivered": sum(consumer.received for consumer in slow),
+		"slow_resyncs": sum(consumer.resyncs for consumer in slow),
+		"idle_received": sum(consumer.received for consumer in idle),
+	}
+
+	print(
+		f"{args.events} events at {results['events_per_second']:.0f}/s"
+		f"  publish p50 {results['publish_p50_us']:.1f} us  p99 {results['publish_p99_us']:.1f} us"
+	)
+	print(
+		f"delivery p50 {results['delivery_p50_ms']:.2f} ms  p95 {results['delivery_p95_ms']:.2f} ms"
+		f"  p99 {results['delivery_p99_ms']:.2f} ms"
+	)
+	print(
+		f"fast {results['fast_delivered']}/{results['fast_expected']} delivered,"
+		f" {results['fast_resyncs']} resyncs; slow {results['slow_delivered']} delivered,"
+		f" {results['slow_resyncs']} resyncs; idle {results['idle_received']} received"
+	)
+	return results
+
+
+async def wait_for_delivery(consumers: list[Consumer], expected: int) -> None:
+	while any(consumer.received < expected for consumer in consumers):
+		await sleep(0.01)
+
+
+# Usage (from the backend directory): python -m benchmarks.feed
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	results: dict[str, Any] = run(benchmark(arguments))
+	if arguments.output:
+		from benchmarks.report import save_report
+
+		save_report(arguments.output, results)
+
+	# Every fast subscriber must see every event of its user.
+	sys.exit(0 if results["fast_delivered"] == results["fast_expected"] else 1)
@@ -0,0 +1,97 @@
+import sys
+from os import environ, remove
+from os.path import exists, join
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from typing import Any
+
+from benchmarks import BENCHMARK_RANDOM_SEED, prepare_environment
+
+
+CONCURRENCY_LEVELS: tuple[int, ...] = (1, 4, 16, 64)
+
+
+# Throughput of POST /users/auth as concurrent logins rise. Password hashing
+# is deliberately slow and runs off the event loop, so logins per second
+# should grow with concurrency up to the hashing threads (or workers) and
+# then level off, without stalling the other routes.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.login",
+		description="Measure login throughput at increasing concurrency."
+	)
+	parser.add_argument(
+		"--concurrency", type=int, nargs="+", default=list(CONCURRENCY_LEVELS),
+		help="concurrent logins to compare"
+	)
+	parser.add_argument("--requests", type=int, default=200, help="logins per concurrency level")
+	parser.add_argument("--driver", choices=("asgi", "uvicorn"), default="asgi")
+	parser.add_argument("--workers", type=int, default=1, help="worker processes of python -m src.server")
+	parser.add_argument("--port", type=int, default=8767)
+	parser.add_argument("--database", default=join("src", "db", "benchmark_login.db"))
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+async def benchmark(args: Namespace) -> int:
+	from src.resources.config import DB_URL
+
+	if DB_URL != environ["DATABASE_URL"]:
+		print(f"Refusing to benchmark: the application is configured for {DB_URL}")
+		return 2
+
+	from httpx import AsyncClient
+
+	from benchmarks.seed import BenchmarkDataset, seed_database
+	from benchmarks.scenarios import SCENARIOS, BenchmarkState, Scenario
+	from benchmarks.runner import ScenarioResult, asgi_client, run_scenario, uvicorn_client
+
+	for suffix in ("", "-wal", "-shm"):
+		if exists(args.database + suffix):
+			remove(args.database + suffix)
+	dataset: BenchmarkDataset = BenchmarkDataset.for_scale(1_000, 10)
+	seed_database(dataset, BENCHMARK_RANDOM_SEED)
+	state: BenchmarkState = BenchmarkState(dataset=dataset, run_id="login")
+
+	auth_user: Scenario = next(scenario for scenario in SCENARIOS if scenario.name == "auth_user")
+	results: dict[str, dict[str, Any]] = {}
+	levels: list[int] = sorted(args.concurrency)
+
+	client_context = (
+		asgi_client() if args.driver == "asgi"
+		else uvicorn_client(levels[-1], args.workers, args.port)
+	)
+	client: AsyncClient
+	async with client_context as (client, _):
+		for concurrency in levels:
+			result: ScenarioResult = await run_scenario(
+				client, auth_user, state, args.requests, concurrency, BENCHMARK_RANDOM_SEED
+			)
+			summary: dict[str, Any] = result.summary()
+			results[f"concurrency:{concurrency}"] = summary
+			print(
+				f"{concurrency:>3} concurrent {summary['throughput']:>8.1f} logins/s"
+				f"  p50 {summary['p50_ms']:>8.2f} ms  p95 {summary['p95_ms']:>8.2f} ms"
+				f"  errors {result.errors}"
+			)
+
+	if args.output:
+		from benchmarks.report import save_report
+
+		save_report(args.output, results)
+		print(f"Report written to {args.output}")
+
+	failures: list[str] = [
+		f"{name} answered {summary['status_codes']}"
+		for name, summary in results.items() if summary["errors"]
+	]
+	for failure in failures:
+		print(f"FAILED: {failure}")
+	return 1 if failures else 0
+
+
+# Usage (from the backend directory): python -m benchmarks.login
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	prepare_environment(arguments.database)
+	sys.exit(run(benchmark(arguments)))
@@ -0,0 +1,146 @@
+import sys
+from os import environ, remove
+from os.path import exists, join
+from time import perf_counter
+from itertools import islice
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from typing import Any
+
+from benchmarks import BENCHMARK_RANDOM_SEED, prepare_environment
+
+
+ACCOUNT_SIZES: tuple[int, ...] = (10, 1_000, 100_000, 1_000_000)
+PAGE_SIZE: int = 50
+
+
+# Latency of one user's to-do list as the account grows from a handful of
+# to-dos to a million: the first page and the last page reached by cursor
+# should stay flat, while the last page reached by offset shows what deep
+# offsets cost. The account grows in place, so every size reuses the rows
+# seeded for the previous one.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.pages",
+		description="Measure per-user page latency across account sizes, by offset and by cursor."
+	)
+	parser.add_argument(
+		"--sizes", type=int, nargs="+", default=list(ACCOUNT_SIZES),
+		help="to-dos in the account at each step"
+	)
+	parser.add_argument("--requests", type=int, default=100, help="requests per page and size")
+	parser.add_argument(
+		"--max-ratio", type=float, default=3.0,
+		help="largest/smallest account p50 allowed for the first and the cursor page"
+	)
+	parser.add_argument("--database", default=join("src", "db", "benchmark_pages.db"))
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+def grow_account(size: int, previous: int) -> None:
+	from benchmarks.seed import BenchmarkDataset, generate_todos, insert_chunks, refresh_counters
+	from src.resources.models import ToDo
+
+	# The generator is deterministic, so skipping the rows already inserted
+	# continues the same account.
+	rows = islice(generate_todos(BenchmarkDataset(1, size), BENCHMARK_RANDOM_SEED), previous, None)
+	insert_chunks(ToDo, rows, "to-dos", size - previous)
+	refresh_counters()
+
+
+async def benchmark(args: Namespace) -> int:
+	from src.resources.config import DB_URL
+
+	if DB_URL != environ["DATABASE_URL"]:
+		print(f"Refusing to benchmark: the application is configured for {DB_URL}")
+		return 2
+
+	from httpx import AsyncClient, Response
+
+	from benchmarks.seed import BenchmarkDataset, seed_database
+	from benchmarks.scenarios import BenchmarkState
+	from benchmarks.runner import asgi_client
+	from src.resources.functions import encode_cursor
+
+	for suffix in ("", "-wal", "-shm"):
+		if exists(args.database + suffix):
+			remove(args.database + suffix)
+	sizes: list[int] = sorted(args.sizes)
+	seed_database(BenchmarkDataset(1, 0), BENCHMARK_RANDOM_SEED)
+	state: BenchmarkState = BenchmarkState(dataset=BenchmarkDataset(1, 0), run_id="pages")
+
+	user_id: int = state.dataset.user_id(0)
+	headers: dict[str, str] = state.headers(user_id)
+	results: dict[str, dict[str, Any]] = {}
+	failures: list[str] = []
+	previous: int = 0
+
+	client: AsyncClient
+	async with asgi_client() as (client, _):
+		for size in sizes:
+			grow_account(size, previous)
+			previous = size
+
+			dataset: BenchmarkDataset = BenchmarkDataset(1, size)
+			start: int = max(size - PAGE_SIZE, 0)
+			pages: dict[str, dict[str, Any]] = {
+				"first": {"limit": PAGE_SIZE},
+				"last_offset": {"offset": start, "limit": PAGE_SIZE},
+				"last_cursor": (
+					{"after": encode_cursor(dataset.todo_id(user_id, start - 1)), "limit": PAGE_SIZE}
+					if start else {"limit": PAGE_SIZE}
+				),
+			}
+
+			for page, params in pages.items():
+				latencies: list[float] = []
+				statuses: set[int] = set()
+				for _ in range(args.requests):
+					started: float = perf_counter()
+					response: Response = await client.get(
+						f"/users/{user_id}/todos", params=params, headers=headers
+					)
+					latencies.append(perf_counter() - started)
+					statuses.add(response.status_code)
+
+				latencies.sort()
+				summary: dict[str, Any] = {
+					"todos": size,
+					"statuses": sorted(statuses),
+					"p50_ms": latencies[len(latencies) // 2] * 1000,
+					"p95_ms": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+				}
+				results[f"{page}:{size}"] = summary
+				print(
+					f"{page:<12}{size:>9} to-dos  p50 {summary['p50_ms']:>7.2f} ms"
+					f"  p95 {summary['p95_ms']:>7.2f} ms"
+					f"  status {','.join(map(str, summary['statuses']))}"
+				)
+				if statuses != {200}:
+					failures.append(f"{page} page of {size} to-dos answered {sorted(statuses)}")
+
+	for page in ("first", "last_cursor", "last_offset"):
+		ratio: float = results[f"{page}:{sizes[-1]}"]["p50_ms"] / results[f"{page}:{sizes[0]}"]["p50_ms"]
+		results[f"{page}:{sizes[-1]}"]["p50_ratio"] = ratio
+		print(f"{page:<12}p50 {sizes[-1]} / {sizes[0]} to-dos: {ratio:.2f}x")
+		# Deep offsets are expected to grow; they are reported, not enforced.
+		if page != "last_offset" and ratio > args.max_ratio:
+			failures.append(f"{page} page p50 grew {ratio:.2f}x from {sizes[0]} to {sizes[-1]} to-dos")
+
+	if args.output:
+		from benchmarks.report import save_report
+
+		save_report(args.output, results)
+		print(f"Report written to {args.output}")
+
+	for failure in failures:
+		print(f"FAILED: {failure}")
+	return 1 if failures else 0
+
+
+# Usage (from the backend directory): python -m benchmarks.pages
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	prepare_environment(arguments.database)
+	sys.exit(run(benchmark(arguments)))
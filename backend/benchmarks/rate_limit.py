@@ -0,0 +1,105 @@
+from os import environ
+from types import SimpleNamespace
+from time import perf_counter_ns
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from typing import Any, Awaitable, Callable
+
+
+# Per-request cost of the rate limiter, measured in process: the bucket
+# update alone (hot key, and many keys with idle-bucket eviction) and the
+# whole enforce_rate_limit dependency including the token decode.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.rate_limit",
+		description="Measure the per-request overhead of the rate limiter."
+	)
+	parser.add_argument("--iterations", type=int, default=200_000)
+	parser.add_argument("--keys", type=int, default=100_000)
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+async def measure(name: str, iterations: int, call: Callable[[int], Awaitable[Any]]) -> dict[str, Any]:
+	samples: list[int] = []
+	for index in range(iterations):
+		started: int = perf_counter_ns()
+		await call(index)
+		samples.append(perf_counter_ns() - started)
+
+	samples.sort()
+	summary: dict[str, Any] = {
+		"iterations": iterations,
+		"mean_ns": sum(samples) / iterations,
+		"p50_ns": samples[iterations // 2],
+		"p99_ns": samples[min(int(iterations * 0.99), iterations - 1)],
+	}
+	print(
+		f"{name:<24} mean {summary['mean_ns']:>8.0f} ns"
+		f"  p50 {summary['p50_ns']:>8} ns  p99 {summary['p99_ns']:>8} ns"
+	)
+	return summary
+
+
+async def benchmark(args: Namespace) -> dict[str, Any]:
+	from fastapi import Request
+
+	from src.resources.config import RATE_LIMITS
+	from src.resources.dependencies import enforce_rate_limit
+	from src.resources.functions import create_access_token
+	from src.resources.rate_limit import MemoryRateLimitBackend, RateLimiter, rate_limiter
+
+	# Budgets large enough that every call takes the "allowed" path.
+	hot: MemoryRateLimitBackend = MemoryRateLimitBackend(max_buckets=args.keys, idle_seconds=600.0)
+	churn: MemoryRateLimitBackend = MemoryRateLimitBackend(
+		max_buckets=args.keys // 10,
+		idle_seconds=600.0
+	)
+	disabled: RateLimiter = RateLimiter(hot, enabled=False)
+	rate_limiter.backend = MemoryRateLimitBackend(max_buckets=args.keys, idle_seconds=600.0)
+	rate_limiter.enabled = True
+	RATE_LIMITS["GET /benchmark"] = (10**9, 10**9)
+
+	scope: dict[str, Any] = {
+		"type": "http",
+		"method": "GET",
+		"path": "/benchmark",
+		"headers": [(
+			b"authorization",
+			f"Bearer {create_access_token({'sub': 'admin'})}".encode()
+		)],
+		"client": ("127.0.0.1", 50000),
+		"route": SimpleNamespace(path="/benchmark"),
+	}
+	request: Request = Request(scope)
+
+	return {
+		"hot_key": await measure(
+			"hot key", args.iterations,
+			lambda index: hot.acquire("GET /todos|user:admin", 10**9, 10**9)
+		),
+		"many_keys": await measure(
+			"many keys + eviction", args.iterations,
+			lambda index: churn.acquire(f"GET /todos|ip:{index % args.keys}", 10**9, 10**9)
+		),
+		"dependency": await measure(
+			"enforce_rate_limit", args.iterations,
+			lambda index: enforce_rate_limit(request)
+		),
+		"disabled": await measure(
+			"disabled", args.iterations,
+			lambda index: disabled.acquire("key", 1, 1.0)
+		),
+	}
+
+
+# Usage (from the backend directory): python -m benchmarks.rate_limit
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	environ["RATE_LIMIT_BACKEND"] = "memory"
+
+	results: dict[str, Any] = run(benchmark(arguments))
+	if arguments.output:
+		from benchmarks.report import save_report
+
+		save_report(arguments.output, results)
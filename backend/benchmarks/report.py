@@ -0,0 +1,82 @@
+import json
+import sqlite3
+import platform
+from os import cpu_count
+from datetime import datetime
+from subprocess import DEVNULL, CalledProcessError, check_output
+from typing import Any
+
+from benchmarks.runner import ScenarioResult
+
+
+REPORT_VERSION: int = 1
+
+
+###############################################################################
+##################################### Reports #################################
+###############################################################################
+def get_git_revision() -> str | None:
+	try:
+		return check_output(["git", "rev-parse", "HEAD"], stderr=DEVNULL, text=True).strip()
+	except (OSError, CalledProcessError):
+		return None
+
+
+def build_report(options: dict[str, Any], results: list[ScenarioResult]) -> dict[str, Any]:
+	return {
+		"version": REPORT_VERSION,
+		"created_datetime": datetime.now().isoformat(),
+		"environment": {
+			"git_revision": get_git_revision(),
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"cpu_count": cpu_count(),
+			"sqlite": sqlite3.sqlite_version,
+		},
+		"options": options,
+		"scenarios": {result.name: result.summary() for result in results},
+	}
+
+
+def save_report(path: str, report: dict[str, Any]) -> None:
+	with open(path, "w") as report_file:
+		json.dump(report, report_file, indent=2)
+
+
+def load_report(path: str) -> dict[str, Any]:
+	with open(path) as report_file:
+		return json.load(report_file)
+
+
+###############################################################################
+################################### Comparison ################################
+###############################################################################
+# A scenario regresses when its throughput drops or its p95 latency grows by
+# more than `threshold` (a fraction) against the baseline.
+def compare_reports(
+	report: dict[str, Any],
+	baseline: dict[str, Any],
+	threshold: float
+) -> list[str]:
+	regressions: list[str] = []
+
+	print(f"\n{'scenario':<24} {'throughput':>12} {'p95':>12} {'p99':>12}")
+	for name, current in report["scenarios"].items():
+		previous: dict[str, Any] | None = baseline["scenarios"].get(name)
+		if previous is None:
+			print(f"{name:<24} {'(new)':>12}")
+			continue
+
+		throughput_change: float = relative_change(current["throughput"], previous["throughput"])
+		p95_change: float = relative_change(current["p95_ms"], previous["p95_ms"])
+		p99_change: float = relative_change(current["p99_ms"], previous["p99_ms"])
+		print(f"{name:<24} {throughput_change:>+11.1%} {p95_change:>+11.1%} {p99_change:>+11.1%}")
+
+		if throughput_change < -threshold or p95_change > threshold:
+			regressions.append(name)
+
+	return regressions
+
+
+def relative_change(current: float, previous: float) -> float:
+	return (current - previous) / previous if previous else 0.0
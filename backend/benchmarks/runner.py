@@ -0,0 +1,250 @@
+import sys
+from os import environ, getpid
+from random import Random
+from time import perf_counter
+from subprocess import Popen
+from asyncio import gather, sleep
+from dataclasses import dataclass, field
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Literal
+
+from httpx import ASGITransport, AsyncClient, HTTPError, Limits, Response
+
+from benchmarks.scenarios import BenchmarkState, RequestSpec, Scenario
+
+
+Driver = Literal["asgi", "uvicorn"]
+
+SERVER_START_TIMEOUT_SECONDS: float = 30.0
+REQUEST_TIMEOUT_SECONDS: float = 300.0
+
+
+###############################################################################
+##################################### Memory ##################################
+###############################################################################
+# Peak resident memory is read from /proc (Linux). Writing "5" to clear_refs
+# resets the high-water mark, which lets every scenario report its own peak.
+def process_tree(pid: int) -> list[int]:
+	pids: list[int] = [pid]
+	try:
+		with open(f"/proc/{pid}/task/{pid}/children") as children_file:
+			for child in children_file.read().split():
+				pids.extend(process_tree(int(child)))
+	except OSError:
+		pass
+	return pids
+
+
+def reset_peak_rss(pids: list[int]) -> None:
+	for pid in pids:
+		try:
+			with open(f"/proc/{pid}/clear_refs", "w") as clear_refs_file:
+				clear_refs_file.write("5")
+		except OSError:
+			pass
+
+
+def peak_rss_bytes(pids: list[int]) -> int | None:
+	total: int = 0
+	for pid in pids:
+		try:
+			with open(f"/proc/{pid}/status") as status_file:
+				for line in status_file:
+					if line.startswith("VmHWM:"):
+						total += int(line.split()[1]) * 1024
+						break
+		except OSError:
+			return None
+	return total
+
+
+###############################################################################
+##################################### Drivers #################################
+###############################################################################
+# Both drivers yield a client and the pid whose process tree serves it.
+@asynccontextmanager
+async def asgi_client() -> AsyncIterator[tuple[AsyncClient, int]]:
+	from main import app
+	from src.db.db import dispose_engines
+
+	try:
+		async with AsyncClient(
+			transport=ASGITransport(app=app),
+			base_url="http://benchmark",
+			timeout=REQUEST_TIMEOUT_SECONDS
+		) as client:
+			yield client, getpid()
+	finally:
+		# Pooled aiosqlite threads would otherwise keep the process alive.
+		await dispose_engines()
+
+
+@asynccontextmanager
+async def uvicorn_client(
+	concurrency: int,
+	workers: int,
+	port: int
+) -> AsyncIterator[tuple[AsyncClient, int]]:
+	process: Popen = Popen(
+		[
+			sys.executable, "-m", "src.server",
+			"--host", "127.0.0.1",
+			"--port", str(port),
+			"--workers", str(workers),
+		],
+		env=environ.copy()
+	)
+
+	try:
+		async with AsyncClient(
+			base_url=f"http://127.0.0.1:{port}",
+			timeout=REQUEST_TIMEOUT_SECONDS,
+			limits=Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+		) as client:
+			await wait_for_server(client, process)
+			yield client, process.pid
+	finally:
+		process.terminate()
+		process.wait(timeout=SERVER_START_TIMEOUT_SECONDS)
+
+
+async def wait_for_server(client: AsyncClient, process: Popen) -> None:
+	deadline: float = perf_counter() + SERVER_START_TIMEOUT_SECONDS
+	while perf_counter() < deadline:
+		if process.poll() is not None:
+			raise RuntimeError(f"server exited with code {process.returncode}")
+		try:
+			if (await client.get("/")).status_code == 200:
+				return
+		except HTTPError:
+			pass
+		await sleep(0.1)
+	raise RuntimeError("server did not start in time")
+
+
+###############################################################################
+################################### Scenarios #################################
+###############################################################################
+@dataclass
+class ScenarioResult:
+	name: str
+	requests: int = 0
+	errors: int = 0
+	skipped: int = 0
+	seconds: float = 0.0
+	peak_rss_bytes: int | None = None
+	latencies: list[float] = field(default_factory=list)
+	status_codes: dict[str, int] = field(default_factory=dict)
+
+	def percentile(self, fraction: float) -> float:
+		if not self.latencies:
+			return 0.0
+		ordered: list[float] = sorted(self.latencies)
+		return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+	def summary(self) -> dict[str, Any]:
+		return {
+			"requests": self.requests,
+			"errors": self.errors,
+			"skipped": self.skipped,
+			"seconds": self.seconds,
+			"throughput": self.requests / self.seconds if self.seconds else 0.0,
+			"mean_ms": (
+				sum(self.latencies) / len(self.latencies) * 1000 if self.latencies else 0.0
+			),
+			"p50_ms": self.percentile(0.50) * 1000,
+			"p95_ms": self.percentile(0.95) * 1000,
+			"p99_ms": self.percentile(0.99) * 1000,
+			"peak_rss_bytes": self.peak_rss_bytes,
+			"status_codes": self.status_codes,
+		}
+
+
+async def send(client: AsyncClient, spec: RequestSpec) -> tuple[Response | None, float]:
+	method, url, kwargs = spec
+	started: float = perf_counter()
+	try:
+		response: Response = await client.request(method, url, **kwargs)
+	except HTTPError:
+		return None, perf_counter() - started
+	return response, perf_counter() - started
+
+
+async def run_scenario(
+	client: AsyncClient,
+	scenario: Scenario,
+	state: BenchmarkState,
+	requests: int,
+	concurrency: int,
+	seed: int,
+	record_latency: bool = True
+) -> ScenarioResult:
+	result: ScenarioResult = ScenarioResult(scenario.name)
+	remaining: int = requests
+
+	async def worker(rng: Random) -> None:
+		nonlocal remaining
+		while remaining > 0:
+			remaining -= 1
+			spec: RequestSpec | None = scenario.build(state, rng)
+			if spec is None:
+				result.skipped += 1
+				continue
+
+			response, elapsed = await send(client, spec)
+			status_code: str = str(response.status_code) if response is not None else "error"
+			result.status_codes[status_code] = result.status_codes.get(status_code, 0) + 1
+			result.requests += 1
+			if response is None or response.status_code >= 400:
+				result.errors += 1
+			elif scenario.record is not None:
+				scenario.record(state, spec, response)
+			if record_latency:
+				result.latencies.append(elapsed)
+
+	started: float = perf_counter()
+	await gather(*(worker(Random(seed + index)) for index in range(concurrency)))
+	result.seconds = perf_counter() - started
+
+	return result
+
+
+async def run_benchmark(
+	client: AsyncClient,
+	server_pid: int,
+	scenarios: list[Scenario],
+	state: BenchmarkState,
+	requests: int,
+	warmup: int,
+	concurrency: int,
+	seed: int
+) -> list[ScenarioResult]:
+	results: list[ScenarioResult] = []
+
+	for scenario in scenarios:
+		scenario_requests: int = min(requests, scenario.max_requests or requests)
+		scenario_warmup: int = min(warmup, scenario.max_requests or warmup)
+
+		if scenario_warmup:
+			await run_scenario(
+				client, scenario, state, scenario_warmup, concurrency, seed, record_latency=False
+			)
+
+		pids: list[int] = process_tree(server_pid)
+		reset_peak_rss(pids)
+		result: ScenarioResult = await run_scenario(
+			client, scenario, state, scenario_requests, min(concurrency, scenario_requests), seed
+		)
+		result.peak_rss_bytes = peak_rss_bytes(pids)
+		results.append(result)
+
+		summary: dict[str, Any] = result.summary()
+		print(
+			f"{scenario.name:<24} {summary['throughput']:>9.1f} req/s"
+			f"  p50 {summary['p50_ms']:>8.2f} ms"
+			f"  p95 {summary['p95_ms']:>8.2f} ms"
+			f"  p99 {summary['p99_ms']:>8.2f} ms"
+			f"  errors {result.errors}"
+		)
+
+	return results
@@ -0,0 +1,353 @@
+from random import Random
+from itertools import count
+from datetime import timedelta
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from httpx import Response
+
+from benchmarks import BENCHMARK_PASSWORD
+from benchmarks.seed import BenchmarkDataset
+from src.resources.functions import create_access_token, encode_cursor
+
+
+# (method, url, httpx request keyword arguments)
+RequestSpec = tuple[str, str, dict[str, Any]]
+
+BATCH_SIZE: int = 10
+PAGE_SIZE: int = 50
+TOKEN_EXPIRE: timedelta = timedelta(days=1)
+
+
+###############################################################################
+##################################### State ###################################
+###############################################################################
+# Scenarios run in list order, so the create scenarios fill the pools the
+# matching delete scenarios drain: seeded rows are never deleted and every
+# run sees the same dataset.
+@dataclass
+class BenchmarkState:
+	dataset: BenchmarkDataset
+	run_id: str
+	headers_by_user: dict[int, dict[str, str]] = field(default_factory=dict)
+	created_users: list[int] = field(default_factory=list)
+	deleted_users: list[int] = field(default_factory=list)
+	created_todos: list[tuple[int, int]] = field(default_factory=list)
+	created_batches: list[tuple[int, list[int]]] = field(default_factory=list)
+	sequence: Iterator[int] = field(default_factory=count)
+
+	def headers(self, user_id: int) -> dict[str, str]:
+		headers: dict[str, str] | None = self.headers_by_user.get(user_id)
+		if headers is None:
+			token: str = create_access_token(
+				data={"sub": self.dataset.username(user_id)},
+				expires_delta=TOKEN_EXPIRE
+			)
+			headers = self.headers_by_user[user_id] = {"Authorization": f"Bearer {token}"}
+		return headers
+
+	@property
+	def admin_headers(self) -> dict[str, str]:
+		return self.headers(self.dataset.admin_id)
+
+	def random_user(self, rng: Random) -> int:
+		return self.dataset.user_id(rng.randrange(self.dataset.users))
+
+	def random_todo(self, rng: Random, user_id: int) -> int:
+		return self.dataset.todo_id(user_id, rng.randrange(self.dataset.todos_per_user))
+
+	def new_username(self) -> str:
+		return f"b{self.run_id}{next(self.sequence)}"
+
+
+@dataclass(frozen=True)
+class Scenario:
+	name: str
+	build: Callable[[BenchmarkState, Random], RequestSpec | None]
+	record: Callable[[BenchmarkState, RequestSpec, Response], None] | None = None
+	# Caps the request count of scenarios whose cost grows with the dataset.
+	max_requests: int | None = None
+
+
+###############################################################################
+##################################### Users ###################################
+###############################################################################
+def build_create_user(state: BenchmarkState, rng: Random) -> RequestSpec:
+	username: str = state.new_username()
+	return ("POST", "/users/", {"json": {
+		"username": username,
+		"email": f"{username}@example.com",
+		"password": BENCHMARK_PASSWORD,
+	}})
+
+
+def record_create_user(state: BenchmarkState, spec: RequestSpec, response: Response) -> None:
+	if response.status_code == 201:
+		state.created_users.append(response.json()["user"]["id"])
+
+
+def build_auth_user(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("POST", "/users/auth", {"data": {
+		"username": state.dataset.username(state.random_user(rng)),
+		"password": BENCHMARK_PASSWORD,
+	}})
+
+
+def build_get_users(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("GET", "/users/", {
+		"params": {"offset": rng.randrange(state.dataset.users), "limit": PAGE_SIZE},
+		"headers": state.admin_headers,
+	})
+
+
+def build_get_user(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}", {"headers": state.headers(user_id)})
+
+
+def build_patch_user(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("PATCH", f"/users/{user_id}", {
+		"json": {"disabled": False},
+		"headers": state.headers(user_id),
+	})
+
+
+def build_delete_user(state: BenchmarkState, rng: Random) -> RequestSpec | None:
+	if not state.created_users:
+		return None
+	return ("DELETE", f"/users/{state.created_users.pop()}", {"headers": state.admin_headers})
+
+
+def record_delete_user(state: BenchmarkState, spec: RequestSpec, response: Response) -> None:
+	if response.status_code == 202:
+		state.deleted_users.append(response.json()["job"]["user_id"])
+
+
+def build_get_user_deletion(state: BenchmarkState, rng: Random) -> RequestSpec | None:
+	if not state.deleted_users:
+		return None
+	return ("GET", f"/users/{rng.choice(state.deleted_users)}/deletion", {
+		"headers": state.admin_headers,
+	})
+
+
+# The same admin page over and over: every request after the first is
+# answered from the response cache.
+def build_get_users_cached(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("GET", "/users/", {
+		"params": {"offset": 0, "limit": PAGE_SIZE},
+		"headers": state.admin_headers,
+	})
+
+
+def build_get_user_stats(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}/stats", {"headers": state.headers(user_id)})
+
+
+def build_get_metrics(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("GET", "/metrics", {"headers": state.admin_headers})
+
+
+###############################################################################
+##################################### To-Dos ##################################
+###############################################################################
+def todo_payload(rng: Random) -> dict[str, Any]:
+	return {
+		"description": f"benchmark {rng.randrange(1_000_000)}",
+		"reminder_datetime": "2031-01-01T09:00:00",
+		"expiration_datetime": "2031-01-02T09:00:00",
+	}
+
+
+def build_create_todo(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("POST", f"/users/{user_id}/todos", {
+		"json": todo_payload(rng),
+		"headers": state.headers(user_id),
+	})
+
+
+def record_create_todo(state: BenchmarkState, spec: RequestSpec, response: Response) -> None:
+	if response.status_code == 201:
+		todo: dict[str, Any] = response.json()["todo"]
+		state.created_todos.append((todo["user_id"], todo["id"]))
+
+
+def build_get_todos(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("GET", "/todos", {
+		"params": {"offset": rng.randrange(state.dataset.todos), "limit": PAGE_SIZE},
+		"headers": state.admin_headers,
+	})
+
+
+def build_filter_todos(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("GET", "/todos", {
+		"params": {"done": False, "sort": "-expiration_datetime", "limit": PAGE_SIZE},
+		"headers": state.admin_headers,
+	})
+
+
+def build_get_user_todos(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}/todos", {
+		"params": {"limit": PAGE_SIZE},
+		"headers": state.headers(user_id),
+	})
+
+
+# The last page of a user's to-dos, reached by offset and by cursor: both
+# return the same rows, but the offset has to walk past every earlier one.
+def last_page_start(state: BenchmarkState) -> int:
+	return max(state.dataset.todos_per_user - PAGE_SIZE, 0)
+
+
+def build_get_user_todos_offset(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}/todos", {
+		"params": {"offset": last_page_start(state), "limit": PAGE_SIZE},
+		"headers": state.headers(user_id),
+	})
+
+
+def build_get_user_todos_cursor(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	start: int = last_page_start(state)
+	params: dict[str, Any] = {"limit": PAGE_SIZE}
+	if start:
+		params["after"] = encode_cursor(state.dataset.todo_id(user_id, start - 1))
+	return ("GET", f"/users/{user_id}/todos", {
+		"params": params,
+		"headers": state.headers(user_id),
+	})
+
+
+# Likewise for the to-do list, through the response cache of GET /todos.
+def build_get_todos_cached(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("GET", "/todos", {
+		"params": {"done": False, "limit": PAGE_SIZE},
+		"headers": state.admin_headers,
+	})
+
+
+def build_search_user_todos(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}/todos", {
+		"params": {"q": "invoice", "limit": PAGE_SIZE},
+		"headers": state.headers(user_id),
+	})
+
+
+def build_get_todo(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}/todos/{state.random_todo(rng, user_id)}", {
+		"headers": state.headers(user_id),
+	})
+
+
+def build_patch_todo(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("PATCH", f"/users/{user_id}/todos/{state.random_todo(rng, user_id)}", {
+		"json": {"is_favorite": rng.random() < 0.5},
+		"headers": state.headers(user_id),
+	})
+
+
+def build_delete_todo(state: BenchmarkState, rng: Random) -> RequestSpec | None:
+	if not state.created_todos:
+		return None
+	user_id, todo_id = state.created_todos.pop()
+	return ("DELETE", f"/users/{user_id}/todos/{todo_id}", {"headers": state.headers(user_id)})
+
+
+def build_create_todos_batch(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("POST", f"/users/{user_id}/todos:batch", {
+		"json": [todo_payload(rng) for _ in range(BATCH_SIZE)],
+		"headers": state.headers(user_id),
+	})
+
+
+def record_create_todos_batch(state: BenchmarkState, spec: RequestSpec, response: Response) -> None:
+	if response.status_code == 201:
+		todos: list[dict[str, Any]] = [
+			result["todo"] for result in response.json()["results"] if "todo" in result
+		]
+		if todos:
+			state.created_batches.append((todos[0]["user_id"], [todo["id"] for todo in todos]))
+
+
+def build_patch_todos_batch(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("PATCH", f"/users/{user_id}/todos:batch", {
+		"json": [
+			{"id": state.random_todo(rng, user_id), "done": rng.random() < 0.3}
+			for _ in range(BATCH_SIZE)
+		],
+		"headers": state.headers(user_id),
+	})
+
+
+def build_delete_todos_batch(state: BenchmarkState, rng: Random) -> RequestSpec | None:
+	if not state.created_batches:
+		return None
+	user_id, todo_ids = state.created_batches.pop()
+	return ("DELETE", f"/users/{user_id}/todos:batch", {
+		"json": todo_ids,
+		"headers": state.headers(user_id),
+	})
+
+
+def build_export_todos(state: BenchmarkState, rng: Random) -> RequestSpec:
+	return ("GET", "/todos:export", {
+		"params": {"format": "ndjson"},
+		"headers": state.admin_headers,
+	})
+
+
+def build_export_user_todos(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}/todos:export", {
+		"params": {"format": "csv"},
+		"headers": state.headers(user_id),
+	})
+
+
+def build_sync_user_todos(state: BenchmarkState, rng: Random) -> RequestSpec:
+	user_id: int = state.random_user(rng)
+	return ("GET", f"/users/{user_id}/todos:sync", {
+		"params": {"limit": 100},
+		"headers": state.headers(user_id),
+	})
+
+
+SCENARIOS: list[Scenario] = [
+	Scenario("create_user", build_create_user, record_create_user),
+	Scenario("auth_user", build_auth_user),
+	Scenario("get_users", build_get_users),
+	Scenario("get_users_cached", build_get_users_cached),
+	Scenario("get_user", build_get_user),
+	Scenario("get_user_stats", build_get_user_stats),
+	Scenario("patch_user", build_patch_user),
+	Scenario("delete_user", build_delete_user, record_delete_user),
+	Scenario("get_user_deletion", build_get_user_deletion),
+	Scenario("create_todo", build_create_todo, record_create_todo),
+	Scenario("get_todos", build_get_todos),
+	Scenario("filter_todos", build_filter_todos),
+	Scenario("get_todos_cached", build_get_todos_cached),
+	Scenario("get_user_todos", build_get_user_todos),
+	Scenario("get_user_todos_offset", build_get_user_todos_offset),
+	Scenario("get_user_todos_cursor", build_get_user_todos_cursor),
+	Scenario("search_user_todos", build_search_user_todos),
+	Scenario("get_todo", build_get_todo),
+	Scenario("patch_todo", build_patch_todo),
+	Scenario("delete_todo", build_delete_todo),
+	Scenario("create_todos_batch", build_create_todos_batch, record_create_todos_batch),
+	Scenario("patch_todos_batch", build_patch_todos_batch),
+	Scenario("delete_todos_batch", build_delete_todos_batch),
+	Scenario("export_todos", build_export_todos, max_requests=5),
+	Scenario("export_user_todos", build_export_user_todos),
+	Scenario("sync_user_todos", build_sync_user_todos),
+	Scenario("get_metrics", build_get_metrics),
+]
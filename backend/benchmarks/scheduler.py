@@ -0,0 +1,168 @@
+import sys
+from os import environ, remove
+from os.path import exists, join
+from itertools import islice
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from datetime import datetime, timedelta
+from typing import Any
+
+from benchmarks import BENCHMARK_RANDOM_SEED, prepare_environment
+
+
+TABLE_SIZES: tuple[int, ...] = (10_000, 100_000, 1_000_000)
+# Every seeded deadline falls within a few months of the seed base date, so
+# the measured windows start a year later and only hold the deadlines added
+# for them.
+WINDOW_OFFSET: timedelta = timedelta(days=365)
+WINDOW_TODO_ID_BASE: int = 100_000_000
+
+
+# Duration of the deadline scheduler's tick as the todos table grows from
+# ten thousand to a million rows. Each size gets a fresh scheduler and a
+# fresh window holding the same number of due deadlines per tick, so any
+# growth in the tick duration comes from the size of the table alone.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.scheduler",
+		description="Measure the deadline scheduler's tick duration across todos table sizes."
+	)
+	parser.add_argument(
+		"--sizes", type=int, nargs="+", default=list(TABLE_SIZES),
+		help="to-dos in the table at each step"
+	)
+	parser.add_argument("--ticks", type=int, default=120, help="ticks measured per size")
+	parser.add_argument("--due-per-tick", type=int, default=20, help="deadlines falling due in each tick")
+	parser.add_argument(
+		"--max-ratio", type=float, default=3.0,
+		help="largest/smallest table p50 tick duration allowed"
+	)
+	parser.add_argument("--database", default=join("src", "db", "benchmark_scheduler.db"))
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+def grow_table(size: int, previous: int) -> None:
+	from benchmarks.seed import BenchmarkDataset, generate_todos, insert_chunks, refresh_counters
+	from src.resources.models import ToDo
+
+	rows = islice(generate_todos(BenchmarkDataset(1, size), BENCHMARK_RANDOM_SEED), previous, None)
+	insert_chunks(ToDo, rows, "to-dos", size - previous)
+	refresh_counters()
+
+
+def add_window(step: int, start: datetime, ticks: int, due_per_tick: int, tick: timedelta) -> None:
+	from benchmarks.seed import insert_chunks
+	from src.resources.models import ToDo
+
+	count: int = ticks * due_per_tick
+	# Written well before the window, so the rescans find nothing new.
+	written: datetime = start - timedelta(days=1)
+	insert_chunks(ToDo, (
+		{
+			"id": WINDOW_TODO_ID_BASE + step * count + index,
+			"user_id": 2,
+			"description": f"due {index}",
+			"done": False,
+			"is_favorite": False,
+			"reminder_datetime": start + tick * (index // due_per_tick + 1),
+			"write_datetime": written,
+			"creation_datetime": written,
+		}
+		for index in range(count)
+	), "window to-dos", count)
+
+
+class CountingSink:
+	def __init__(self) -> None:
+		self.sent: int = 0
+
+	async def send(self, event: dict[str, Any]) -> None:
+		self.sent += 1
+
+
+async def benchmark(args: Namespace) -> int:
+	from src.resources.config import DB_URL
+
+	if DB_URL != environ["DATABASE_URL"]:
+		print(f"Refusing to benchmark: the application is configured for {DB_URL}")
+		return 2
+
+	from benchmarks.seed import SEED_BASE_DATETIME, BenchmarkDataset, seed_database
+	from src.db.db import dispose_engines
+	from src.scheduler.scheduler import DeadlineScheduler
+
+	for suffix in ("", "-wal", "-shm"):
+		if exists(args.database + suffix):
+			remove(args.database + suffix)
+	sizes: list[int] = sorted(args.sizes)
+	seed_database(BenchmarkDataset(1, 0), BENCHMARK_RANDOM_SEED)
+
+	results: dict[str, dict[str, Any]] = {}
+	failures: list[str] = []
+	previous: int = 0
+
+	for step, size in enumerate(sizes):
+		grow_table(size, previous)
+		previous = size
+
+		sink: CountingSink = CountingSink()
+		scheduler: DeadlineScheduler = DeadlineScheduler(sink, name=f"benchmark_scheduler_{size}")
+		tick: timedelta = timedelta(seconds=scheduler.tick_seconds)
+		now: datetime = SEED_BASE_DATETIME + WINDOW_OFFSET + timedelta(days=step)
+		add_window(step, now, args.ticks, args.due_per_tick, tick)
+
+		# The first tick restores the state and loads the whole horizon.
+		await scheduler.tick(now)
+		first_tick: float = scheduler.last_tick_seconds
+
+		durations: list[float] = []
+		for _ in range(args.ticks):
+			now += tick
+			await scheduler.tick(now)
+			durations.append(scheduler.last_tick_seconds)
+
+		durations.sort()
+		summary: dict[str, Any] = {
+			"todos": size + (step + 1) * args.ticks * args.due_per_tick,
+			"dispatched": sink.sent,
+			"first_tick_ms": first_tick * 1000,
+			"p50_ms": durations[len(durations) // 2] * 1000,
+			"p95_ms": durations[min(int(len(durations) * 0.95), len(durations) - 1)] * 1000,
+			"max_ms": durations[-1] * 1000,
+		}
+		results[f"tick:{size}"] = summary
+		print(
+			f"tick{size:>10} to-dos  first {summary['first_tick_ms']:>7.2f} ms"
+			f"  p50 {summary['p50_ms']:>7.2f} ms  p95 {summary['p95_ms']:>7.2f} ms"
+			f"  max {summary['max_ms']:>7.2f} ms  dispatched {sink.sent}"
+		)
+		if sink.sent != args.ticks * args.due_per_tick:
+			failures.append(
+				f"{size} to-dos dispatched {sink.sent} of {args.ticks * args.due_per_tick} deadlines"
+			)
+
+	await dispose_engines()
+
+	ratio: float = results[f"tick:{sizes[-1]}"]["p50_ms"] / results[f"tick:{sizes[0]}"]["p50_ms"]
+	results[f"tick:{sizes[-1]}"]["p50_ratio"] = ratio
+	print(f"tick p50 {sizes[-1]} / {sizes[0]} to-dos: {ratio:.2f}x")
+	if ratio > args.max_ratio:
+		failures.append(f"tick p50 grew {ratio:.2f}x from {sizes[0]} to {sizes[-1]} to-dos")
+
+	if args.output:
+		from benchmarks.report import save_report
+
+		save_report(args.output, results)
+		print(f"Report written to {args.output}")
+
+	for failure in failures:
+		print(f"FAILED: {failure}")
+	return 1 if failures else 0
+
+
+# Usage (from the backend directory): python -m benchmarks.scheduler
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	prepare_environment(arguments.database)
+	sys.exit(run(benchmark(arguments)))
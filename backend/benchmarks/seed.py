@@ -0,0 +1,143 @@
+from random import Random
+from time import perf_counter
+from dataclasses import dataclass
+from typing import Any, Iterator
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from src.db.db import engine, create_db_and_tables
+from src.db.migrations import recount_todo_counters
+from src.resources.models import ToDo, User
+from src.resources.credentials import hash_password_sync
+from benchmarks import BENCHMARK_PASSWORD
+
+
+SEED_CHUNK_SIZE: int = 50_000
+SEED_BASE_DATETIME: datetime = datetime(2030, 1, 1)
+SEED_VOCABULARY: tuple[str, ...] = (
+	"buy", "call", "write", "review", "plan", "pay", "book", "clean",
+	"groceries", "report", "invoice", "meeting", "dentist", "garden", "taxes", "trip",
+)
+
+
+###############################################################################
+################################### Dataset ###################################
+###############################################################################
+# Ids are assigned explicitly so that scenarios can address any seeded row
+# without reading them back: user 1 is the admin, users 2..N+1 own the to-dos
+# and to-dos are dealt to them round-robin.
+@dataclass(frozen=True)
+class BenchmarkDataset:
+	users: int
+	todos_per_user: int
+
+	@property
+	def todos(self) -> int:
+		return self.users * self.todos_per_user
+
+	@property
+	def admin_id(self) -> int:
+		return 1
+
+	def user_id(self, index: int) -> int:
+		return index + 2
+
+	def username(self, user_id: int) -> str:
+		return "admin" if user_id == self.admin_id else f"user{user_id}"
+
+	def todo_id(self, user_id: int, index: int) -> int:
+		return (user_id - 2) + index * self.users + 1
+
+	@classmethod
+	def for_scale(cls, todos: int, todos_per_user: int) -> "BenchmarkDataset":
+		return cls(users=max(todos // todos_per_user, 1), todos_per_user=todos_per_user)
+
+
+###############################################################################
+#################################### Seeding ##################################
+###############################################################################
+def generate_users(dataset: BenchmarkDataset) -> Iterator[dict[str, Any]]:
+	# Hashing is deliberately slow, so every user shares one hash.
+	password: bytes = hash_password_sync(BENCHMARK_PASSWORD)
+
+	for user_id in range(dataset.admin_id, dataset.users + 2):
+		username: str = dataset.username(user_id)
+		yield {
+			"id": user_id,
+			"username": username,
+			"email": f"{username}@example.com",
+			"password": password,
+			"disabled": False,
+			"is_admin": user_id == dataset.admin_id,
+			"write_datetime": SEED_BASE_DATETIME,
+			"creation_datetime": SEED_BASE_DATETIME,
+		}
+
+
+def generate_todos(dataset: BenchmarkDataset, seed: int) -> Iterator[dict[str, Any]]:
+	rng: Random = Random(seed)
+
+	for index in range(dataset.todos):
+		created: datetime = SEED_BASE_DATETIME + timedelta(seconds=index)
+		has_reminder: bool = rng.random() < 0.5
+		has_expiration: bool = rng.random() < 0.5
+		yield {
+			"id": index + 1,
+			"user_id": dataset.user_id(index % dataset.users),
+			"description": " ".join(rng.choices(SEED_VOCABULARY, k=3)) + f" {index}",
+			"done": rng.random() < 0.3,
+			"is_favorite": rng.random() < 0.1,
+			"reminder_datetime": (
+				created + timedelta(hours=rng.randint(1, 24 * 30)) if has_reminder else None
+			),
+			"expiration_datetime": (
+				created + timedelta(hours=rng.randint(24, 24 * 90)) if has_expiration else None
+			),
+			"write_datetime": created,
+			"creation_datetime": created,
+			"change_seq": index // dataset.users + 1,
+		}
+
+
+def insert_chunks(model: Any, rows: Iterator[dict[str, Any]], label: str, total: int) -> None:
+	inserted: int = 0
+	chunk: list[dict[str, Any]] = []
+
+	def flush() -> None:
+		nonlocal inserted
+		with engine.begin() as connection:
+			connection.execute(insert(model), chunk)
+		inserted += len(chunk)
+		chunk.clear()
+		print(f"\rSeeding {label}: {inserted}/{total}", end="", flush=True)
+
+	for row in rows:
+		chunk.append(row)
+		if len(chunk) >= SEED_CHUNK_SIZE:
+			flush()
+	if chunk:
+		flush()
+	print()
+
+
+def seed_database(dataset: BenchmarkDataset, seed: int) -> float:
+	started: float = perf_counter()
+
+	create_db_and_tables()
+	insert_chunks(User, generate_users(dataset), "users", dataset.users + 1)
+	insert_chunks(ToDo, generate_todos(dataset, seed), "to-dos", dataset.todos)
+	refresh_counters()
+
+	return perf_counter() - started
+
+
+# Bulk inserts bypass the write handlers that maintain the counters and the
+# change sequences.
+def refresh_counters() -> None:
+	with engine.begin() as connection:
+		recount_todo_counters(connection)
+		connection.execute(text(
+			"UPDATE users SET todo_change_seq = ("
+			"SELECT COALESCE(MAX(change_seq), 0) FROM todos WHERE todos.user_id = users.id)"
+		))
@@ -0,0 +1,137 @@
+from csv import writer
+from io import StringIO
+from json import dumps
+from time import perf_counter
+from datetime import datetime, timedelta
+from argparse import ArgumentParser, Namespace
+from typing import Any, Callable
+
+
+# Rows per second of the serializers every list, export and sync response
+# goes through, measured in process on plain result tuples shaped like the
+# ones the database returns: the JSON list mapping, the NDJSON and CSV export
+# encodings and the user list. The to-do list is compared with the mapping it
+# replaced, model_dump() plus a dict spread and isoformat() per datetime over
+# ORM instances; building those instances is left out of the timing.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.serializer",
+		description="Measure the rows per second of the response serializers."
+	)
+	parser.add_argument("--rows", type=int, default=100_000)
+	parser.add_argument("--repeat", type=int, default=5, help="best of this many runs")
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+def measure(name: str, rows: int, repeat: int, serialize: Callable[[], Any]) -> dict[str, Any]:
+	best: float = min(timed(serialize) for _ in range(repeat))
+	summary: dict[str, Any] = {
+		"rows": rows,
+		"seconds": best,
+		"rows_per_second": rows / best,
+	}
+	print(f"{name:<16}{summary['rows_per_second']:>12.0f} rows/s  ({best * 1000:.1f} ms for {rows} rows)")
+	return summary
+
+
+def timed(serialize: Callable[[], Any]) -> float:
+	started: float = perf_counter()
+	serialize()
+	return perf_counter() - started
+
+
+def model_dump_todo_list(todos: list[Any]) -> list[dict[str, Any]]:
+	return [
+		{
+			**todo.model_dump(),
+			"reminder_datetime": (
+				todo.reminder_datetime.isoformat() if todo.reminder_datetime else None
+			),
+			"expiration_datetime": (
+				todo.expiration_datetime.isoformat() if todo.expiration_datetime else None
+			),
+			"write_datetime": todo.write_datetime.isoformat(),
+			"creation_datetime": todo.creation_datetime.isoformat(),
+		}
+		for todo in todos
+	]
+
+
+def benchmark(args: Namespace) -> dict[str, Any]:
+	from src.resources.functions import (
+		TODO_COLUMNS,
+		USER_PUBLIC_COLUMNS,
+		format_todo_row,
+		map_todo_list,
+		map_user_list,
+	)
+	from src.resources.models import ToDo
+
+	base: datetime = datetime(2030, 1, 1)
+	samples: dict[str, Any] = {
+		"user_id": 2,
+		"description": "review invoice meeting 1",
+		"done": False,
+		"is_favorite": True,
+		"reminder_datetime": base + timedelta(hours=5),
+		"expiration_datetime": None,
+		"write_datetime": base,
+		"creation_datetime": base,
+		"username": "user2",
+		"email": "user2@example.com",
+		"disabled": False,
+		"is_admin": False,
+	}
+	# Columns without a sample value, the id among them, get the row index.
+	todo_rows: list[tuple[Any, ...]] = [
+		tuple(samples.get(column, index) for column in TODO_COLUMNS)
+		for index in range(args.rows)
+	]
+	todo_instances: list[ToDo] = [ToDo(**dict(zip(TODO_COLUMNS, row))) for row in todo_rows]
+	user_rows: list[tuple[Any, ...]] = [
+		tuple(samples.get(column, index) for column in USER_PUBLIC_COLUMNS)
+		for index in range(args.rows)
+	]
+
+	def export_csv() -> str:
+		buffer: StringIO = StringIO()
+		writer(buffer).writerows(format_todo_row(row).values() for row in todo_rows)
+		return buffer.getvalue()
+
+	results: dict[str, Any] = {
+		"todo_list_model_dump": measure(
+			"todo list before", args.rows, args.repeat, lambda: model_dump_todo_list(todo_instances)
+		),
+		"todo_list": measure(
+			"todo list", args.rows, args.repeat, lambda: map_todo_list(todo_rows)
+		),
+		"todo_list_json": measure(
+			"todo list json", args.rows, args.repeat, lambda: dumps(map_todo_list(todo_rows))
+		),
+		"export_ndjson": measure(
+			"export ndjson", args.rows, args.repeat,
+			lambda: "".join(dumps(format_todo_row(row)) + "\n" for row in todo_rows)
+		),
+		"export_csv": measure("export csv", args.rows, args.repeat, export_csv),
+		"user_list": measure(
+			"user list", args.rows, args.repeat, lambda: map_user_list(user_rows)
+		),
+	}
+	speedup: float = (
+		results["todo_list_model_dump"]["seconds"] / results["todo_list"]["seconds"]
+	)
+	results["todo_list"]["speedup"] = speedup
+	print(f"todo list speedup over model_dump(): {speedup:.1f}x")
+	return results
+
+
+# Usage (from the backend directory): python -m benchmarks.serializer
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+
+	results: dict[str, Any] = benchmark(arguments)
+	if arguments.output:
+		from benchmarks.report import save_report
+
+		save_report(arguments.output, results)
@@ -0,0 +1,193 @@
+import sys
+from os import environ, remove
+from os.path import exists, join
+from random import Random
+from sqlite3 import Connection, connect
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from typing import Any
+
+from benchmarks import BENCHMARK_RANDOM_SEED, prepare_environment
+
+
+WORKER_COUNTS: tuple[int, ...] = (1, 2, 4)
+PROFILES: tuple[str, ...] = ("default", "production")
+
+
+# Two costs of writing to a single SQLite file: what a client saves by
+# sending N to-dos as one batch instead of N requests (in process), and how
+# create throughput and errors behave when several server processes compete
+# for the write lock (python -m src.server with 1, 2, 4... workers), under
+# each engine profile: the default profile's rollback journal, where readers
+# and the writer block each other, against the production profile's WAL.
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m benchmarks.writes",
+		description="Compare single creates with one batch and measure multi-process write contention."
+	)
+	parser.add_argument("--batch-size", type=int, default=100, help="to-dos per batch")
+	parser.add_argument("--rounds", type=int, default=5, help="single/batch rounds")
+	parser.add_argument(
+		"--workers", type=int, nargs="+", default=list(WORKER_COUNTS),
+		help="server worker counts to compare"
+	)
+	parser.add_argument(
+		"--profiles", nargs="+", choices=PROFILES, default=list(PROFILES),
+		help="engine profiles (DB_PROFILE) to compare"
+	)
+	parser.add_argument("--requests", type=int, default=500, help="creates per worker count")
+	parser.add_argument("--concurrency", type=int, default=32)
+	parser.add_argument("--port", type=int, default=8766)
+	parser.add_argument("--database", default=join("src", "db", "benchmark_writes.db"))
+	parser.add_argument("--output", help="write the JSON report to this file")
+	return parser.parse_args()
+
+
+async def compare_batch(args: Namespace, state: Any) -> dict[str, Any]:
+	from httpx import AsyncClient, Response
+
+	from benchmarks.runner import asgi_client
+	from benchmarks.scenarios import todo_payload
+
+	rng: Random = Random(BENCHMARK_RANDOM_SEED)
+	single_seconds: float = 0.0
+	batch_seconds: float = 0.0
+	statuses: set[int] = set()
+
+	client: AsyncClient
+	async with asgi_client() as (client, _):
+		for _ in range(args.rounds):
+			user_id: int = state.random_user(rng)
+			payloads: list[dict[str, Any]] = [todo_payload(rng) for _ in range(args.batch_size)]
+			response: Response
+
+			started: float = perf_counter()
+			for payload in payloads:
+				response = await client.post(
+					f"/users/{user_id}/todos", json=payload, headers=state.headers(user_id)
+				)
+				statuses.add(response.status_code)
+			single_seconds += perf_counter() - started
+
+			started = perf_counter()
+			response = await client.post(
+				f"/users/{user_id}/todos:batch", json=payloads, headers=state.headers(user_id)
+			)
+			batch_seconds += perf_counter() - started
+			statuses.add(response.status_code)
+
+	todos: int = args.rounds * args.batch_size
+	summary: dict[str, Any] = {
+		"batch_size": args.batch_size,
+		"single_ms_per_todo": single_seconds / todos * 1000,
+		"batch_ms_per_todo": batch_seconds / todos * 1000,
+		"speedup": single_seconds / batch_seconds,
+		"statuses": sorted(statuses),
+	}
+	print(
+		f"{args.batch_size} single creates {summary['single_ms_per_todo']:>7.3f} ms/to-do"
+		f"  one batch {summary['batch_ms_per_todo']:>7.3f} ms/to-do"
+		f"  speedup {summary['speedup']:.1f}x"
+		f"  status {','.join(map(str, summary['statuses']))}"
+	)
+	return summary
+
+
+# The journal mode is stored in the database file, so WAL left behind by the
+# production profile would otherwise carry over to the default one.
+def set_journal_mode(database: str, profile: str) -> None:
+	from src.resources.config import DB_PROFILES
+
+	journal_mode: str = DB_PROFILES[profile]["pragmas"].get("journal_mode", "DELETE")
+	connection: Connection = connect(database)
+	try:
+		connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+	finally:
+		connection.close()
+
+
+async def measure_contention(args: Namespace, state: Any) -> dict[str, dict[str, Any]]:
+	from httpx import AsyncClient
+
+	from benchmarks.runner import ScenarioResult, run_scenario, uvicorn_client
+	from benchmarks.scenarios import SCENARIOS, Scenario
+	from src.db.db import dispose_engines
+
+	create_todo: Scenario = next(scenario for scenario in SCENARIOS if scenario.name == "create_todo")
+	results: dict[str, dict[str, Any]] = {}
+	# Nothing of this process may hold the file while its journal mode changes.
+	await dispose_engines()
+
+	client: AsyncClient
+	for profile_index, profile in enumerate(args.profiles):
+		environ["DB_PROFILE"] = profile
+		set_journal_mode(args.database, profile)
+
+		for index, workers in enumerate(args.workers):
+			# A fresh port per server, so a previous one still closing never answers.
+			port: int = args.port + profile_index * len(args.workers) + index
+			async with uvicorn_client(args.concurrency, workers, port) as (client, _):
+				result: ScenarioResult = await run_scenario(
+					client, create_todo, state, args.requests, args.concurrency, BENCHMARK_RANDOM_SEED
+				)
+
+			summary: dict[str, Any] = result.summary()
+			results[f"{profile}:workers:{workers}"] = summary
+			print(
+				f"{profile:<11}{workers} worker(s) {summary['throughput']:>9.1f} creates/s"
+				f"  p50 {summary['p50_ms']:>8.2f} ms  p95 {summary['p95_ms']:>8.2f} ms"
+				f"  p99 {summary['p99_ms']:>8.2f} ms  errors {result.errors}"
+				f"  status {summary['status_codes']}"
+			)
+
+	return results
+
+
+async def benchmark(args: Namespace) -> int:
+	from src.resources.config import DB_URL
+
+	if DB_URL != environ["DATABASE_URL"]:
+		print(f"Refusing to benchmark: the application is configured for {DB_URL}")
+		return 2
+
+	from benchmarks.seed import BenchmarkDataset, seed_database
+	from benchmarks.scenarios import BenchmarkState
+
+	for suffix in ("", "-wal", "-shm"):
+		if exists(args.database + suffix):
+			remove(args.database + suffix)
+	dataset: BenchmarkDataset = BenchmarkDataset.for_scale(10_000, 100)
+	seed_database(dataset, BENCHMARK_RANDOM_SEED)
+	state: BenchmarkState = BenchmarkState(dataset=dataset, run_id="writes")
+
+	results: dict[str, Any] = {
+		"batch": await compare_batch(args, state),
+		"contention": await measure_contention(args, state),
+	}
+
+	if args.output:
+		from benchmarks.report import save_report
+
+		save_report(args.output, results)
+		print(f"Report written to {args.output}")
+
+	# Lock timeouts surface as 5xx answers; any of them under the production
+	# profile fails the run. The default profile's are only reported.
+	failures: list[str] = [
+		f"{name} answered {summary['errors']} errors"
+		for name, summary in results["contention"].items()
+		if summary["errors"] and name.startswith("production:")
+	]
+	if results["batch"]["statuses"] != [201]:
+		failures.append(f"single/batch creates answered {results['batch']['statuses']}")
+	for failure in failures:
+		print(f"FAILED: {failure}")
+	return 1 if failures else 0
+
+
+# Usage (from the backend directory): python -m benchmarks.writes
+if __name__ == "__main__":
+	arguments: Namespace = parse_args()
+	prepare_environment(arguments.database)
+	sys.exit(run(benchmark(arguments)))
@@ -1,16 +1,37 @@
-from fastapi import HTTPException
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from fastapi import Depends, HTTPException, Request, Response
 from sqlalchemy.exc import IntegrityError
 
 from src import app
-from src.routers import todos, users
+from src.routers import metrics, todos, users
+from src.resources.config import METRICS_ENABLED, METRICS_PUBLIC, METRICS_SERVER_TIMING
+from src.resources.metrics import RequestTimings, record_request, request_timings
+from src.resources.dependencies import enforce_rate_limit, get_current_admin_user
 from src.resources.error_handlers import http_exception_handler, integrity_error_handler
 
 
 ###############################################################################
 ############################### Route Handlers ################################
 ###############################################################################
-app.include_router(router=todos.router, tags=["ToDos"])
-app.include_router(router=users.router, prefix="/users", tags=["Users"])
+app.include_router(
+	router=todos.router,
+	tags=["ToDos"],
+	dependencies=[Depends(enforce_rate_limit)]
+)
+app.include_router(
+	router=users.router,
+	prefix="/users",
+	tags=["Users"],
+	dependencies=[Depends(enforce_rate_limit)]
+)
+if METRICS_ENABLED:
+	app.include_router(
+		router=metrics.router,
+		tags=["Metrics"],
+		dependencies=[] if METRICS_PUBLIC else [Depends(get_current_admin_user)]
+	)
 
 ###############################################################################
 ############################### Error Handlers ################################
@@ -18,6 +39,37 @@ app.include_router(router=users.router, prefix="/users", tags=["Users"])
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(IntegrityError, integrity_error_handler)
 
+###############################################################################
+################################# Middlewares #################################
+###############################################################################
+if METRICS_ENABLED:
+	@app.middleware("http")
+	async def record_request_metrics(
+		request: Request,
+		call_next: Callable[[Request], Awaitable[Response]]
+	) -> Response:
+		timings: RequestTimings = RequestTimings()
+		token = request_timings.set(timings)
+		started: float = perf_counter()
+		try:
+			response: Response = await call_next(request)
+		finally:
+			request_timings.reset(token)
+
+		total_seconds: float = perf_counter() - started
+		route = request.scope.get("route")
+		record_request(
+			timings,
+			request.method,
+			getattr(route, "path", "unmatched"),
+			response.status_code,
+			total_seconds
+		)
+
+		if METRICS_SERVER_TIMING:
+			response.headers["Server-Timing"] = timings.server_timing(total_seconds)
+		return response
+
 
 @app.get("/")
 async def root() -> dict[str, str]:
@@ -1,7 +1,20 @@
 from fastapi import FastAPI
 from fastapi.security import OAuth2PasswordBearer
 
-from src.db.db import create_db_and_tables
+from src.db.db import create_db_and_tables, dispose_engines, prewarm_engines
+from src.jobs.queue import job_queue
+from src.jobs.events import deliver_change_event
+from src.feed.hub import change_hub
+from src.jobs.user_deletion import user_purger
+from src.jobs.tombstones import tombstone_pruner
+from src.scheduler.scheduler import deadline_scheduler
+from src.resources.config import (
+	SCHEDULER_ENABLED,
+	DB_MIGRATE_ON_STARTUP,
+	DB_POOL_PREWARM,
+	USER_PURGE_RESUME_ON_STARTUP,
+	TODO_TOMBSTONE_PRUNER_ENABLED,
+)
 
 
 app = FastAPI()
@@ -10,4 +23,50 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth")
 
 @app.on_event("startup")
 def on_startup() -> None:
-	create_db_and_tables()
+	if DB_MIGRATE_ON_STARTUP:
+		create_db_and_tables()
+
+
+@app.on_event("startup")
+async def prewarm_pool() -> None:
+	if DB_POOL_PREWARM:
+		await prewarm_engines()
+
+
+@app.on_event("startup")
+async def start_scheduler() -> None:
+	if SCHEDULER_ENABLED:
+		deadline_scheduler.start()
+
+
+@app.on_event("startup")
+async def start_job_queue() -> None:
+	job_queue.start()
+
+
+@app.on_event("startup")
+async def start_change_hub() -> None:
+	await change_hub.start()
+
+
+@app.on_event("startup")
+async def resume_user_purges() -> None:
+	if USER_PURGE_RESUME_ON_STARTUP:
+		await user_purger.resume()
+
+
+@app.on_event("startup")
+async def start_tombstone_pruner() -> None:
+	if TODO_TOMBSTONE_PRUNER_ENABLED:
+		tombstone_pruner.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+	await change_hub.stop()
+	await user_purger.stop()
+	await tombstone_pruner.stop()
+	await deadline_scheduler.stop()
+	await job_queue.stop()
+	await deliver_change_event.close()
+	await dispose_engines()
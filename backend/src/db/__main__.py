@@ -0,0 +1,10 @@
+from src.db.db import create_db_and_tables
+
+
+# Usage (from the backend directory): python -m src.db
+if __name__ == "__main__":
+	applied_versions: list[int] = create_db_and_tables()
+	if applied_versions:
+		print(f"Applied migrations: {', '.join(map(str, applied_versions))}")
+	else:
+		print("Database schema is up to date.")
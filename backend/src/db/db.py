@@ -1,16 +1,160 @@
-from sqlalchemy import Engine
-from sqlmodel import SQLModel, Session, create_engine
+from typing import Any, AsyncGenerator
 
-from src.resources.config import DB_URL, DB_CONNECT_ARGS
+from sqlalchemy import Engine, event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.resources import models  # noqa: F401 (registers the tables on SQLModel.metadata)
+from src.db.migrations import run_migrations
+from src.resources.metrics import instrument_engine
+from src.resources.config import (
+	DB_URL,
+	DB_CONNECT_ARGS,
+	DB_ASYNC_URL,
+	DB_ASYNC_CONNECT_ARGS,
+	DB_READ_URL,
+	DB_READ_ASYNC_URL,
+	DB_SESSION_MODE,
+	DB_PROFILES,
+	DB_PROFILE,
+	get_connect_args,
+)
 
-engine: Engine = create_engine(DB_URL, connect_args=DB_CONNECT_ARGS)
 
+db_profile: dict[str, Any] = DB_PROFILES[DB_PROFILE]
+pool_options: dict[str, Any] = {
+	option: db_profile[option]
+	for option in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle")
+}
 
-def create_db_and_tables() -> None:
+# A sync session waiting for a pooled connection would block the event loop,
+# and with it the requests holding the connections: in the sync session mode
+# the sync engines open as many connections as there are sessions.
+sync_pool_options: dict[str, Any] = (
+	{**pool_options, "max_overflow": -1} if DB_SESSION_MODE == "sync" else pool_options
+)
+
+engine: Engine = create_engine(DB_URL, connect_args=DB_CONNECT_ARGS, **sync_pool_options)
+async_engine: AsyncEngine = create_async_engine(
+	DB_ASYNC_URL,
+	connect_args=DB_ASYNC_CONNECT_ARGS,
+	**pool_options
+)
+read_async_engine: AsyncEngine = (
+	create_async_engine(
+		DB_READ_ASYNC_URL,
+		connect_args=get_connect_args(DB_READ_ASYNC_URL),
+		**pool_options
+	)
+	if DB_READ_ASYNC_URL
+	else async_engine
+)
+# Only the sync session mode reads through a sync engine.
+read_engine: Engine = (
+	create_engine(DB_READ_URL, connect_args=get_connect_args(DB_READ_URL), **sync_pool_options)
+	if DB_READ_URL and DB_SESSION_MODE == "sync"
+	else engine
+)
+
+
+def apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+	cursor = dbapi_connection.cursor()
+	for pragma, value in db_profile["pragmas"].items():
+		cursor.execute(f"PRAGMA {pragma}={value}")
+	cursor.close()
+
+
+for sync_engine in {engine, read_engine, async_engine.sync_engine, read_async_engine.sync_engine}:
+	if sync_engine.dialect.name == "sqlite":
+		event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+	instrument_engine(sync_engine)
+
+
+def create_db_and_tables() -> list[int]:
 	SQLModel.metadata.create_all(engine)
+	return run_migrations(engine)
+
+
+async def prewarm_engines() -> None:
+	for async_pool_engine in {async_engine, read_async_engine}:
+		# Hold the connections together so the pool opens distinct ones.
+		connections: list[AsyncConnection] = []
+		try:
+			for _ in range(pool_options["pool_size"]):
+				connection: AsyncConnection = await async_pool_engine.connect()
+				connections.append(connection)
+				await connection.execute(text("SELECT 1"))
+		finally:
+			for connection in connections:
+				await connection.close()
+
+
+async def dispose_engines() -> None:
+	await async_engine.dispose()
+	if read_async_engine is not async_engine:
+		await read_async_engine.dispose()
+	engine.dispose()
+	if read_engine is not engine:
+		read_engine.dispose()
+
+
+# The sync session mode hands the handlers a sync Session behind the
+# awaitable methods they call, so every query blocks the event loop.
+class BlockingSession:
+	def __init__(self, session: Session) -> None:
+		self.session: Session = session
+
+	@property
+	def no_autoflush(self) -> Any:
+		return self.session.no_autoflush
+
+	def add(self, instance: Any) -> None:
+		self.session.add(instance)
+
+	def add_all(self, instances: Any) -> None:
+		self.session.add_all(instances)
+
+	async def exec(self, statement: Any, **kwargs: Any) -> Any:
+		return self.session.exec(statement, **kwargs)
+
+	async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+		return self.session.execute(statement, *args, **kwargs)
+
+	async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+		return self.session.get(entity, ident, **kwargs)
+
+	async def refresh(self, instance: Any, **kwargs: Any) -> None:
+		self.session.refresh(instance, **kwargs)
+
+	async def delete(self, instance: Any) -> None:
+		self.session.delete(instance)
+
+	async def flush(self) -> None:
+		self.session.flush()
+
+	async def commit(self) -> None:
+		self.session.commit()
+
+	async def rollback(self) -> None:
+		self.session.rollback()
+
+
+async def get_session() -> AsyncGenerator[AsyncSession | BlockingSession, None]:
+	if DB_SESSION_MODE == "sync":
+		with Session(engine, expire_on_commit=False) as sync_session:
+			yield BlockingSession(sync_session)
+		return
+
+	async with AsyncSession(async_engine, expire_on_commit=False) as session:
+		yield session
+
 
+async def get_read_session() -> AsyncGenerator[AsyncSession | BlockingSession, None]:
+	if DB_SESSION_MODE == "sync":
+		with Session(read_engine, expire_on_commit=False) as sync_session:
+			yield BlockingSession(sync_session)
+		return
 
-def get_session():
-	with Session(engine) as session:
+	async with AsyncSession(read_async_engine, expire_on_commit=False) as session:
 		yield session
@@ -0,0 +1,344 @@
+from datetime import datetime
+from logging import Logger, getLogger
+from typing import Callable, Sequence
+
+from sqlalchemy import Connection, Engine, Row, inspect, text
+
+
+logger: Logger = getLogger(__name__)
+
+Migration = tuple[int, str, Callable[[Connection], None]]
+
+# users.username is VARCHAR(20); renamed duplicates must still fit.
+USERNAME_MAX_LENGTH: int = 20
+
+
+###############################################################################
+################################# Migrations ##################################
+###############################################################################
+# The baseline schema did not enforce unique usernames. Before the unique
+# index goes in, every account but the oldest of each duplicated username is
+# renamed to "<username>~<id>" and disabled, so an upgraded database still
+# starts and an admin can sort the accounts out afterwards.
+def _deduplicate_usernames(connection: Connection) -> None:
+	duplicates: Sequence[Row] = connection.execute(text(
+		"SELECT id, username FROM users "
+		"WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY username) "
+		"ORDER BY id"
+	)).all()
+
+	renamed: list[str] = []
+	for user_id, username in duplicates:
+		suffix: str = f"~{user_id}"
+		new_username: str = username[:USERNAME_MAX_LENGTH - len(suffix)] + suffix
+		if connection.execute(
+			text("SELECT 1 FROM users WHERE username = :username"),
+			{"username": new_username}
+		).first():
+			raise RuntimeError(
+				f"Cannot add the unique username index: user {user_id} shares the username "
+				f"{username!r} with an older account and {new_username!r} is taken too. "
+				"Rename one of them and run the migrations again."
+			)
+
+		connection.execute(
+			text(
+				"UPDATE users SET username = :username, disabled = :disabled, "
+				"write_datetime = :write_datetime WHERE id = :id"
+			),
+			{
+				"username": new_username,
+				"disabled": True,
+				"write_datetime": datetime.now(),
+				"id": user_id,
+			}
+		)
+		renamed.append(f"{username!r} (id {user_id}) -> {new_username!r}")
+
+	if renamed:
+		logger.warning(
+			"Renamed and disabled %s accounts with duplicate usernames: %s",
+			len(renamed),
+			", ".join(renamed)
+		)
+
+
+def _add_lookup_indexes(connection: Connection) -> None:
+	_deduplicate_usernames(connection)
+
+	statements: list[str] = [
+		"CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+		"CREATE INDEX IF NOT EXISTS ix_todos_user_id ON todos (user_id)",
+		"CREATE INDEX IF NOT EXISTS ix_todos_user_id_done ON todos (user_id, done)",
+		(
+			"CREATE INDEX IF NOT EXISTS ix_todos_user_id_expiration_datetime "
+			"ON todos (user_id, expiration_datetime)"
+		),
+		(
+			"CREATE INDEX IF NOT EXISTS ix_todos_user_id_is_favorite "
+			"ON todos (user_id, is_favorite)"
+		),
+	]
+	for statement in statements:
+		connection.execute(text(statement))
+
+
+def _add_todo_search(connection: Connection) -> None:
+	connection.execute(text(
+		"CREATE INDEX IF NOT EXISTS ix_todos_user_id_reminder_datetime "
+		"ON todos (user_id, reminder_datetime)"
+	))
+
+	# Description search is served by an FTS5 index on SQLite; other
+	# backends fall back to a case-insensitive LIKE.
+	if connection.dialect.name != "sqlite":
+		return
+
+	statements: list[str] = [
+		(
+			"CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts "
+			"USING fts5(description, content='todos', content_rowid='id')"
+		),
+		(
+			"CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN "
+			"INSERT INTO todos_fts (rowid, description) VALUES (new.id, new.description); "
+			"END"
+		),
+		(
+			"CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN "
+			"INSERT INTO todos_fts (todos_fts, rowid, description) "
+			"VALUES ('delete', old.id, old.description); "
+			"END"
+		),
+		(
+			"CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF description ON todos BEGIN "
+			"INSERT INTO todos_fts (todos_fts, rowid, description) "
+			"VALUES ('delete', old.id, old.description); "
+			"INSERT INTO todos_fts (rowid, description) VALUES (new.id, new.description); "
+			"END"
+		),
+		"INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')",
+	]
+	for statement in statements:
+		connection.execute(text(statement))
+
+
+def _add_deadline_indexes(connection: Connection) -> None:
+	connection.execute(text(
+		"CREATE INDEX IF NOT EXISTS ix_todos_reminder_datetime ON todos (reminder_datetime)"
+	))
+	connection.execute(text(
+		"CREATE INDEX IF NOT EXISTS ix_todos_expiration_datetime ON todos (expiration_datetime)"
+	))
+
+
+def _add_sync_indexes(connection: Connection) -> None:
+	# The todo_tombstones table itself is created by create_all.
+	connection.execute(text(
+		"CREATE INDEX IF NOT EXISTS ix_todos_user_id_write_datetime "
+		"ON todos (user_id, write_datetime)"
+	))
+
+
+# Rebuilds the per-user counters from the todos table. Also used after bulk
+# loads that bypass the write handlers.
+def recount_todo_counters(connection: Connection) -> None:
+	connection.execute(text(
+		"UPDATE users SET "
+		"todo_count = (SELECT COUNT(*) FROM todos WHERE todos.user_id = users.id), "
+		"todo_done_count = ("
+		"SELECT COUNT(*) FROM todos WHERE todos.user_id = users.id AND todos.done), "
+		"todo_favorite_count = ("
+		"SELECT COUNT(*) FROM todos WHERE todos.user_id = users.id AND todos.is_favorite)"
+	))
+
+
+def _add_todo_counters(connection: Connection) -> None:
+	columns: set[str] = {column["name"] for column in inspect(connection).get_columns("users")}
+	for name in ("todo_count", "todo_done_count", "todo_favorite_count"):
+		if name not in columns:
+			connection.execute(text(
+				f"ALTER TABLE users ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"
+			))
+
+	recount_todo_counters(connection)
+
+
+def _cascade_todo_deletes(connection: Connection) -> None:
+	# The user_deletion_jobs table itself is created by create_all.
+	foreign_keys: list[dict] = [
+		foreign_key
+		for foreign_key in inspect(connection).get_foreign_keys("todos")
+		if foreign_key["referred_table"] == "users"
+	]
+	if any(
+		foreign_key["options"].get("ondelete", "").upper() == "CASCADE"
+		for foreign_key in foreign_keys
+	):
+		return
+
+	if connection.dialect.name != "sqlite":
+		for foreign_key in foreign_keys:
+			connection.execute(text(f"ALTER TABLE todos DROP CONSTRAINT {foreign_key['name']}"))
+		connection.execute(text(
+			"ALTER TABLE todos ADD CONSTRAINT todos_user_id_fkey "
+			"FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+		))
+		return
+
+	# SQLite cannot alter a constraint: rebuild the table, then recreate its
+	# indexes and full-text triggers and reindex the search table.
+	columns: str = (
+		"description, done, is_favorite, id, user_id, reminder_datetime, "
+		"expiration_datetime, write_datetime, creation_datetime"
+	)
+	statements: list[str] = [
+		(
+			"CREATE TABLE todos_rebuild ("
+			"description VARCHAR(100) NOT NULL, "
+			"done BOOLEAN NOT NULL, "
+			"is_favorite BOOLEAN NOT NULL, "
+			"id INTEGER NOT NULL, "
+			"user_id INTEGER, "
+			"reminder_datetime DATETIME, "
+			"expiration_datetime DATETIME, "
+			"write_datetime DATETIME NOT NULL, "
+			"creation_datetime DATETIME NOT NULL, "
+			"PRIMARY KEY (id), "
+			"FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE)"
+		),
+		# Orphans left by earlier deletes would violate the new constraint.
+		(
+			f"INSERT INTO todos_rebuild ({columns}) SELECT {columns} FROM todos "
+			"WHERE user_id IS NULL OR user_id IN (SELECT id FROM users)"
+		),
+		"DROP TABLE todos",
+		"ALTER TABLE todos_rebuild RENAME TO todos",
+	]
+	for statement in statements:
+		connection.execute(text(statement))
+
+	_add_lookup_indexes(connection)
+	_add_todo_search(connection)
+	_add_deadline_indexes(connection)
+	_add_sync_indexes(connection)
+
+
+# Sync watermarks moved from write timestamps to a per-user change sequence.
+# Existing rows are numbered in their old (datetime, id) order, to-dos first;
+# old watermarks are rejected anyway, so clients start over with a full sync.
+def _add_change_sequences(connection: Connection) -> None:
+	new_columns: dict[str, tuple[str, ...]] = {
+		"users": ("todo_change_seq", "todo_sync_floor_seq"),
+		"todos": ("change_seq",),
+		"todo_tombstones": ("change_seq",),
+	}
+	for table, names in new_columns.items():
+		columns: set[str] = {column["name"] for column in inspect(connection).get_columns(table)}
+		for name in names:
+			if name not in columns:
+				connection.execute(text(
+					f"ALTER TABLE {table} ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"
+				))
+
+	statements: list[str] = [
+		(
+			"UPDATE todos SET change_seq = numbered.seq FROM ("
+			"SELECT id, ROW_NUMBER() OVER ("
+			"PARTITION BY user_id ORDER BY write_datetime, id) AS seq FROM todos"
+			") AS numbered WHERE todos.id = numbered.id"
+		),
+		(
+			"UPDATE todo_tombstones SET change_seq = numbered.seq FROM ("
+			"SELECT id, ROW_NUMBER() OVER ("
+			"PARTITION BY user_id ORDER BY deleted_datetime, id) AS seq FROM todo_tombstones"
+			") AS numbered WHERE todo_tombstones.id = numbered.id"
+		),
+		(
+			"UPDATE todo_tombstones SET change_seq = change_seq + ("
+			"SELECT COUNT(*) FROM todos WHERE todos.user_id = todo_tombstones.user_id)"
+		),
+		(
+			"UPDATE users SET todo_change_seq = "
+			"(SELECT COUNT(*) FROM todos WHERE todos.user_id = users.id) + "
+			"(SELECT COUNT(*) FROM todo_tombstones WHERE todo_tombstones.user_id = users.id)"
+		),
+		"CREATE INDEX IF NOT EXISTS ix_todos_user_id_change_seq ON todos (user_id, change_seq)",
+		(
+			"CREATE INDEX IF NOT EXISTS ix_todo_tombstones_user_id_change_seq "
+			"ON todo_tombstones (user_id, change_seq)"
+		),
+		(
+			"CREATE INDEX IF NOT EXISTS ix_todo_tombstones_deleted_datetime "
+			"ON todo_tombstones (deleted_datetime)"
+		),
+	]
+	for statement in statements:
+		connection.execute(text(statement))
+
+
+def _add_write_index(connection: Connection) -> None:
+	# The scheduler_state table itself is created by create_all.
+	connection.execute(text(
+		"CREATE INDEX IF NOT EXISTS ix_todos_write_datetime ON todos (write_datetime)"
+	))
+
+
+# Append new migrations at the end with the next version number. Statements
+# must be idempotent: a fresh database already has the current schema from
+# create_all before the runner executes.
+MIGRATIONS: list[Migration] = [
+	(1, "Add lookup indexes on users.username and todos.user_id", _add_lookup_indexes),
+	(2, "Add todo reminder index and description full-text search", _add_todo_search),
+	(3, "Add global deadline indexes for the reminder scheduler", _add_deadline_indexes),
+	(4, "Add the todo write index used by delta sync", _add_sync_indexes),
+	(5, "Add per-user todo counters", _add_todo_counters),
+	(6, "Cascade user deletes to their todos", _cascade_todo_deletes),
+	(7, "Add per-user change sequences for delta sync", _add_change_sequences),
+	(8, "Add the global todo write index rescanned by the scheduler", _add_write_index),
+]
+
+
+###############################################################################
+################################### Runner ####################################
+###############################################################################
+def get_schema_version(connection: Connection) -> int:
+	connection.execute(text(
+		"CREATE TABLE IF NOT EXISTS schema_migrations ("
+		"version INTEGER PRIMARY KEY, "
+		"description VARCHAR NOT NULL, "
+		"applied_datetime TIMESTAMP NOT NULL)"
+	))
+	version: int | None = connection.execute(
+		text("SELECT MAX(version) FROM schema_migrations")
+	).scalar()
+
+	return version or 0
+
+
+def run_migrations(engine: Engine) -> list[int]:
+	applied: list[int] = []
+
+	with engine.begin() as connection:
+		current_version: int = get_schema_version(connection)
+
+		for version, description, migrate in MIGRATIONS:
+			if version <= current_version:
+				continue
+
+			migrate(connection)
+			connection.execute(
+				text(
+					"INSERT INTO schema_migrations (version, description, applied_datetime) "
+					"VALUES (:version, :description, :applied_datetime)"
+				),
+				{
+					"version": version,
+					"description": description,
+					"applied_datetime": datetime.now(),
+				}
+			)
+			applied.append(version)
+
+	return applied
+
@@ -0,0 +1,43 @@
+from typing import Callable, Protocol
+
+from src.resources.config import CHANGE_FEED_BROKER
+
+
+# Called with (user_id, encoded event) for every event published on any worker.
+Deliver = Callable[[int, str], None]
+
+
+###############################################################################
+################################### Brokers ###################################
+###############################################################################
+class ChangeBroker(Protocol):
+	async def start(self, deliver: Deliver) -> None:
+		...
+
+	async def publish(self, user_id: int, message: str) -> None:
+		...
+
+	async def stop(self) -> None:
+		...
+
+
+class LocalBroker:
+	def __init__(self) -> None:
+		self.deliver: Deliver | None = None
+
+	async def start(self, deliver: Deliver) -> None:
+		self.deliver = deliver
+
+	async def publish(self, user_id: int, message: str) -> None:
+		if self.deliver is not None:
+			self.deliver(user_id, message)
+
+	async def stop(self) -> None:
+		self.deliver = None
+
+
+def get_broker() -> ChangeBroker:
+	if CHANGE_FEED_BROKER != "local":
+		raise ValueError(f"Unknown change feed broker {CHANGE_FEED_BROKER!r}.")
+
+	return LocalBroker()
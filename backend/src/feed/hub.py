@@ -0,0 +1,149 @@
+from json import dumps
+from asyncio import Queue
+from typing import Any
+
+from src.feed.brokers import ChangeBroker, get_broker
+from src.resources.config import CHANGE_FEED_MAX_PENDING
+
+
+# Sent instead of the events a slow subscriber missed: the client should
+# catch up through GET /users/{user_id}/todos:sync.
+RESYNC_MESSAGE: str = dumps({"event": "feed.resync"})
+# Last event of a feed whose token expired, or whose user was disabled,
+# demoted, renamed or deleted. Clients must authenticate again to reconnect.
+EXPIRED_MESSAGE: str = dumps({"event": "feed.expired"})
+CLOSED_MESSAGE: str = dumps({"event": "feed.closed"})
+
+
+###############################################################################
+################################ Subscriptions ################################
+###############################################################################
+# Each connection owns a bounded buffer of encoded events. Publishing never
+# waits on a consumer: a full buffer is replaced by one resync event, so a
+# slow client costs at most max_pending messages and never stalls the others.
+class Subscription:
+	def __init__(self, user_id: int, principal_id: int | None, max_pending: int) -> None:
+		self.user_id: int = user_id
+		self.principal_id: int | None = principal_id
+		# None marks the end of the feed.
+		self.messages: Queue[str | None] = Queue(maxsize=max_pending)
+
+	def push(self, message: str) -> bool:
+		if self.messages.full():
+			self.clear()
+			self.messages.put_nowait(RESYNC_MESSAGE)
+			return False
+
+		self.messages.put_nowait(message)
+		return True
+
+	def close(self, message: str | None = None) -> None:
+		self.clear()
+		if message is not None:
+			self.messages.put_nowait(message)
+		self.messages.put_nowait(None)
+
+	def clear(self) -> None:
+		while not self.messages.empty():
+			self.messages.get_nowait()
+
+
+###############################################################################
+##################################### Hub #####################################
+###############################################################################
+# Subscriptions are indexed by user, so an event costs one encode plus one
+# put per subscriber of its user, however many connections are open overall.
+# Events go through the broker even in a single process, so every worker
+# hears every change once a shared broker is configured. The same goes for
+# close_user(): it ends the feeds of a user, and those an admin follows on
+# other users' behalf, on every worker.
+class ChangeHub:
+	def __init__(
+		self,
+		broker: ChangeBroker | None = None,
+		max_pending: int = CHANGE_FEED_MAX_PENDING
+	) -> None:
+		self.broker: ChangeBroker = broker or get_broker()
+		self.max_pending: int = max_pending
+		self.subscriptions: dict[int, set[Subscription]] = {}
+		# Subscriptions to another user's feed, by principal.
+		self.delegated: dict[int, set[Subscription]] = {}
+
+		self.published: int = 0
+		self.delivered: int = 0
+		self.overflowed: int = 0
+		self.closed: int = 0
+
+	###########################################################################
+	################################ Lifecycle ################################
+	###########################################################################
+	async def start(self) -> None:
+		await self.broker.start(self.deliver)
+
+	async def stop(self) -> None:
+		await self.broker.stop()
+		for subscriptions in self.subscriptions.values():
+			for subscription in subscriptions:
+				subscription.close()
+
+	def subscribe(self, user_id: int, principal_id: int | None = None) -> Subscription:
+		subscription: Subscription = Subscription(user_id, principal_id, self.max_pending)
+		self.subscriptions.setdefault(user_id, set()).add(subscription)
+		if principal_id is not None and principal_id != user_id:
+			self.delegated.setdefault(principal_id, set()).add(subscription)
+		return subscription
+
+	def unsubscribe(self, subscription: Subscription) -> None:
+		discard(self.subscriptions, subscription.user_id, subscription)
+		if subscription.principal_id is not None:
+			discard(self.delegated, subscription.principal_id, subscription)
+
+	###########################################################################
+	################################## Events #################################
+	###########################################################################
+	async def publish(self, user_id: int, event: dict[str, Any]) -> None:
+		self.published += 1
+		await self.broker.publish(user_id, dumps(event))
+
+	async def close_user(self, user_id: int) -> None:
+		await self.broker.publish(user_id, CLOSED_MESSAGE)
+
+	def deliver(self, user_id: int, message: str) -> None:
+		if message == CLOSED_MESSAGE:
+			for subscription in (
+				*self.subscriptions.get(user_id, ()),
+				*self.delegated.get(user_id, ()),
+			):
+				subscription.close(CLOSED_MESSAGE)
+				self.closed += 1
+			return
+
+		for subscription in self.subscriptions.get(user_id, ()):
+			if subscription.push(message):
+				self.delivered += 1
+			else:
+				self.overflowed += 1
+
+	###########################################################################
+	################################# Metrics #################################
+	###########################################################################
+	def stats(self) -> dict[str, Any]:
+		return {
+			"subscribers": sum(map(len, self.subscriptions.values())),
+			"users": len(self.subscriptions),
+			"published": self.published,
+			"delivered": self.delivered,
+			"overflowed": self.overflowed,
+			"closed": self.closed,
+		}
+
+
+def discard(index: dict[int, set[Subscription]], key: int, subscription: Subscription) -> None:
+	subscriptions: set[Subscription] | None = index.get(key)
+	if subscriptions is not None:
+		subscriptions.discard(subscription)
+		if not subscriptions:
+			del index[key]
+
+
+change_hub: ChangeHub = ChangeHub()
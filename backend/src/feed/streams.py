@@ -0,0 +1,103 @@
+from math import inf
+from time import time
+from asyncio import FIRST_COMPLETED, Task, create_task, timeout, wait
+from typing import AsyncIterator
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from src.feed.hub import CLOSED_MESSAGE, EXPIRED_MESSAGE, Subscription, change_hub
+from src.resources.config import CHANGE_FEED_HEARTBEAT_SECONDS, CHANGE_FEED_RETRY_MILLISECONDS
+
+
+###############################################################################
+############################# Server-Sent Events ##############################
+###############################################################################
+# The subscription is taken when the stream starts and dropped when the
+# client goes away, since Starlette cancels the generator on disconnect. The
+# stream ends with feed.expired when the token it was opened with expires.
+async def stream_change_events(
+	user_id: int,
+	principal_id: int | None = None,
+	expires_at: float = inf
+) -> AsyncIterator[str]:
+
+	subscription: Subscription = change_hub.subscribe(user_id, principal_id)
+	try:
+		yield f"retry: {CHANGE_FEED_RETRY_MILLISECONDS}\n\n"
+		while True:
+			remaining: float = expires_at - time()
+			if remaining <= 0:
+				yield f"data: {EXPIRED_MESSAGE}\n\n"
+				return
+
+			message: str | None
+			try:
+				async with timeout(min(CHANGE_FEED_HEARTBEAT_SECONDS, remaining)):
+					message = await subscription.messages.get()
+			except TimeoutError:
+				if expires_at > time():
+					yield ": heartbeat\n\n"
+				continue
+
+			if message is None:
+				return
+			yield f"data: {message}\n\n"
+	finally:
+		change_hub.unsubscribe(subscription)
+
+
+###############################################################################
+################################## WebSocket ##################################
+###############################################################################
+# The feed only sends; reading alongside is what notices a client that left
+# while its user had nothing to report. Uvicorn's pings keep idle sockets up.
+async def forward_change_events(
+	websocket: WebSocket,
+	user_id: int,
+	principal_id: int | None = None,
+	expires_at: float = inf
+) -> None:
+
+	subscription: Subscription = change_hub.subscribe(user_id, principal_id)
+	tasks: set[Task] = {
+		create_task(send_change_events(websocket, subscription, expires_at)),
+		create_task(wait_for_disconnect(websocket)),
+	}
+	try:
+		done, _ = await wait(tasks, return_when=FIRST_COMPLETED)
+		for task in done:
+			try:
+				task.result()
+			except WebSocketDisconnect:
+				pass
+	finally:
+		for task in tasks:
+			task.cancel()
+		change_hub.unsubscribe(subscription)
+
+
+async def send_change_events(
+	websocket: WebSocket,
+	subscription: Subscription,
+	expires_at: float
+) -> None:
+
+	try:
+		async with timeout(None if expires_at == inf else max(0.0, expires_at - time())):
+			while (message := await subscription.messages.get()) is not None:
+				await websocket.send_text(message)
+				if message == CLOSED_MESSAGE:
+					await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Access revoked")
+					return
+	except TimeoutError:
+		await websocket.send_text(EXPIRED_MESSAGE)
+		await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+		return
+
+	# The hub is shutting down.
+	await websocket.close(code=status.WS_1001_GOING_AWAY)
+
+
+async def wait_for_disconnect(websocket: WebSocket) -> None:
+	async for _ in websocket.iter_text():
+		pass
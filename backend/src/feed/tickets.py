@@ -0,0 +1,40 @@
+from time import time
+from secrets import token_urlsafe
+from json import dumps, loads
+from typing import Any
+
+from src.resources.cache import response_cache
+from src.resources.config import CHANGE_FEED_TICKET_TTL_SECONDS
+
+
+###############################################################################
+################################# Feed tickets ################################
+###############################################################################
+# A ticket stands in for the bearer token it was issued for, on the feed of
+# one user only, for a few seconds, and can be redeemed once: the backend
+# deletes it as it is read.
+async def issue_feed_ticket(token: str, user_id: int) -> str:
+	ticket: str = token_urlsafe(32)
+	await response_cache.backend.set(
+		f"feed-ticket:{ticket}",
+		dumps({
+			"token": token,
+			"user_id": user_id,
+			"expires_at": time() + CHANGE_FEED_TICKET_TTL_SECONDS,
+		}).encode(),
+		ex=CHANGE_FEED_TICKET_TTL_SECONDS
+	)
+	return ticket
+
+
+# Returns the token behind a valid ticket for this user's feed.
+async def redeem_feed_ticket(ticket: str, user_id: int) -> str | None:
+	value: bytes | None = await response_cache.backend.getdel(f"feed-ticket:{ticket}")
+	if value is None:
+		return None
+
+	grant: dict[str, Any] = loads(value)
+	if grant["user_id"] != user_id or grant["expires_at"] < time():
+		return None
+
+	return grant["token"]
@@ -0,0 +1,64 @@
+from datetime import datetime
+from logging import Logger, getLogger
+from typing import Any, Sequence
+from httpx import AsyncClient
+
+from src.jobs.queue import job_queue
+from src.feed.hub import change_hub
+from src.resources.config import JOB_EVENTS_WEBHOOK_URL
+
+
+logger: Logger = getLogger(__name__)
+
+CHANGE_EVENTS: tuple[str, ...] = (
+	"user.created",
+	"todo.created",
+	"todo.updated",
+	"todo.deleted",
+)
+
+
+###############################################################################
+################################ Change events ################################
+###############################################################################
+# Write handlers publish what they changed once their transaction commits;
+# delivery runs on the job queue so a slow receiver never holds up a response.
+# Events about a user's to-dos also go straight to that user's change feed.
+class ChangeEventDelivery:
+	def __init__(self, url: str | None = JOB_EVENTS_WEBHOOK_URL) -> None:
+		self.url: str | None = url
+		self.client: AsyncClient | None = AsyncClient(timeout=5.0) if url else None
+
+	async def __call__(self, payload: dict[str, Any]) -> None:
+		if self.client is None:
+			logger.debug("%s: %s", payload["event"], payload)
+			return
+
+		response = await self.client.post(self.url, json=payload)
+		response.raise_for_status()
+
+	# Called once the job queue has drained, so no delivery is cut short.
+	async def close(self) -> None:
+		if self.client is not None:
+			await self.client.aclose()
+
+
+def build_change_event(event: str, data: dict[str, Any]) -> dict[str, Any]:
+	return {"event": event, "datetime": datetime.now().isoformat(), **data}
+
+
+async def publish_change(event: str, **data: Any) -> None:
+	await publish_changes(event, [data])
+
+
+async def publish_changes(event: str, records: Sequence[dict[str, Any]]) -> None:
+	payloads: list[dict[str, Any]] = [build_change_event(event, data) for data in records]
+	for payload in payloads:
+		if "user_id" in payload:
+			await change_hub.publish(payload["user_id"], payload)
+	await job_queue.enqueue_many(event, payloads)
+
+
+deliver_change_event: ChangeEventDelivery = ChangeEventDelivery()
+for change_event in CHANGE_EVENTS:
+	job_queue.register(change_event, deliver_change_event)
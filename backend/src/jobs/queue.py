@@ -0,0 +1,331 @@
+from json import dumps, loads
+from random import uniform
+from time import perf_counter
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from logging import Logger, getLogger
+from typing import Any, Awaitable, Callable, Sequence
+from asyncio import CancelledError, Queue, Task, create_task, gather, sleep, wait_for
+
+from sqlalchemy import Row, delete, insert, or_, select, update
+
+from src.db.db import async_engine
+from src.resources.models import JobOutbox, JobStatus
+from src.resources.metrics import job_run_duration, job_wait_duration
+from src.resources.config import (
+	JOB_QUEUE_ENABLED,
+	JOB_QUEUE_WORKERS,
+	JOB_QUEUE_MAX_BACKLOG,
+	JOB_QUEUE_MAX_ATTEMPTS,
+	JOB_QUEUE_RETRY_BASE_SECONDS,
+	JOB_QUEUE_RETRY_MAX_SECONDS,
+	JOB_QUEUE_DRAIN_SECONDS,
+	JOB_QUEUE_DURABLE,
+	JOB_QUEUE_OUTBOX_POLL_SECONDS,
+	JOB_QUEUE_OUTBOX_LEASE_SECONDS,
+)
+
+
+logger: Logger = getLogger(__name__)
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class Job:
+	name: str
+	payload: dict[str, Any]
+	attempts: int = 0
+	outbox_id: int | None = None
+	enqueued: float = field(default_factory=perf_counter)
+
+
+###############################################################################
+################################## Job queue ##################################
+###############################################################################
+# Handlers enqueue side effects after their commit and return; a pool of
+# worker tasks runs them. The backlog is bounded so a slow handler cannot
+# grow memory without limit.
+#
+# In-memory jobs are retried by sleeping tasks and are lost if the process
+# dies. Durable jobs live in the job_outbox table until they succeed: their
+# retries are rescheduled rows, and rows claimed by a process that died are
+# claimed again once their lease expires, so delivery is at-least-once.
+class JobQueue:
+	def __init__(
+		self,
+		workers: int = JOB_QUEUE_WORKERS,
+		max_backlog: int = JOB_QUEUE_MAX_BACKLOG,
+		max_attempts: int = JOB_QUEUE_MAX_ATTEMPTS,
+		durable: bool = JOB_QUEUE_DURABLE,
+		enabled: bool = JOB_QUEUE_ENABLED
+	) -> None:
+		self.workers: int = workers
+		self.max_attempts: int = max_attempts
+		self.durable: bool = durable
+		self.enabled: bool = enabled
+
+		self.handlers: dict[str, JobHandler] = {}
+		self.queue: Queue[Job] = Queue(maxsize=max_backlog)
+		self.tasks: list[Task] = []
+		self.retrying: dict[Task, Job] = {}
+		self.active: int = 0
+
+		self.enqueued: int = 0
+		self.completed: int = 0
+		self.failed: int = 0
+		self.retried: int = 0
+		self.dropped: int = 0
+
+	def register(self, name: str, handler: JobHandler) -> None:
+		self.handlers[name] = handler
+
+	###########################################################################
+	################################ Lifecycle ################################
+	###########################################################################
+	def start(self) -> None:
+		if not self.enabled or self.tasks:
+			return
+
+		self.tasks = [create_task(self.work()) for _ in range(self.workers)]
+		if self.durable:
+			self.tasks.append(create_task(self.poll_outbox()))
+
+	async def stop(self, drain_seconds: float = JOB_QUEUE_DRAIN_SECONDS) -> None:
+		if not self.tasks:
+			return
+
+		# Jobs waiting for an in-memory retry get one last attempt now rather
+		# than being dropped with the process.
+		for task, job in list(self.retrying.items()):
+			task.cancel()
+			self.put(job)
+
+		try:
+			await wait_for(self.queue.join(), drain_seconds)
+		except TimeoutError:
+			logger.warning(
+				"Job queue did not drain within %s s, %s jobs left",
+				drain_seconds,
+				self.queue.qsize() + self.active
+			)
+
+		tasks: list[Task] = self.tasks
+		self.tasks = []
+		for task in tasks:
+			task.cancel()
+		await gather(*tasks, return_exceptions=True)
+
+		# Hand unfinished durable jobs back to the outbox for the next start.
+		unfinished: list[int] = []
+		while not self.queue.empty():
+			job: Job = self.queue.get_nowait()
+			self.queue.task_done()
+			if job.outbox_id is not None:
+				unfinished.append(job.outbox_id)
+		if unfinished:
+			async with async_engine.begin() as connection:
+				await connection.execute(
+					update(JobOutbox)
+					.where(JobOutbox.id.in_(unfinished))
+					.values(status="pending", claimed_datetime=None)
+				)
+
+	###########################################################################
+	################################# Enqueue #################################
+	###########################################################################
+	async def enqueue(self, name: str, payload: dict[str, Any]) -> None:
+		await self.enqueue_many(name, [payload])
+
+	async def enqueue_many(self, name: str, payloads: Sequence[dict[str, Any]]) -> None:
+		if not self.enabled or not payloads:
+			return
+
+		self.enqueued += len(payloads)
+		if not self.durable:
+			for payload in payloads:
+				self.put(Job(name=name, payload=payload))
+			return
+
+		# Jobs that fit in the backlog are claimed right away; the rest wait
+		# in the outbox for the poller.
+		room: int = self.queue.maxsize - self.queue.qsize() if self.tasks else 0
+		now: datetime = datetime.now()
+		async with async_engine.begin() as connection:
+			outbox_ids: Sequence[int] = (await connection.execute(
+				insert(JobOutbox).returning(JobOutbox.id, sort_by_parameter_order=True),
+				[
+					{
+						"name": name,
+						"payload": dumps(payload),
+						"status": "running" if index < room else "pending",
+						"claimed_datetime": now if index < room else None,
+						"available_datetime": now,
+						"creation_datetime": now,
+					}
+					for index, payload in enumerate(payloads)
+				]
+			)).scalars().all()
+
+		for outbox_id, payload in list(zip(outbox_ids, payloads))[:room]:
+			self.put(Job(name=name, payload=payload, outbox_id=outbox_id))
+
+	def put(self, job: Job) -> None:
+		if self.queue.full():
+			self.dropped += 1
+			if self.dropped == 1 or self.dropped % 1000 == 0:
+				logger.warning("Job queue is full, %s jobs dropped so far", self.dropped)
+			return
+
+		self.queue.put_nowait(job)
+
+	###########################################################################
+	################################# Workers #################################
+	###########################################################################
+	async def work(self) -> None:
+		while True:
+			job: Job = await self.queue.get()
+			self.active += 1
+			try:
+				await self.run(job)
+			except CancelledError:
+				raise
+			except Exception:
+				logger.exception("Job queue worker failed on %s", job.name)
+			finally:
+				self.active -= 1
+				self.queue.task_done()
+
+	async def run(self, job: Job) -> None:
+		started: float = perf_counter()
+		job_wait_duration.observe(started - job.enqueued, job=job.name)
+
+		try:
+			handler: JobHandler | None = self.handlers.get(job.name)
+			if handler is None:
+				raise LookupError(f"No handler registered for job {job.name!r}")
+			await handler(job.payload)
+		except CancelledError:
+			raise
+		except Exception as exception:
+			job_run_duration.observe(perf_counter() - started, job=job.name, outcome="error")
+			await self.retry_or_fail(job, exception)
+			return
+
+		job_run_duration.observe(perf_counter() - started, job=job.name, outcome="success")
+		self.completed += 1
+		if job.outbox_id is not None:
+			async with async_engine.begin() as connection:
+				await connection.execute(delete(JobOutbox).where(JobOutbox.id == job.outbox_id))
+
+	async def retry_or_fail(self, job: Job, exception: Exception) -> None:
+		job.attempts += 1
+		if job.attempts >= self.max_attempts:
+			self.failed += 1
+			logger.error("Job %s failed after %s attempts: %s", job.name, job.attempts, exception)
+			if job.outbox_id is not None:
+				await self.update_outbox(job, "failed", exception)
+			return
+
+		self.retried += 1
+		delay: float = min(
+			JOB_QUEUE_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1),
+			JOB_QUEUE_RETRY_MAX_SECONDS
+		) * uniform(0.5, 1.0)
+
+		if job.outbox_id is not None:
+			await self.update_outbox(job, "pending", exception, delay)
+			return
+
+		task: Task = create_task(self.retry_later(job, delay))
+		self.retrying[task] = job
+		task.add_done_callback(lambda done: self.retrying.pop(done, None))
+
+	async def retry_later(self, job: Job, delay: float) -> None:
+		await sleep(delay)
+		job.enqueued = perf_counter()
+		self.put(job)
+
+	###########################################################################
+	################################## Outbox #################################
+	###########################################################################
+	async def update_outbox(
+		self,
+		job: Job,
+		status: JobStatus,
+		exception: Exception,
+		delay: float = 0.0
+	) -> None:
+
+		async with async_engine.begin() as connection:
+			await connection.execute(
+				update(JobOutbox)
+				.where(JobOutbox.id == job.outbox_id)
+				.values(
+					status=status,
+					attempts=job.attempts,
+					error=str(exception),
+					available_datetime=datetime.now() + timedelta(seconds=delay),
+					claimed_datetime=None
+				)
+			)
+
+	async def poll_outbox(self) -> None:
+		while True:
+			try:
+				await self.claim_outbox_jobs()
+			except CancelledError:
+				raise
+			except Exception:
+				logger.exception("Job outbox poll failed")
+			await sleep(JOB_QUEUE_OUTBOX_POLL_SECONDS)
+
+	async def claim_outbox_jobs(self) -> None:
+		room: int = self.queue.maxsize - self.queue.qsize()
+		if room <= 0:
+			return
+
+		# Claiming is a single UPDATE, so concurrent pollers in other worker
+		# processes never pick the same row.
+		now: datetime = datetime.now()
+		async with async_engine.begin() as connection:
+			claimed: Sequence[Row] = (await connection.execute(
+				update(JobOutbox)
+				.where(JobOutbox.id.in_(
+					select(JobOutbox.id)
+					.where(or_(
+						(JobOutbox.status == "pending") & (JobOutbox.available_datetime <= now),
+						(JobOutbox.status == "running")
+						& (JobOutbox.claimed_datetime < now - timedelta(seconds=JOB_QUEUE_OUTBOX_LEASE_SECONDS))
+					))
+					.order_by(JobOutbox.available_datetime, JobOutbox.id)
+					.limit(room)
+					.with_for_update(skip_locked=True)
+				))
+				.values(status="running", claimed_datetime=now)
+				.returning(JobOutbox.id, JobOutbox.name, JobOutbox.payload, JobOutbox.attempts)
+			)).all()
+
+		for outbox_id, name, payload, attempts in claimed:
+			self.put(Job(name=name, payload=loads(payload), attempts=attempts, outbox_id=outbox_id))
+
+	###########################################################################
+	################################# Metrics #################################
+	###########################################################################
+	def stats(self) -> dict[str, Any]:
+		return {
+			"enabled": self.enabled,
+			"durable": self.durable,
+			"workers": self.workers if self.tasks else 0,
+			"backlog": self.queue.qsize(),
+			"active": self.active,
+			"retrying": len(self.retrying),
+			"enqueued": self.enqueued,
+			"completed": self.completed,
+			"failed": self.failed,
+			"retried": self.retried,
+			"dropped": self.dropped,
+		}
+
+
+job_queue: JobQueue = JobQueue()
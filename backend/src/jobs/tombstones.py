@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from logging import Logger, getLogger
+from typing import Any, Sequence
+from asyncio import CancelledError, Task, create_task, sleep
+
+from sqlalchemy import Row, bindparam, case, delete, select, update
+
+from src.db.db import async_engine
+from src.resources.models import User, ToDoTombstone
+from src.resources.config import (
+	TODO_TOMBSTONE_RETENTION_DAYS,
+	TODO_TOMBSTONE_PRUNE_INTERVAL_SECONDS,
+	TODO_TOMBSTONE_PRUNE_BATCH_SIZE,
+	USER_PURGE_BATCH_PAUSE_SECONDS,
+)
+
+
+logger: Logger = getLogger(__name__)
+
+# Raises a user's sync floor to the highest pruned sequence number, never
+# lowering it.
+RAISE_SYNC_FLOOR = (
+	update(User)
+	.where(User.id == bindparam("floor_user_id"))
+	.values(todo_sync_floor_seq=case(
+		(User.todo_sync_floor_seq < bindparam("floor_seq"), bindparam("floor_seq")),
+		else_=User.todo_sync_floor_seq
+	))
+)
+
+
+###############################################################################
+############################## Tombstone pruner ###############################
+###############################################################################
+# Deletes tombstones past the retention window in bounded batches, each in its
+# own short transaction. The batch also records, per user, the sequence
+# number of the newest tombstone removed: a sync watermark below it could miss
+# that delete, so the sync endpoint turns it away with 410 Gone.
+class TombstonePruner:
+	def __init__(
+		self,
+		retention_days: int = TODO_TOMBSTONE_RETENTION_DAYS,
+		interval_seconds: float = TODO_TOMBSTONE_PRUNE_INTERVAL_SECONDS,
+		batch_size: int = TODO_TOMBSTONE_PRUNE_BATCH_SIZE,
+		pause_seconds: float = USER_PURGE_BATCH_PAUSE_SECONDS
+	) -> None:
+		self.retention: timedelta = timedelta(days=retention_days)
+		self.interval_seconds: float = interval_seconds
+		self.batch_size: int = batch_size
+		self.pause_seconds: float = pause_seconds
+		self.task: Task | None = None
+
+		self.runs: int = 0
+		self.failed: int = 0
+		self.pruned: int = 0
+		self.last_run_datetime: datetime | None = None
+
+	###########################################################################
+	################################ Lifecycle ################################
+	###########################################################################
+	def start(self) -> None:
+		if self.task is None:
+			self.task = create_task(self.run())
+
+	async def stop(self) -> None:
+		if self.task is None:
+			return
+
+		self.task.cancel()
+		try:
+			await self.task
+		except CancelledError:
+			pass
+		self.task = None
+
+	async def run(self) -> None:
+		while True:
+			try:
+				await self.prune()
+			except CancelledError:
+				raise
+			except Exception:
+				self.failed += 1
+				logger.exception("Tombstone pruning failed")
+			await sleep(self.interval_seconds)
+
+	###########################################################################
+	################################# Pruning #################################
+	###########################################################################
+	async def prune(self, now: datetime | None = None) -> int:
+		cutoff: datetime = (now or datetime.now()) - self.retention
+		pruned: int = 0
+		while (batch := await self.delete_batch(cutoff)) == self.batch_size:
+			pruned += batch
+			await sleep(self.pause_seconds)
+		pruned += batch
+
+		self.runs += 1
+		self.pruned += pruned
+		self.last_run_datetime = datetime.now()
+		return pruned
+
+	async def delete_batch(self, cutoff: datetime) -> int:
+		async with async_engine.begin() as connection:
+			deleted: Sequence[Row] = (await connection.execute(
+				delete(ToDoTombstone)
+				.where(ToDoTombstone.id.in_(
+					select(ToDoTombstone.id)
+					.where(ToDoTombstone.deleted_datetime < cutoff)
+					.order_by(ToDoTombstone.deleted_datetime)
+					.limit(self.batch_size)
+				))
+				.returning(ToDoTombstone.user_id, ToDoTombstone.change_seq)
+			)).all()
+			if not deleted:
+				return 0
+
+			floors: dict[int, int] = {}
+			for user_id, change_seq in deleted:
+				if user_id is not None:
+					floors[user_id] = max(floors.get(user_id, 0), change_seq)
+			if floors:
+				await connection.execute(RAISE_SYNC_FLOOR, [
+					{"floor_user_id": user_id, "floor_seq": change_seq}
+					for user_id, change_seq in floors.items()
+				])
+
+		return len(deleted)
+
+	###########################################################################
+	################################# Metrics #################################
+	###########################################################################
+	def stats(self) -> dict[str, Any]:
+		return {
+			"running": self.task is not None,
+			"runs": self.runs,
+			"failed": self.failed,
+			"pruned": self.pruned,
+			"retention_days": self.retention.days,
+		}
+
+
+tombstone_pruner: TombstonePruner = TombstonePruner()
@@ -0,0 +1,188 @@
+from datetime import datetime
+from logging import Logger, getLogger
+from typing import Any, Sequence
+from asyncio import CancelledError, Task, create_task, gather, sleep
+
+from sqlalchemy import Row, delete, select, update
+
+from src.db.db import async_engine
+from src.scheduler.scheduler import deadline_scheduler
+from src.resources.cache import principal_cache, response_cache
+from src.resources.models import User, ToDo, ToDoTombstone, UserDeletionJob, UserDeletionStatus
+from src.resources.config import USER_PURGE_BATCH_SIZE, USER_PURGE_BATCH_PAUSE_SECONDS
+
+
+logger: Logger = getLogger(__name__)
+
+
+###############################################################################
+################################# User purger #################################
+###############################################################################
+# Deletes a user in the background: their to-dos and tombstones go first in
+# bounded batches, each in its own short transaction, and the user row last.
+# The ON DELETE CASCADE on todos.user_id then only has to catch to-dos written
+# while the purge ran. Progress is stored in user_deletion_jobs, so any worker
+# can report it and an interrupted purge is resumed on the next startup.
+class UserPurger:
+	def __init__(
+		self,
+		batch_size: int = USER_PURGE_BATCH_SIZE,
+		pause_seconds: float = USER_PURGE_BATCH_PAUSE_SECONDS
+	) -> None:
+		self.batch_size: int = batch_size
+		self.pause_seconds: float = pause_seconds
+		self.tasks: dict[int, Task] = {}
+
+		self.completed: int = 0
+		self.failed: int = 0
+		self.deleted_todos: int = 0
+
+	###########################################################################
+	################################ Lifecycle ################################
+	###########################################################################
+	def start(self, job_id: int, user_id: int) -> None:
+		if job_id not in self.tasks:
+			task: Task = create_task(self.run(job_id, user_id))
+			self.tasks[job_id] = task
+			task.add_done_callback(lambda _: self.tasks.pop(job_id, None))
+
+	async def resume(self) -> None:
+		async with async_engine.connect() as connection:
+			jobs: Sequence[Row] = (await connection.execute(
+				select(UserDeletionJob.id, UserDeletionJob.user_id)
+				.where(UserDeletionJob.status.in_(("pending", "running")))
+				.order_by(UserDeletionJob.id)
+			)).all()
+
+		for job_id, user_id in jobs:
+			self.start(job_id, user_id)
+
+	async def stop(self) -> None:
+		# Cancelled jobs stay "running" and are picked up again by resume().
+		tasks: list[Task] = list(self.tasks.values())
+		for task in tasks:
+			task.cancel()
+		await gather(*tasks, return_exceptions=True)
+
+	###########################################################################
+	################################### Jobs ##################################
+	###########################################################################
+	async def run(self, job_id: int, user_id: int) -> None:
+		try:
+			await self.set_status(job_id, "running")
+			await self.purge(job_id, user_id)
+		except CancelledError:
+			raise
+		except Exception as exception:
+			self.failed += 1
+			logger.exception("Deletion job %s for user %s failed", job_id, user_id)
+			await self.set_status(job_id, "failed", error=str(exception))
+
+	async def purge(self, job_id: int, user_id: int) -> None:
+		while await self.delete_todo_batch(job_id, user_id) == self.batch_size:
+			await sleep(self.pause_seconds)
+
+		while await self.delete_tombstone_batch(user_id) == self.batch_size:
+			await sleep(self.pause_seconds)
+
+		async with async_engine.begin() as connection:
+			username: str | None = (await connection.execute(
+				delete(User).where(User.id == user_id).returning(User.username)
+			)).scalar()
+			await connection.execute(
+				update(UserDeletionJob)
+				.where(UserDeletionJob.id == job_id)
+				.values(
+					status="done",
+					write_datetime=datetime.now(),
+					finished_datetime=datetime.now()
+				)
+			)
+
+		if username is not None:
+			await principal_cache.invalidate(username)
+		await response_cache.invalidate("users", "todos")
+		self.completed += 1
+
+	async def delete_todo_batch(self, job_id: int, user_id: int) -> int:
+		async with async_engine.begin() as connection:
+			deleted_todos: Sequence[Row] = (await connection.execute(
+				delete(ToDo)
+				.where(ToDo.id.in_(
+					select(ToDo.id).where(ToDo.user_id == user_id).limit(self.batch_size)
+				))
+				.returning(ToDo.id, ToDo.done, ToDo.is_favorite)
+			)).all()
+			if not deleted_todos:
+				return 0
+
+			# Keep the counters in step with the rows, as the write handlers do.
+			await connection.execute(
+				update(User).where(User.id == user_id).values(
+					todo_count=User.todo_count - len(deleted_todos),
+					todo_done_count=User.todo_done_count - sum(
+						deleted_todo.done for deleted_todo in deleted_todos
+					),
+					todo_favorite_count=User.todo_favorite_count - sum(
+						deleted_todo.is_favorite for deleted_todo in deleted_todos
+					),
+				)
+			)
+			await connection.execute(
+				update(UserDeletionJob)
+				.where(UserDeletionJob.id == job_id)
+				.values(
+					deleted_todos=UserDeletionJob.deleted_todos + len(deleted_todos),
+					write_datetime=datetime.now()
+				)
+			)
+
+		for deleted_todo in deleted_todos:
+			deadline_scheduler.forget(deleted_todo.id)
+		await response_cache.invalidate("todos")
+		self.deleted_todos += len(deleted_todos)
+
+		return len(deleted_todos)
+
+	async def delete_tombstone_batch(self, user_id: int) -> int:
+		async with async_engine.begin() as connection:
+			return (await connection.execute(
+				delete(ToDoTombstone).where(ToDoTombstone.id.in_(
+					select(ToDoTombstone.id)
+					.where(ToDoTombstone.user_id == user_id)
+					.limit(self.batch_size)
+				))
+			)).rowcount
+
+	async def set_status(
+		self,
+		job_id: int,
+		status: UserDeletionStatus,
+		error: str | None = None
+	) -> None:
+
+		async with async_engine.begin() as connection:
+			await connection.execute(
+				update(UserDeletionJob)
+				.where(UserDeletionJob.id == job_id)
+				.values(
+					status=status,
+					error=error,
+					write_datetime=datetime.now(),
+					finished_datetime=datetime.now() if status in ("done", "failed") else None
+				)
+			)
+
+	###########################################################################
+	################################# Metrics #################################
+	###########################################################################
+	def stats(self) -> dict[str, Any]:
+		return {
+			"running": len(self.tasks),
+			"completed": self.completed,
+			"failed": self.failed,
+			"deleted_todos": self.deleted_todos,
+		}
+
+
+user_purger: UserPurger = UserPurger()
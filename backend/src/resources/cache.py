@@ -0,0 +1,307 @@
+from time import monotonic
+from fastapi import Request
+from collections import OrderedDict
+from typing import Any, Generic, Protocol, TypeVar
+
+from src.resources.models import User
+from src.resources.config import (
+	PRINCIPAL_CACHE_ENABLED,
+	PRINCIPAL_CACHE_MAX_SIZE,
+	PRINCIPAL_CACHE_TTL_SECONDS,
+	RESPONSE_CACHE_ENABLED,
+	RESPONSE_CACHE_BACKEND,
+	RESPONSE_CACHE_REDIS_URL,
+	RESPONSE_CACHE_MAX_SIZE,
+	RESPONSE_CACHE_TTL_SECONDS,
+	TOTAL_COUNT_CACHE_TTL_SECONDS,
+)
+
+
+T = TypeVar("T")
+
+
+###############################################################################
+################################## TTL / LRU ##################################
+###############################################################################
+class TTLCache(Generic[T]):
+	def __init__(self, max_size: int, ttl_seconds: float, enabled: bool = True) -> None:
+		self.max_size: int = max_size
+		self.ttl_seconds: float = ttl_seconds
+		self.enabled: bool = enabled
+		self.hits: int = 0
+		self.misses: int = 0
+		self.evictions: int = 0
+		self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+
+	def get(self, key: str) -> T | None:
+		if not self.enabled:
+			return None
+
+		entry: tuple[float, T] | None = self._entries.get(key)
+		if entry is None or entry[0] < monotonic():
+			if entry is not None:
+				del self._entries[key]
+			self.misses += 1
+			return None
+
+		self._entries.move_to_end(key)
+		self.hits += 1
+		return entry[1]
+
+	def set(self, key: str, value: T) -> None:
+		if not self.enabled:
+			return
+
+		self._entries[key] = (monotonic() + self.ttl_seconds, value)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_size:
+			self._entries.popitem(last=False)
+			self.evictions += 1
+
+	def invalidate(self, *keys: str | None) -> None:
+		for key in keys:
+			if key is not None:
+				self._entries.pop(key, None)
+
+	def clear(self) -> None:
+		self._entries.clear()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def stats(self) -> dict[str, Any]:
+		return {
+			"enabled": self.enabled,
+			"size": len(self._entries),
+			"max_size": self.max_size,
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+		}
+
+
+# Verified token -> (subject, expiry as a UNIX timestamp). Spares the rate
+# limiter and the principal lookup a signature check per request.
+token_subject_cache: TTLCache[tuple[str, float]] = TTLCache(
+	max_size=PRINCIPAL_CACHE_MAX_SIZE,
+	ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS,
+	enabled=PRINCIPAL_CACHE_ENABLED,
+)
+
+# Keyed by table name.
+total_count_cache: TTLCache[int] = TTLCache(
+	max_size=16,
+	ttl_seconds=TOTAL_COUNT_CACHE_TTL_SECONDS,
+)
+
+
+###############################################################################
+################################## Responses ##################################
+###############################################################################
+# Minimal async key/value interface; redis.asyncio.Redis satisfies it as is.
+class CacheBackend(Protocol):
+	async def get(self, key: str) -> bytes | None:
+		...
+
+	async def set(self, key: str, value: bytes, ex: int | None = None) -> Any:
+		...
+
+	async def incr(self, key: str) -> int:
+		...
+
+	async def getdel(self, key: str) -> bytes | None:
+		...
+
+
+# Counters are (value, last access) pairs kept in least recently used order.
+# One that has been neither read nor bumped for counter_idle_seconds is
+# dropped and restarts from 0: as long as that exceeds the lifetime of every
+# entry keyed by it, no entry cached under an old value is still alive.
+class MemoryCacheBackend:
+	def __init__(self, max_size: int, ttl_seconds: float, counter_idle_seconds: float) -> None:
+		self.entries: TTLCache[bytes] = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+		self.counter_idle_seconds: float = counter_idle_seconds
+		self.counter_evictions: int = 0
+		self.counters: OrderedDict[str, tuple[int, float]] = OrderedDict()
+
+	async def get(self, key: str) -> bytes | None:
+		now: float = monotonic()
+		self.evict_counters(now)
+
+		counter: tuple[int, float] | None = self.counters.pop(key, None)
+		if counter is not None:
+			self.counters[key] = (counter[0], now)
+			return str(counter[0]).encode()
+		return self.entries.get(key)
+
+	async def set(self, key: str, value: bytes, ex: int | None = None) -> None:
+		self.entries.set(key, value)
+
+	async def incr(self, key: str) -> int:
+		now: float = monotonic()
+		self.evict_counters(now)
+
+		counter: tuple[int, float] | None = self.counters.pop(key, None)
+		value: int = (counter[0] if counter is not None else 0) + 1
+		self.counters[key] = (value, now)
+		return value
+
+	async def getdel(self, key: str) -> bytes | None:
+		value: bytes | None = self.entries.get(key)
+		self.entries.invalidate(key)
+		return value
+
+	def evict_counters(self, now: float) -> None:
+		while self.counters:
+			oldest_key: str = next(iter(self.counters))
+			if now - self.counters[oldest_key][1] <= self.counter_idle_seconds:
+				break
+			del self.counters[oldest_key]
+			self.counter_evictions += 1
+
+
+# Entries are grouped in namespaces ("todos", "users") whose generation number
+# is part of every key. A write bumps the generation of the namespaces it
+# touches, which invalidates all of their entries in O(1) on any backend;
+# orphaned entries age out through the TTL/LRU.
+class ResponseCache:
+	def __init__(self, backend: CacheBackend, ttl_seconds: int, enabled: bool = True) -> None:
+		self.backend: CacheBackend = backend
+		self.ttl_seconds: int = ttl_seconds
+		self.enabled: bool = enabled
+		self.hits: int = 0
+		self.misses: int = 0
+		self.invalidations: int = 0
+
+	async def key(self, namespace: str, principal_id: int | None, request: Request) -> str:
+		generation: bytes | None = await self.backend.get(f"generation:{namespace}")
+		query: str = "&".join(sorted(request.url.query.split("&")))
+		return (
+			f"response:{namespace}:{int(generation or 0)}:"
+			f"{principal_id}:{request.url.path}?{query}"
+		)
+
+	async def get(self, key: str) -> bytes | None:
+		if not self.enabled:
+			return None
+
+		body: bytes | None = await self.backend.get(key)
+		if body is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+
+		return body
+
+	async def set(self, key: str, body: bytes) -> None:
+		if self.enabled:
+			await self.backend.set(key, body, ex=self.ttl_seconds)
+
+	async def invalidate(self, *namespaces: str) -> None:
+		for namespace in namespaces:
+			await self.backend.incr(f"generation:{namespace}")
+			self.invalidations += 1
+
+	def stats(self) -> dict[str, Any]:
+		stats: dict[str, Any] = {
+			"enabled": self.enabled,
+			"backend": type(self.backend).__name__,
+			"hits": self.hits,
+			"misses": self.misses,
+			"invalidations": self.invalidations,
+		}
+		if isinstance(self.backend, MemoryCacheBackend):
+			stats["size"] = len(self.backend.entries)
+			stats["generations"] = len(self.backend.counters)
+			stats["generation_evictions"] = self.backend.counter_evictions
+
+		return stats
+
+
+def get_cache_backend() -> CacheBackend:
+	if RESPONSE_CACHE_BACKEND == "redis":
+		from redis.asyncio import Redis
+
+		return Redis.from_url(RESPONSE_CACHE_REDIS_URL)
+
+	# The principal cache keeps its per-user generations in the same store, so
+	# they must outlive its entries as well.
+	return MemoryCacheBackend(
+		max_size=RESPONSE_CACHE_MAX_SIZE,
+		ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+		counter_idle_seconds=max(RESPONSE_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_TTL_SECONDS)
+	)
+
+
+response_cache: ResponseCache = ResponseCache(
+	backend=get_cache_backend(),
+	ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+	enabled=RESPONSE_CACHE_ENABLED,
+)
+
+
+###############################################################################
+################################# Principals ##################################
+###############################################################################
+# Keyed by the token subject (username). Entries are detached copies, so a
+# rollback in one request cannot expire the principal seen by another.
+#
+# Each entry remembers the generation of its username in the response-cache
+# backend, read before the user row was. Changing or deleting a user bumps
+# that generation, so with a shared backend every worker drops the entry on
+# its next lookup instead of serving it until the TTL runs out.
+class PrincipalCache:
+	def __init__(self, entries: TTLCache[tuple[int, User]], backend: CacheBackend) -> None:
+		self.entries: TTLCache[tuple[int, User]] = entries
+		self.backend: CacheBackend = backend
+		self.stale: int = 0
+		self.invalidations: int = 0
+
+	async def generation(self, username: str) -> int:
+		return int(await self.backend.get(f"generation:principal:{username}") or 0)
+
+	# Returns the cached principal, or None and the generation to store the
+	# freshly loaded one with.
+	async def get(self, username: str) -> tuple[User | None, int]:
+		if not self.entries.enabled:
+			return None, 0
+
+		generation: int = await self.generation(username)
+		entry: tuple[int, User] | None = self.entries.get(username)
+		if entry is None:
+			return None, generation
+		if entry[0] != generation:
+			self.stale += 1
+			self.entries.invalidate(username)
+			return None, generation
+
+		return entry[1], generation
+
+	def set(self, user: User, generation: int) -> None:
+		self.entries.set(user.username, (generation, User.model_validate(user.model_dump())))
+
+	async def invalidate(self, *usernames: str | None) -> None:
+		for username in {username for username in usernames if username is not None}:
+			self.entries.invalidate(username)
+			await self.backend.incr(f"generation:principal:{username}")
+			self.invalidations += 1
+
+	def clear(self) -> None:
+		self.entries.clear()
+
+	def stats(self) -> dict[str, Any]:
+		return {
+			**self.entries.stats(),
+			"stale": self.stale,
+			"invalidations": self.invalidations,
+		}
+
+
+principal_cache: PrincipalCache = PrincipalCache(
+	entries=TTLCache(
+		max_size=PRINCIPAL_CACHE_MAX_SIZE,
+		ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS,
+		enabled=PRINCIPAL_CACHE_ENABLED,
+	),
+	backend=response_cache.backend,
+)
@@ -1,7 +1,9 @@
 from typing import Any
 
-from os import getcwd
+from os import cpu_count, getcwd, getenv
 from os.path import join
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 ###############################################################################
 ################################ Project paths ################################
@@ -14,12 +16,261 @@ DOTENV_ABSPATH: str = join(PROJECT_DIR_ABSPATH, ".env")
 ###############################################################################
 ########################### Database configuration ############################
 ###############################################################################
+load_dotenv(DOTENV_ABSPATH)
+
 DB_FILENAME: str = "database.db"
-DB_URL: str = f"sqlite:///{join(DB_DIR_PATH, DB_FILENAME)}"
-DB_CONNECT_ARGS: dict[str, Any] = {"check_same_thread": False}
+
+# Async drivers used by the request handlers for each supported backend.
+# PostgreSQL needs the psycopg2 (sync) and asyncpg (async) packages.
+DB_ASYNC_DRIVERS: dict[str, str] = {
+	"sqlite": "sqlite+aiosqlite",
+	"postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+	parsed_url = make_url(url)
+	return parsed_url.set(
+		drivername=DB_ASYNC_DRIVERS[parsed_url.get_backend_name()]
+	).render_as_string(hide_password=False)
+
+
+def get_connect_args(url: str) -> dict[str, Any]:
+	if make_url(url).get_backend_name() == "sqlite":
+		return {"check_same_thread": False}
+	return {}
+
+
+DB_URL: str = getenv("DATABASE_URL", f"sqlite:///{join(DB_DIR_PATH, DB_FILENAME)}")
+DB_CONNECT_ARGS: dict[str, Any] = get_connect_args(DB_URL)
+DB_BACKEND: str = make_url(DB_URL).get_backend_name()
+
+# Request handlers run on the async engine so database round-trips do not
+# stall the event loop. The sync engine above is kept for schema management.
+DB_ASYNC_URL: str = getenv("DATABASE_ASYNC_URL", to_async_url(DB_URL))
+DB_ASYNC_CONNECT_ARGS: dict[str, Any] = get_connect_args(DB_ASYNC_URL)
+# "sync" serves the request sessions from the sync engines instead, running
+# every query on the event loop as the handlers did before the async engine.
+# Kept as the baseline of benchmarks.engines; do not use it in production.
+DB_SESSION_MODES: tuple[str, ...] = ("async", "sync")
+DB_SESSION_MODE: str = getenv("DB_SESSION_MODE", "async")
+if DB_SESSION_MODE not in DB_SESSION_MODES:
+	raise ValueError(f"DB_SESSION_MODE must be one of {DB_SESSION_MODES}, not {DB_SESSION_MODE!r}")
+
+# Optional read replica. When set, read-only routes query it instead of the
+# primary; for SQLite this can be a periodically refreshed copy of the file.
+DB_READ_URL: str | None = getenv("DATABASE_READ_URL")
+DB_READ_ASYNC_URL: str | None = to_async_url(DB_READ_URL) if DB_READ_URL else None
+
+# Engine profiles: PRAGMAs applied on every new SQLite connection plus pool
+# sizing. "production" enables WAL so readers never block the single writer,
+# and a busy timeout so concurrent writers from several workers wait for the
+# lock instead of failing with "database is locked". SQLite only enforces
+# foreign keys (and the to-do ON DELETE CASCADE) when asked to.
+DB_PROFILES: dict[str, dict[str, Any]] = {
+	"default": {
+		"pragmas": {
+			"foreign_keys": "ON",
+		},
+		"pool_size": 5,
+		"max_overflow": 10,
+		"pool_timeout": 30,
+		"pool_recycle": -1,
+	},
+	"production": {
+		"pragmas": {
+			"foreign_keys": "ON",
+			"journal_mode": "WAL",
+			"synchronous": "NORMAL",
+			"busy_timeout": 5000,
+			"cache_size": -64000,
+			"mmap_size": 268435456,
+			"temp_store": "MEMORY",
+		},
+		"pool_size": 10,
+		"max_overflow": 20,
+		"pool_timeout": 30,
+		"pool_recycle": 3600,
+	},
+}
+DB_PROFILE: str = getenv("DB_PROFILE", "production")
+if DB_PROFILE not in DB_PROFILES:
+	raise ValueError(f"DB_PROFILE must be one of {tuple(DB_PROFILES)}, not {DB_PROFILE!r}")
+
+# The production launcher (python -m src.server) migrates once before the
+# workers start and turns this off for them.
+DB_MIGRATE_ON_STARTUP: bool = getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+# Open pool_size connections per engine at startup so the first requests of
+# a worker do not pay for connecting and applying the PRAGMAs.
+DB_POOL_PREWARM: bool = True
+
+###############################################################################
+############################ Server configuration #############################
+###############################################################################
+SERVER_HOST: str = getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT: int = int(getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS: int = int(getenv("SERVER_WORKERS", str(cpu_count() or 1)))
+SERVER_BACKLOG: int = 2048
+SERVER_KEEPALIVE_SECONDS: int = 5
+SERVER_LIMIT_CONCURRENCY: int | None = None
+# In-flight requests get this long to finish after SIGTERM before the worker
+# closes their connections.
+SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+
+###############################################################################
+############################# To-Do configuration #############################
+###############################################################################
+TODO_BATCH_MAX_SIZE: int = 1000
+TODO_EXPORT_CHUNK_SIZE: int = 1000
+TODO_SYNC_MAX_SIZE: int = 1000
+# Tombstones of deleted to-dos are kept this long for delta sync; clients with
+# an older watermark get 410 Gone and sync from scratch. The production
+# launcher runs the pruner in a single worker only.
+TODO_TOMBSTONE_RETENTION_DAYS: int = int(getenv("TODO_TOMBSTONE_RETENTION_DAYS", "30"))
+TODO_TOMBSTONE_PRUNE_INTERVAL_SECONDS: float = 3600.0
+TODO_TOMBSTONE_PRUNE_BATCH_SIZE: int = 1000
+TODO_TOMBSTONE_PRUNER_ENABLED: bool = getenv("TODO_TOMBSTONE_PRUNER_ENABLED", "true").lower() == "true"
+
+###############################################################################
+######################### User deletion configuration #########################
+###############################################################################
+# Deleting a user purges their to-dos in batches of this size, one short
+# transaction each, pausing in between so other writers get the lock.
+USER_PURGE_BATCH_SIZE: int = 1000
+USER_PURGE_BATCH_PAUSE_SECONDS: float = 0.01
+# Restart purges interrupted by a shutdown. The production launcher leaves
+# this on for a single worker only.
+USER_PURGE_RESUME_ON_STARTUP: bool = getenv("USER_PURGE_RESUME_ON_STARTUP", "true").lower() == "true"
+
+###############################################################################
+########################### Job queue configuration ###########################
+###############################################################################
+# Side effects of committed writes run on an in-process worker pool. When the
+# backlog is full new jobs are dropped, or left in the outbox when durable.
+JOB_QUEUE_ENABLED: bool = getenv("JOB_QUEUE_ENABLED", "true").lower() == "true"
+JOB_QUEUE_WORKERS: int = 4
+JOB_QUEUE_MAX_BACKLOG: int = 10_000
+# Failed jobs are retried with exponential backoff (plus jitter) up to the
+# attempt limit.
+JOB_QUEUE_MAX_ATTEMPTS: int = 5
+JOB_QUEUE_RETRY_BASE_SECONDS: float = 0.5
+JOB_QUEUE_RETRY_MAX_SECONDS: float = 60.0
+# Shutdown waits this long for the backlog to drain.
+JOB_QUEUE_DRAIN_SECONDS: float = 10.0
+# Durable jobs are written to the job_outbox table before they are queued and
+# deleted once done, so they survive restarts; every worker process polls the
+# outbox and claims rows with a lease.
+JOB_QUEUE_DURABLE: bool = getenv("JOB_QUEUE_DURABLE", "false").lower() == "true"
+JOB_QUEUE_OUTBOX_POLL_SECONDS: float = 1.0
+JOB_QUEUE_OUTBOX_LEASE_SECONDS: float = 300.0
+# Change events (user.created, todo.created, ...) are posted here when set.
+JOB_EVENTS_WEBHOOK_URL: str | None = getenv("JOB_EVENTS_WEBHOOK_URL")
+
+###############################################################################
+########################## Change feed configuration ##########################
+###############################################################################
+# To-do changes are pushed to subscribers over SSE and WebSocket. The "local"
+# broker only reaches subscribers of the same process; multi-worker setups
+# need a shared broker implementing src.feed.brokers.ChangeBroker.
+CHANGE_FEED_BROKER: str = getenv("CHANGE_FEED_BROKER", "local")
+# Events buffered per subscriber. A subscriber that falls this far behind
+# loses its buffer and gets a single feed.resync event instead.
+CHANGE_FEED_MAX_PENDING: int = 256
+# Comment lines sent on idle SSE streams so proxies keep them open.
+CHANGE_FEED_HEARTBEAT_SECONDS: float = 15.0
+# Reconnect delay suggested to EventSource clients.
+CHANGE_FEED_RETRY_MILLISECONDS: int = 3000
+# Browsers open feeds with a single-use ticket instead of their token, which
+# would end up in access logs as a query parameter. Tickets are kept in the
+# response-cache backend: share it between workers, as for the principal cache.
+CHANGE_FEED_TICKET_TTL_SECONDS: int = 30
+
+###############################################################################
+########################### Scheduler configuration ###########################
+###############################################################################
+# Only deadlines inside the horizon are kept in memory; the rest stay in the
+# database until the window reaches them. Enable it on a single worker.
+SCHEDULER_ENABLED: bool = getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_TICK_SECONDS: float = 1.0
+SCHEDULER_HORIZON_SECONDS: float = 300.0
+SCHEDULER_LOAD_BATCH_SIZE: int = 1000
+# Writes from other workers only reach the scheduler through the database:
+# every tick re-reads the to-dos written since the previous one, reaching
+# this far back to cover transactions that committed after their timestamp.
+SCHEDULER_RESCAN_OVERLAP_SECONDS: float = 5.0
+# How far back a restarted scheduler fires deadlines missed while it was
+# down, and how often an idle scheduler saves its progress.
+SCHEDULER_CATCH_UP_SECONDS: float = 86400.0
+SCHEDULER_STATE_SAVE_SECONDS: float = 30.0
+SCHEDULER_SINK: str = getenv("SCHEDULER_SINK", "log")
+SCHEDULER_WEBHOOK_URL: str | None = getenv("SCHEDULER_WEBHOOK_URL")
 
 ###############################################################################
 ############################ Security configuration ###########################
 ###############################################################################
 ALGORITHM: str = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+PASSWORD_HASH_SCHEMES: list[str] = ["pbkdf2_sha256"]
+
+# Resolved principals are cached per token subject to skip the user SELECT
+# on every authenticated request. Changing, disabling or deleting a user is
+# signalled through the response-cache backend below: with the memory backend
+# other workers keep accepting the old principal for up to the TTL, so use
+# the redis backend with several workers. That costs one redis GET per
+# authenticated request.
+PRINCIPAL_CACHE_ENABLED: bool = True
+PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+PRINCIPAL_CACHE_TTL_SECONDS: float = 10.0
+
+# Pre-serialized responses of the admin list endpoints. The memory backend
+# is per process; use the redis backend to share entries and invalidations
+# between workers.
+RESPONSE_CACHE_ENABLED: bool = True
+RESPONSE_CACHE_BACKEND: str = getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_REDIS_URL: str = getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_MAX_SIZE: int = 1024
+RESPONSE_CACHE_TTL_SECONDS: int = 30
+
+# Table-wide totals reported by the admin list endpoints. They are allowed to
+# lag behind writes by up to the TTL; per-user totals come from counters.
+TOTAL_COUNT_CACHE_TTL_SECONDS: float = 30.0
+
+###############################################################################
+########################## Rate limiting configuration ########################
+###############################################################################
+# Token buckets per "METHOD /route/path": (burst capacity, tokens refilled per
+# second). Requests are counted per principal (token subject) or, without a
+# valid token, per client IP. Routes not listed use RATE_LIMIT_DEFAULT.
+RATE_LIMIT_ENABLED: bool = getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_DEFAULT: tuple[int, float] = (120, 20.0)
+RATE_LIMITS: dict[str, tuple[int, float]] = {
+	"POST /users/auth": (5, 0.2),
+	"POST /users/": (5, 0.1),
+	"GET /users/": (30, 5.0),
+	"GET /todos": (30, 5.0),
+	"GET /users/{user_id}/todos": (60, 10.0),
+	"POST /users/{user_id}/todos:batch": (10, 1.0),
+	"PATCH /users/{user_id}/todos:batch": (10, 1.0),
+	"DELETE /users/{user_id}/todos:batch": (10, 1.0),
+	"GET /todos:export": (2, 0.05),
+	"GET /users/{user_id}/todos:export": (5, 0.1),
+}
+
+# The memory backend is per process, so N workers allow N times the budget;
+# use the redis backend to share buckets between workers.
+RATE_LIMIT_BACKEND: str = getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL: str = getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_BUCKETS: int = 100_000
+# Buckets untouched for longer than this are dropped. It must exceed the
+# longest refill time (capacity / rate) so that only full buckets are evicted.
+RATE_LIMIT_IDLE_SECONDS: float = 600.0
+
+###############################################################################
+############################ Metrics configuration ############################
+###############################################################################
+METRICS_ENABLED: bool = True
+# /metrics answers admins only, unless it is made public, e.g. for a scraper
+# on a private network that holds no token.
+METRICS_PUBLIC: bool = getenv("METRICS_PUBLIC", "false").lower() == "true"
+METRICS_SERVER_TIMING: bool = True
+METRICS_SLOW_QUERY_SECONDS: float | None = 0.1
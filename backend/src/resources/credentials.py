@@ -0,0 +1,61 @@
+from os import getenv
+from hmac import compare_digest
+from functools import lru_cache
+from dotenv import load_dotenv
+from passlib.context import CryptContext
+from cryptography.fernet import Fernet, InvalidToken
+from fastapi.concurrency import run_in_threadpool
+
+from src.resources.config import DOTENV_ABSPATH, PASSWORD_HASH_SCHEMES
+
+
+load_dotenv(DOTENV_ABSPATH)
+
+password_context: CryptContext = CryptContext(schemes=PASSWORD_HASH_SCHEMES)
+
+
+###############################################################################
+################################ Legacy Fernet ################################
+###############################################################################
+@lru_cache(maxsize=1)
+def get_fernet() -> Fernet:
+	return Fernet(str(getenv("FERNET_SECRET")).encode())
+
+
+def verify_legacy_password(password: str, encrypted_password: bytes) -> bool:
+	try:
+		decrypted: bytes = get_fernet().decrypt(encrypted_password)
+	except InvalidToken:
+		return False
+
+	return compare_digest(password.encode(), decrypted)
+
+
+###############################################################################
+################################## Hashing ####################################
+###############################################################################
+def hash_password_sync(password: str) -> bytes:
+	return password_context.hash(password).encode()
+
+
+# Returns (matches, needs_rehash). Passwords stored before hashing was
+# introduced are Fernet tokens: they verify through the legacy path and are
+# always flagged for a rehash.
+def verify_password_sync(password: str, stored_password: bytes) -> tuple[bool, bool]:
+	stored: str = stored_password.decode()
+
+	if password_context.identify(stored) is None:
+		return verify_legacy_password(password, stored_password), True
+
+	if not password_context.verify(password, stored):
+		return False, False
+
+	return True, password_context.needs_update(stored)
+
+
+async def hash_password(password: str) -> bytes:
+	return await run_in_threadpool(hash_password_sync, password)
+
+
+async def verify_password(password: str, stored_password: bytes) -> tuple[bool, bool]:
+	return await run_in_threadpool(verify_password_sync, password, stored_password)
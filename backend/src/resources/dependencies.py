@@ -1,14 +1,25 @@
+from math import ceil, inf
 from os import getenv
-from typing import Annotated
+from time import perf_counter, time
+from dataclasses import dataclass
+from typing import Annotated, Any
 from dotenv import load_dotenv
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Row, Select, and_, bindparam
+from sqlalchemy.orm import aliased
 from jwt import decode, InvalidTokenError
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Path, Query, WebSocketException, status
+from starlette.requests import HTTPConnection
 
 from src import oauth2_scheme
-from src.db.db import get_session
-from src.resources.models import User
-from src.resources.config import DOTENV_ABSPATH, ALGORITHM
+from src.db.db import get_session, get_read_session, read_async_engine
+from src.resources.models import User, ToDo
+from src.resources.cache import principal_cache, token_subject_cache
+from src.resources.metrics import add_auth_time
+from src.resources.rate_limit import rate_limiter
+from src.feed.tickets import redeem_feed_ticket
+from src.resources.config import DOTENV_ABSPATH, ALGORITHM, RATE_LIMITS, RATE_LIMIT_DEFAULT
 
 
 load_dotenv(DOTENV_ABSPATH)
@@ -17,22 +28,18 @@ load_dotenv(DOTENV_ABSPATH)
 ###############################################################################
 ################################### Database ##################################
 ###############################################################################
-SessionDep = Annotated[Session, Depends(get_session)]
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
 
 
 ###############################################################################
 ##################################### Auth ####################################
 ###############################################################################
-async def get_current_user(
-	session: SessionDep,
-	token: Annotated[str, Depends(oauth2_scheme)]
-) -> User:
-
-	credentials_exception = HTTPException(
-		status_code=status.HTTP_401_UNAUTHORIZED,
-		detail="Could not validate credentials",
-		headers={"WWW-Authenticate": "Bearer"},
-	)
+# Returns the (subject, expiry as a UNIX timestamp) of a valid token.
+def decode_token(token: str) -> tuple[str, float] | None:
+	cached: tuple[str, float] | None = token_subject_cache.get(token)
+	if cached is not None and cached[1] > time():
+		return cached
 
 	try:
 		payload = decode(
@@ -40,31 +47,324 @@ async def get_current_user(
 			str(getenv("JWT_SECRET")),
 			algorithms=[ALGORITHM]
 		)
+	except InvalidTokenError:
+		return None
 
-		username = payload.get("sub")
-		if username is None:
-			raise credentials_exception
+	subject: str | None = payload.get("sub")
+	if subject is None:
+		return None
+
+	claims: tuple[str, float] = (subject, payload.get("exp", inf))
+	token_subject_cache.set(token, claims)
+	return claims
+
+
+def decode_token_subject(token: str) -> str | None:
+	claims: tuple[str, float] | None = decode_token(token)
+	return claims[0] if claims is not None else None
 
-	except InvalidTokenError:
-		raise credentials_exception
 
-	user: User | None = session.exec(
-        select(User).where(User.username == username)
-    ).first()
+def credentials_exception() -> HTTPException:
+	return HTTPException(
+		status_code=status.HTTP_401_UNAUTHORIZED,
+		detail="Could not validate credentials",
+		headers={"WWW-Authenticate": "Bearer"},
+	)
+
+
+async def resolve_user(session: SessionDep, token: str) -> User:
+	username: str | None = decode_token_subject(token)
+	if username is None:
+		raise credentials_exception()
+
+	cached_user, generation = await principal_cache.get(username)
+	if cached_user is not None:
+		return cached_user
+
+	user: User | None = (await session.exec(
+		select(User).where(User.username == username)
+	)).first()
 	if user is None:
-		raise credentials_exception
+		raise credentials_exception()
 
+	principal_cache.set(user, generation)
 	return user
 
 
+async def get_current_user(
+	session: SessionDep,
+	token: Annotated[str, Depends(oauth2_scheme)]
+) -> User:
+
+	started: float = perf_counter()
+	try:
+		return await resolve_user(session, token)
+	finally:
+		add_auth_time(perf_counter() - started)
+
+
 async def get_current_active_user(
 	current_user: Annotated[User, Depends(get_current_user)]
 ) -> User:
 
-	if current_user.disabled:
+	ensure_active(current_user)
+	return current_user
+
+
+async def get_current_admin_user(
+	current_user: Annotated[User, Depends(get_current_active_user)]
+) -> User:
+
+	if not current_user.is_admin:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="Given user does not have the necessary rights for this operation!"
+		)
+	return current_user
+
+
+def ensure_active(user: User) -> None:
+	if user.disabled:
 		raise HTTPException(
 			status_code=status.HTTP_400_BAD_REQUEST,
 			detail="Inactive user"
 		)
 
-	return current_user
+
+###############################################################################
+################################### Ownership #################################
+###############################################################################
+# Per-user routes need the principal, the target user and, for single to-do
+# routes, the to-do itself. These dependencies fetch whatever the principal
+# cache cannot answer in one joined query, and check the same things in the
+# same order as the handlers used to: 401, inactive 400, 403, then the 404s.
+@dataclass
+class UserAccess:
+	principal: User
+	user: User
+
+
+@dataclass
+class ToDoAccess(UserAccess):
+	todo: ToDo
+
+
+principal_alias = aliased(User, name="principal")
+target_alias = aliased(User, name="target")
+
+# Built once; only the bound parameters change between requests, so each
+# statement is compiled once and then served from SQLAlchemy's cache.
+SELECT_TARGET: Select = select(target_alias).where(target_alias.id == bindparam("user_id"))
+SELECT_TARGET_TODO: Select = (
+	select(target_alias, ToDo)
+	.outerjoin_from(
+		target_alias,
+		ToDo,
+		and_(ToDo.id == bindparam("todo_id"), ToDo.user_id == target_alias.id)
+	)
+	.where(target_alias.id == bindparam("user_id"))
+)
+SELECT_PRINCIPAL_TARGET: Select = (
+	select(principal_alias, target_alias)
+	.outerjoin_from(principal_alias, target_alias, target_alias.id == bindparam("user_id"))
+	.where(principal_alias.username == bindparam("username"))
+)
+SELECT_PRINCIPAL_TARGET_TODO: Select = (
+	select(principal_alias, target_alias, ToDo)
+	.outerjoin_from(principal_alias, target_alias, target_alias.id == bindparam("user_id"))
+	.outerjoin_from(
+		target_alias,
+		ToDo,
+		and_(ToDo.id == bindparam("todo_id"), ToDo.user_id == target_alias.id)
+	)
+	.where(principal_alias.username == bindparam("username"))
+)
+
+
+def ensure_owner_or_admin(principal: User, user_id: int) -> None:
+	ensure_active(principal)
+	if not principal.is_admin and principal.id != user_id:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="Given user does not have the necessary rights for this operation!"
+		)
+
+
+async def resolve_access(
+	session: AsyncSession,
+	token: str,
+	user_id: int,
+	todo_id: int | None = None
+) -> tuple[User, User | None, ToDo | None]:
+
+	started: float = perf_counter()
+	username: str | None = decode_token_subject(token)
+	if username is None:
+		add_auth_time(perf_counter() - started)
+		raise credentials_exception()
+
+	principal, generation = await principal_cache.get(username)
+	add_auth_time(perf_counter() - started)
+
+	parameters: dict[str, Any] = {"username": username, "user_id": user_id, "todo_id": todo_id}
+	row: Row | None
+	if principal is not None:
+		# Forbidden requests are answered without touching the database.
+		ensure_owner_or_admin(principal, user_id)
+		row = (await session.execute(
+			SELECT_TARGET if todo_id is None else SELECT_TARGET_TODO,
+			parameters
+		)).first()
+		user, todo = (row[0], None if todo_id is None else row[1]) if row else (None, None)
+	else:
+		row = (await session.execute(
+			SELECT_PRINCIPAL_TARGET if todo_id is None else SELECT_PRINCIPAL_TARGET_TODO,
+			parameters
+		)).first()
+		if row is None:
+			raise credentials_exception()
+
+		principal, user, todo = row[0], row[1], None if todo_id is None else row[2]
+		principal_cache.set(principal, generation)
+		ensure_owner_or_admin(principal, user_id)
+
+	if user is None:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail=f"User with id {user_id} not found!"
+		)
+	if todo_id is not None and todo is None:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail=f"To-do with id {todo_id} for user with id {user_id} not found!"
+		)
+
+	return principal, user, todo
+
+
+async def get_user_access(
+	user_id: Annotated[int, Path(gt=0)],
+	session: SessionDep,
+	token: Annotated[str, Depends(oauth2_scheme)]
+) -> UserAccess:
+
+	principal, user, _ = await resolve_access(session, token, user_id)
+	return UserAccess(principal=principal, user=user)
+
+
+async def get_read_user_access(
+	user_id: Annotated[int, Path(gt=0)],
+	session: ReadSessionDep,
+	token: Annotated[str, Depends(oauth2_scheme)]
+) -> UserAccess:
+
+	principal, user, _ = await resolve_access(session, token, user_id)
+	return UserAccess(principal=principal, user=user)
+
+
+async def get_todo_access(
+	user_id: Annotated[int, Path(gt=0)],
+	todo_id: Annotated[int, Path(gt=0)],
+	session: SessionDep,
+	token: Annotated[str, Depends(oauth2_scheme)]
+) -> ToDoAccess:
+
+	principal, user, todo = await resolve_access(session, token, user_id, todo_id)
+	return ToDoAccess(principal=principal, user=user, todo=todo)
+
+
+async def get_read_todo_access(
+	user_id: Annotated[int, Path(gt=0)],
+	todo_id: Annotated[int, Path(gt=0)],
+	session: ReadSessionDep,
+	token: Annotated[str, Depends(oauth2_scheme)]
+) -> ToDoAccess:
+
+	principal, user, todo = await resolve_access(session, token, user_id, todo_id)
+	return ToDoAccess(principal=principal, user=user, todo=todo)
+
+
+# Write routes resolve through the request's write session so the returned
+# user and to-do can be modified and committed by the handler; read routes
+# use the read session and never open a write connection.
+UserAccessDep = Annotated[UserAccess, Depends(get_user_access)]
+ReadUserAccessDep = Annotated[UserAccess, Depends(get_read_user_access)]
+ToDoAccessDep = Annotated[ToDoAccess, Depends(get_todo_access)]
+ReadToDoAccessDep = Annotated[ToDoAccess, Depends(get_read_todo_access)]
+
+
+# Change feeds stay open for minutes, so their access is resolved on a
+# session of its own that is closed before the first event is sent, and the
+# feed ends when the token expires. Browsers cannot set headers on
+# EventSource or WebSocket handshakes, so they pass a feed ticket instead.
+@dataclass
+class FeedAccess(UserAccess):
+	expires_at: float
+
+
+async def get_feed_access(
+	connection: HTTPConnection,
+	user_id: Annotated[int, Path(gt=0)],
+	ticket: Annotated[str | None, Query()] = None
+) -> FeedAccess:
+
+	token: str | None
+	if ticket is not None:
+		token = await redeem_feed_ticket(ticket, user_id)
+	else:
+		scheme, _, token = connection.headers.get("Authorization", "").partition(" ")
+		if scheme.lower() != "bearer":
+			token = None
+
+	try:
+		async with AsyncSession(read_async_engine, expire_on_commit=False) as session:
+			principal, user, _ = await resolve_access(session, token or "", user_id)
+	except HTTPException as exception:
+		if connection.scope["type"] == "websocket":
+			raise WebSocketException(
+				code=status.WS_1008_POLICY_VIOLATION,
+				reason=str(exception.detail)
+			)
+		raise
+
+	claims: tuple[str, float] | None = decode_token(token or "")
+	return FeedAccess(
+		principal=principal,
+		user=user,
+		expires_at=claims[1] if claims is not None else 0.0
+	)
+
+
+FeedAccessDep = Annotated[FeedAccess, Depends(get_feed_access)]
+
+
+###############################################################################
+################################# Rate limiting ###############################
+###############################################################################
+# Runs before the route's own dependencies, so a throttled request costs a
+# token decode and a bucket update but no database round-trip.
+async def enforce_rate_limit(request: HTTPConnection) -> None:
+	method: str = request.scope.get("method", "WEBSOCKET")
+	route_key: str = f"{method} {getattr(request.scope.get('route'), 'path', '')}"
+	capacity, refill_per_second = RATE_LIMITS.get(route_key, RATE_LIMIT_DEFAULT)
+
+	scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+	subject: str | None = decode_token_subject(token) if scheme.lower() == "bearer" else None
+	client: str = (
+		f"user:{subject}" if subject is not None
+		else f"ip:{request.client.host if request.client else 'unknown'}"
+	)
+
+	retry_after: float = await rate_limiter.acquire(
+		f"{route_key}|{client}",
+		capacity,
+		refill_per_second
+	)
+	if retry_after > 0:
+		if request.scope["type"] == "websocket":
+			raise WebSocketException(code=status.WS_1013_TRY_AGAIN_LATER)
+		raise HTTPException(
+			status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+			detail="Too many requests, please try again later!",
+			headers={"Retry-After": str(ceil(retry_after))}
+		)
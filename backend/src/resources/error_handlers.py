@@ -14,6 +14,7 @@ async def http_exception_handler(
 	return JSONResponse(
 		status_code=exception.status_code,
 		content={"status": "Failed", "message": exception.detail},
+		headers=exception.headers,
 	)
 
 
@@ -31,6 +32,11 @@ async def integrity_error_handler(
 			"The email address you entered is already in use. "
 			"Please use a different email."
 		)
+	elif "username" in message:
+		message = (
+			"The username you entered is already in use. "
+			"Please choose a different username."
+		)
 
 	return JSONResponse(
 		status_code=400,
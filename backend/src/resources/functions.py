@@ -1,53 +1,257 @@
+from io import StringIO
 from os import getenv
+from json import dumps, loads
+from operator import attrgetter
 from jwt import encode
+from csv import writer
+from binascii import Error as BinasciiError
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from hashlib import blake2b
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import HTTPException, Request, Response, status
 from sqlmodel import select
 from dotenv import load_dotenv
-from typing import Any, Sequence
-from cryptography.fernet import Fernet
+from sqlalchemy import Select, Update, column, func, text, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import URL
+from typing import Any, AsyncIterator, Literal, Sequence
 from datetime import datetime, timedelta, timezone
 
-from src.resources.models import User, ToDo
+from src.resources.models import (
+    User,
+    UserPublic,
+    UserDeletionJob,
+    ToDo,
+    ToDoCreate,
+    ToDoUpdate,
+    ToDoFilter,
+)
+from src.resources.credentials import hash_password, verify_password
+from src.db.db import read_async_engine
+from src.resources.cache import total_count_cache
 from src.resources.dependencies import SessionDep
-from src.resources.config import DOTENV_ABSPATH, ALGORITHM
+from src.resources.config import DOTENV_ABSPATH, ALGORITHM, DB_BACKEND, TODO_EXPORT_CHUNK_SIZE
 
 
 load_dotenv(DOTENV_ABSPATH)
 
 
 ###############################################################################
-#################################### Users ####################################
+################################# Pagination ##################################
 ###############################################################################
-def encrypt(string: str) -> bytes:
-	encoded: bytes = string.encode()
-	f: Fernet = Fernet(str(getenv("FERNET_SECRET")).encode())
-	return f.encrypt(encoded)
+def encode_cursor(last_id: int) -> str:
+    return urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padding: str = "=" * (-len(cursor) % 4)
+        last_id: int = int(urlsafe_b64decode(cursor + padding).decode())
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor!"
+        )
+
+    return last_id
+
+
+# Delta sync watermarks hold the last change sequence number a client has
+# seen. Watermarks from before the sequence existed, or older than the pruned
+# tombstones of the user, are expired: the client must sync from scratch.
+def encode_sync_watermark(change_seq: int) -> str:
+    return urlsafe_b64encode(dumps({"seq": change_seq}).encode()).decode().rstrip("=")
+
+
+def decode_sync_watermark(watermark: str | None, floor_seq: int) -> int:
+    if watermark is None:
+        return 0
+
+    try:
+        padding: str = "=" * (-len(watermark) % 4)
+        payload: Any = loads(urlsafe_b64decode(watermark + padding).decode())
+        seq: Any = payload.get("seq") if isinstance(payload, dict) else None
+        change_seq: int | None = int(seq) if seq is not None else None
+    except (BinasciiError, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync watermark!"
+        )
+
+    if change_seq is None or change_seq < floor_seq:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync watermark has expired, sync again without a watermark!"
+        )
+
+    return change_seq
+
+
+# List queries fetch one row past the page to learn whether another follows.
+def split_page(rows: Sequence[Any], limit: int) -> tuple[Sequence[Any], bool]:
+    return rows[:limit], len(rows) > limit
+
+
+def next_cursor(page: Sequence[Any], has_more: bool) -> str | None:
+    if not has_more or not page:
+        return None
+
+    return encode_cursor(page[-1].id)
+
+
+def page_links(
+    request: Request,
+    offset: int,
+    limit: int,
+    after: str | None,
+    cursor: str | None,
+    has_more: bool
+) -> dict[str, str | None]:
+
+    url: URL = request.url
+    links: dict[str, str | None] = {
+        "self": str(url),
+        "first": str(url.remove_query_params(["offset", "after"]).include_query_params(limit=limit)),
+    }
+
+    # Keyset pages only link forward; offset pages link both ways.
+    if after is not None:
+        links["next"] = str(url.include_query_params(after=cursor)) if cursor else None
+        links["prev"] = None
+    else:
+        links["next"] = str(url.include_query_params(offset=offset + limit)) if has_more else None
+        links["prev"] = (
+            str(url.include_query_params(offset=max(offset - limit, 0))) if offset else None
+        )
+
+    return links
+
+
+# Per-user totals are read from the counters on User, global totals from a
+# short-lived cache; neither counts the rows on each request.
+def get_narrowing_filters(filters: ToDoFilter) -> dict[str, Any]:
+    return filters.model_dump(exclude={"sort"}, exclude_none=True)
+
+
+def total_from_counters(user: User, filters: ToDoFilter) -> int | None:
+    narrowing: dict[str, Any] = get_narrowing_filters(filters)
+
+    if not narrowing:
+        return user.todo_count
+    if narrowing == {"done": True}:
+        return user.todo_done_count
+    if narrowing == {"done": False}:
+        return user.todo_count - user.todo_done_count
+    if narrowing == {"is_favorite": True}:
+        return user.todo_favorite_count
+    if narrowing == {"is_favorite": False}:
+        return user.todo_count - user.todo_favorite_count
 
+    return None
 
-def decrypt(bytes_str: bytes) -> str:
-	f: Fernet = Fernet(str(getenv("FERNET_SECRET")).encode())
-	decrypted: bytes = f.decrypt(bytes_str)
-	return decrypted.decode()
 
+async def get_cached_total(session: AsyncSession, name: str, query: Select) -> int:
+    total: int | None = total_count_cache.get(name)
+    if total is None:
+        total = (await session.execute(query)).scalar() or 0
+        total_count_cache.set(name, total)
 
-def verify_password(password: str, hashed_password: bytes) -> bool:
-    return password == decrypt(hashed_password)
+    return total
 
 
-def authenticate_user(
+def count_all_todos() -> Select:
+    return select(func.coalesce(func.sum(User.todo_count), 0))
+
+
+def count_all_users() -> Select:
+    return select(func.count()).select_from(User)
+
+
+###############################################################################
+############################ Conditional requests #############################
+###############################################################################
+# Validators for conditional GETs. write_datetime values are naive local
+# times; they are converted to UTC and truncated to whole seconds to match
+# the resolution of HTTP dates.
+def build_etag(*parts: Any) -> str:
+    digest: str = blake2b(
+        "|".join(map(str, parts)).encode(),
+        digest_size=16
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def to_http_datetime(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers: dict[str, str] = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            to_http_datetime(last_modified),
+            usegmt=True
+        )
+
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    if_none_match: str | None = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates: set[str] = {
+            candidate.strip().removeprefix("W/")
+            for candidate in if_none_match.split(",")
+        }
+        return "*" in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since: str | None = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since: datetime = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return to_http_datetime(last_modified) <= since
+
+
+def not_modified_response(etag: str, last_modified: datetime | None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified)
+    )
+
+
+###############################################################################
+#################################### Users ####################################
+###############################################################################
+async def authenticate_user(
     session: SessionDep,
     username: str,
     password: str
 ) -> User | bool:
 
-    user: User | None = session.exec(
+    user: User | None = (await session.exec(
         select(User).where(User.username == username)
-    ).first()
+    )).first()
 
     if not user:
         return False
-    if not verify_password(password, user.password):
+
+    is_valid, needs_rehash = await verify_password(password, user.password)
+    if not is_valid:
         return False
 
+    if needs_rehash:
+        user.password = await hash_password(password)
+        session.add(user)
+        await session.commit()
+
     return user
 
 
@@ -70,41 +274,253 @@ def create_access_token(
 ###############################################################################
 ################################## To-Dos #####################################
 ###############################################################################
-def format_todo_response(todo: ToDo) -> dict[str, Any]:
+def parse_todo_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date format: {str(e)}. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SS)."
+        )
+
+
+def build_todo(user_id: int, todo: ToDoCreate) -> ToDo:
+    new_reminder_datetime: datetime | None = None
+    new_expiration_datetime: datetime | None = None
+
+    if todo.reminder_datetime:
+        new_reminder_datetime = parse_todo_datetime(todo.reminder_datetime)
+    if todo.expiration_datetime:
+        new_expiration_datetime = parse_todo_datetime(todo.expiration_datetime)
+
+    if new_reminder_datetime and new_expiration_datetime and new_reminder_datetime > new_expiration_datetime:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Reminder datetime cannot be after expiration datetime."
+        )
+
+    return ToDo(
+        user_id=user_id,
+        description=todo.description,
+        done=todo.done,
+        is_favorite=todo.is_favorite,
+        reminder_datetime=new_reminder_datetime,
+        expiration_datetime=new_expiration_datetime
+    )
+
+
+def apply_todo_update(todo_db: ToDo, todo: ToDoUpdate) -> bool:
+    # Parse before touching todo_db so a bad date leaves the row unchanged.
+    new_reminder_datetime: datetime | None = (
+        parse_todo_datetime(todo.reminder_datetime)
+        if todo.reminder_datetime else None
+    )
+    new_expiration_datetime: datetime | None = (
+        parse_todo_datetime(todo.expiration_datetime)
+        if todo.expiration_datetime else None
+    )
+
+    change_flag: bool = False
+    if todo.description and todo.description != todo_db.description:
+        change_flag = True
+        todo_db.description = todo.description
+    if todo.done and todo.done != todo_db.done:
+        change_flag = True
+        todo_db.done = todo.done
+    if todo.is_favorite and todo.is_favorite != todo_db.is_favorite:
+        change_flag = True
+        todo_db.is_favorite = todo.is_favorite
+    if todo.reminder_datetime and todo.reminder_datetime != todo_db.reminder_datetime:
+        change_flag = True
+        todo_db.reminder_datetime = new_reminder_datetime
+    if todo.expiration_datetime and todo.expiration_datetime != todo_db.expiration_datetime:
+        change_flag = True
+        todo_db.expiration_datetime = new_expiration_datetime
+
+    if change_flag:
+        todo_db.write_datetime = datetime.now()
+
+    return change_flag
+
+
+# Every to-do write takes the next numbers of its user's change sequence in
+# the UPDATE that moves the counters. Its row lock orders concurrent writers
+# of the same user, so sequence order is commit order, which write_datetime,
+# stamped before the transaction commits, does not guarantee.
+def update_todo_counters(
+    user_id: int,
+    todos: int = 0,
+    done: int = 0,
+    favorites: int = 0,
+    changes: int = 0
+) -> Update:
+
+    return update(User).where(User.id == user_id).values(
+        todo_count=User.todo_count + todos,
+        todo_done_count=User.todo_done_count + done,
+        todo_favorite_count=User.todo_favorite_count + favorites,
+        todo_change_seq=User.todo_change_seq + changes,
+    ).returning(User.todo_change_seq)
+
+
+# Returns the first of the allocated sequence numbers.
+async def record_todo_changes(
+    session: AsyncSession,
+    user_id: int,
+    changes: int,
+    todos: int = 0,
+    done: int = 0,
+    favorites: int = 0
+) -> int:
+
+    last_seq: int = (await session.execute(
+        update_todo_counters(user_id, todos, done, favorites, changes)
+    )).scalar_one()
+
+    return last_seq - changes + 1
+
+
+def build_search_query(q: str) -> str:
+    # Every word becomes a quoted FTS5 prefix term so user input can never be
+    # parsed as query syntax; terms are ANDed together.
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in q.split())
+
+
+def apply_todo_filters(query: Select, filters: ToDoFilter, after: str | None) -> Select:
+    if filters.done is not None:
+        query = query.where(ToDo.done == filters.done)
+    if filters.is_favorite is not None:
+        query = query.where(ToDo.is_favorite == filters.is_favorite)
+    if filters.expires_before is not None:
+        query = query.where(ToDo.expiration_datetime < filters.expires_before)
+    if filters.expires_after is not None:
+        query = query.where(ToDo.expiration_datetime > filters.expires_after)
+    if filters.reminder_before is not None:
+        query = query.where(ToDo.reminder_datetime < filters.reminder_before)
+    if filters.reminder_after is not None:
+        query = query.where(ToDo.reminder_datetime > filters.reminder_after)
+
+    if filters.q is not None and filters.q.strip():
+        if DB_BACKEND == "sqlite":
+            query = query.where(ToDo.id.in_(
+                text("SELECT rowid FROM todos_fts WHERE todos_fts MATCH :q")
+                .bindparams(q=build_search_query(filters.q))
+                .columns(column("rowid"))
+            ))
+        else:
+            query = query.where(ToDo.description.ilike(f"%{filters.q}%"))
+
+    descending: bool = filters.sort.startswith("-")
+    sort_column = getattr(ToDo, filters.sort.lstrip("-"))
+    query = query.order_by(None).order_by(
+        sort_column.desc() if descending else sort_column,
+        ToDo.id.desc() if descending else ToDo.id
+    )
+
+    if after is not None:
+        if filters.sort not in ("id", "-id"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is only supported when sorting by id!"
+            )
+
+        last_id: int = decode_cursor(after)
+        query = query.where(ToDo.id < last_id if descending else ToDo.id > last_id)
+
+    return query
+
+
+###############################################################################
+############################### Serialization #################################
+###############################################################################
+# Rows are serialized straight from column values, either plain result tuples
+# or attributes read through a precompiled getter, skipping model_dump().
+# Internal bookkeeping columns are neither selected nor serialized.
+TODO_INTERNAL_COLUMNS: tuple[str, ...] = ("change_seq",)
+TODO_COLUMNS: tuple[str, ...] = tuple(
+    column.name for column in ToDo.__table__.columns
+    if column.name not in TODO_INTERNAL_COLUMNS
+)
+USER_PUBLIC_COLUMNS: tuple[str, ...] = tuple(UserPublic.model_fields)
+USER_DELETION_JOB_COLUMNS: tuple[str, ...] = tuple(
+    column.name for column in UserDeletionJob.__table__.columns
+)
+
+get_todo_values = attrgetter(*TODO_COLUMNS)
+get_user_public_values = attrgetter(*USER_PUBLIC_COLUMNS)
+get_user_deletion_job_values = attrgetter(*USER_DELETION_JOB_COLUMNS)
+
+
+def select_todo_rows() -> Select:
+    return select(
+        *(ToDo.__table__.columns[column] for column in TODO_COLUMNS)
+    ).order_by(ToDo.id)
+
+
+def select_user_public_rows() -> Select:
+    return select(
+        *(User.__table__.columns[column] for column in USER_PUBLIC_COLUMNS)
+    ).order_by(User.id)
+
+
+# Values past the columns, such as a sort key added to the query, are dropped.
+def format_row(columns: tuple[str, ...], row: Sequence[Any]) -> dict[str, Any]:
     return {
-        **todo.model_dump(),
-        "reminder_datetime": (
-            todo.reminder_datetime.isoformat()
-            if todo.reminder_datetime else None
-        ),
-        "expiration_datetime": (
-            todo.expiration_datetime.isoformat()
-            if todo.expiration_datetime
-            else None
-        ),
-        "write_datetime": todo.write_datetime.isoformat(),
-        "creation_datetime": todo.creation_datetime.isoformat(),
+        column: value.isoformat() if isinstance(value, datetime) else value
+        for column, value in zip(columns, row)
     }
 
 
-def map_todo_list(todo_list: Sequence[ToDo]) -> list[dict[str, Any]]:
-    return list(
-		map(
-			lambda todo: {
-				**todo.model_dump(),
-				"reminder_datetime": (
-					todo.reminder_datetime.isoformat()
-					if todo.reminder_datetime
-					else None
-				),
-				"expiration_datetime": (
-					todo.expiration_datetime.isoformat()
-					if todo.expiration_datetime
-					else None
-				),
-				"write_datetime": todo.write_datetime.isoformat(),
-				"creation_datetime": todo.creation_datetime.isoformat(),
-			},
-			todo_list
-		)
-	)
+def format_todo_row(row: Sequence[Any]) -> dict[str, Any]:
+    return format_row(TODO_COLUMNS, row)
+
+
+def format_todo_response(todo: ToDo) -> dict[str, Any]:
+    return format_row(TODO_COLUMNS, get_todo_values(todo))
+
+
+def map_todo_list(rows: Sequence[Sequence[Any]]) -> list[dict[str, Any]]:
+    return [format_row(TODO_COLUMNS, row) for row in rows]
+
+
+def format_user_response(user: User) -> dict[str, Any]:
+    return format_row(USER_PUBLIC_COLUMNS, get_user_public_values(user))
+
+
+def map_user_list(rows: Sequence[Sequence[Any]]) -> list[dict[str, Any]]:
+    return [format_row(USER_PUBLIC_COLUMNS, row) for row in rows]
+
+
+def format_user_deletion_job_response(job: UserDeletionJob) -> dict[str, Any]:
+    return format_row(USER_DELETION_JOB_COLUMNS, get_user_deletion_job_values(job))
+
+
+###############################################################################
+################################## Export #####################################
+###############################################################################
+# Streams plain column tuples from a server-side cursor in chunks, so memory
+# does not grow with the number of exported rows. The generator opens its own
+# connection because request dependencies are closed before the body is sent.
+async def stream_todo_export(
+    query: Select,
+    export_format: Literal["ndjson", "csv"]
+) -> AsyncIterator[str]:
+
+    if export_format == "csv":
+        buffer: StringIO = StringIO()
+        csv_writer = writer(buffer)
+        csv_writer.writerow(TODO_COLUMNS)
+        yield buffer.getvalue()
+
+    async with read_async_engine.connect() as connection:
+        result = await connection.stream(
+            query.execution_options(yield_per=TODO_EXPORT_CHUNK_SIZE)
+        )
+        async for rows in result.partitions(TODO_EXPORT_CHUNK_SIZE):
+            if export_format == "csv":
+                buffer = StringIO()
+                csv_writer = writer(buffer)
+                csv_writer.writerows(format_todo_row(row).values() for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(dumps(format_todo_row(row)) + "\n" for row in rows)
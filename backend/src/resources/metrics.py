@@ -0,0 +1,225 @@
+from bisect import bisect_left
+from time import perf_counter
+from dataclasses import dataclass
+from contextvars import ContextVar
+from logging import Logger, getLogger
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import Engine, event
+
+from src.resources.config import METRICS_SLOW_QUERY_SECONDS
+
+
+logger: Logger = getLogger(__name__)
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+	0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+###############################################################################
+################################## Histograms #################################
+###############################################################################
+class Histogram:
+	def __init__(self, name: str, description: str, buckets: Sequence[float]) -> None:
+		self.name: str = name
+		self.description: str = description
+		self.buckets: tuple[float, ...] = tuple(buckets)
+		self.series: dict[tuple[tuple[str, str], ...], list[float]] = {}
+
+	def observe(self, value: float, **labels: str) -> None:
+		key: tuple[tuple[str, str], ...] = tuple(sorted(labels.items()))
+		series: list[float] | None = self.series.get(key)
+		if series is None:
+			# One slot per bucket plus +Inf, then sum and count.
+			series = self.series[key] = [0.0] * (len(self.buckets) + 3)
+
+		series[bisect_left(self.buckets, value)] += 1
+		series[-2] += value
+		series[-1] += 1
+
+	def render(self) -> Iterable[str]:
+		yield f"# HELP {self.name} {self.description}"
+		yield f"# TYPE {self.name} histogram"
+
+		for key, series in self.series.items():
+			labels: str = ",".join(f'{name}="{value}"' for name, value in key)
+			prefix: str = f"{labels}," if labels else ""
+			suffix: str = f"{{{labels}}}" if labels else ""
+			cumulative: float = 0.0
+			for bound, count in zip((*self.buckets, "+Inf"), series):
+				cumulative += count
+				yield f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative:g}'
+			yield f"{self.name}_sum{suffix} {series[-2]}"
+			yield f"{self.name}_count{suffix} {series[-1]:g}"
+
+
+request_duration: Histogram = Histogram(
+	"todo_http_request_duration_seconds",
+	"HTTP request latency by route.",
+	LATENCY_BUCKETS
+)
+request_db_queries: Histogram = Histogram(
+	"todo_http_request_db_queries",
+	"Database queries issued per HTTP request.",
+	COUNT_BUCKETS
+)
+request_db_duration: Histogram = Histogram(
+	"todo_http_request_db_duration_seconds",
+	"Time spent in database queries per HTTP request.",
+	LATENCY_BUCKETS
+)
+request_serialization_duration: Histogram = Histogram(
+	"todo_http_request_serialization_duration_seconds",
+	"Time spent encoding JSON response bodies per HTTP request.",
+	LATENCY_BUCKETS
+)
+request_auth_duration: Histogram = Histogram(
+	"todo_http_request_auth_duration_seconds",
+	"Time spent resolving the current user per HTTP request.",
+	LATENCY_BUCKETS
+)
+job_wait_duration: Histogram = Histogram(
+	"todo_job_wait_seconds",
+	"Time background jobs spent queued before a worker picked them up.",
+	LATENCY_BUCKETS
+)
+job_run_duration: Histogram = Histogram(
+	"todo_job_run_seconds",
+	"Background job run time by job and outcome.",
+	LATENCY_BUCKETS
+)
+HISTOGRAMS: tuple[Histogram, ...] = (
+	request_duration,
+	request_db_queries,
+	request_db_duration,
+	request_serialization_duration,
+	request_auth_duration,
+	job_wait_duration,
+	job_run_duration,
+)
+
+slow_queries: int = 0
+
+
+###############################################################################
+############################### Request timings ###############################
+###############################################################################
+@dataclass
+class RequestTimings:
+	db_queries: int = 0
+	db_seconds: float = 0.0
+	serialization_seconds: float = 0.0
+	auth_seconds: float = 0.0
+
+	def server_timing(self, total_seconds: float) -> str:
+		return ", ".join([
+			f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"',
+			f"auth;dur={self.auth_seconds * 1000:.2f}",
+			f"serialize;dur={self.serialization_seconds * 1000:.2f}",
+			f"total;dur={total_seconds * 1000:.2f}",
+		])
+
+
+# Holds a mutable RequestTimings per request; the object (not the variable) is
+# updated so that changes made in child tasks and threads are visible to the
+# middleware that created it.
+request_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def record_request(
+	timings: RequestTimings,
+	method: str,
+	route: str,
+	status_code: int,
+	total_seconds: float
+) -> None:
+	labels: dict[str, str] = {"method": method, "route": route}
+
+	request_duration.observe(total_seconds, **labels, status=str(status_code))
+	request_db_queries.observe(timings.db_queries, **labels)
+	request_db_duration.observe(timings.db_seconds, **labels)
+	request_serialization_duration.observe(timings.serialization_seconds, **labels)
+	request_auth_duration.observe(timings.auth_seconds, **labels)
+
+
+def add_serialization_time(seconds: float) -> None:
+	timings: RequestTimings | None = request_timings.get()
+	if timings is not None:
+		timings.serialization_seconds += seconds
+
+
+def add_auth_time(seconds: float) -> None:
+	timings: RequestTimings | None = request_timings.get()
+	if timings is not None:
+		timings.auth_seconds += seconds
+
+
+###############################################################################
+################################ Query hooks ##################################
+###############################################################################
+def before_cursor_execute(
+	connection: Any,
+	cursor: Any,
+	statement: str,
+	parameters: Any,
+	context: Any,
+	executemany: bool
+) -> None:
+	connection.info.setdefault("query_started", []).append(perf_counter())
+
+
+def after_cursor_execute(
+	connection: Any,
+	cursor: Any,
+	statement: str,
+	parameters: Any,
+	context: Any,
+	executemany: bool
+) -> None:
+	global slow_queries
+
+	elapsed: float = perf_counter() - connection.info["query_started"].pop()
+
+	timings: RequestTimings | None = request_timings.get()
+	if timings is not None:
+		timings.db_queries += 1
+		timings.db_seconds += elapsed
+
+	if METRICS_SLOW_QUERY_SECONDS is not None and elapsed >= METRICS_SLOW_QUERY_SECONDS:
+		slow_queries += 1
+		logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+	if not event.contains(engine, "before_cursor_execute", before_cursor_execute):
+		event.listen(engine, "before_cursor_execute", before_cursor_execute)
+		event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+###############################################################################
+################################## Exposition #################################
+###############################################################################
+def render_gauges(name: str, description: str, values: dict[str, Any]) -> Iterable[str]:
+	yield f"# HELP {name} {description}"
+	yield f"# TYPE {name} gauge"
+	for key, value in values.items():
+		if isinstance(value, bool) or not isinstance(value, (int, float)):
+			continue
+		yield f'{name}{{stat="{key}"}} {value}'
+
+
+def render_metrics(extra_stats: dict[str, tuple[str, dict[str, Any]]]) -> str:
+	lines: list[str] = []
+	for histogram in HISTOGRAMS:
+		lines.extend(histogram.render())
+
+	lines.append("# HELP todo_db_slow_queries_total Queries slower than the slow query threshold.")
+	lines.append("# TYPE todo_db_slow_queries_total counter")
+	lines.append(f"todo_db_slow_queries_total {slow_queries}")
+
+	for name, (description, values) in extra_stats.items():
+		lines.extend(render_gauges(name, description, values))
+
+	return "\n".join(lines) + "\n"
@@ -1,5 +1,7 @@
+from typing import Literal
 from datetime import datetime
 from pydantic import EmailStr
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -15,13 +17,28 @@ class UserBase(SQLModel):
 
 class User(UserBase, table=True):
 	__tablename__ = "users"
+	__table_args__ = (
+		Index("ix_users_username", "username", unique=True),
+	)
 
 	id: int | None = Field(default=None, primary_key=True)
 	password: bytes
 	write_datetime: datetime = Field(default_factory=datetime.now)
 	creation_datetime: datetime = Field(default_factory=datetime.now)
 
-	todos: list["ToDo"] = Relationship(back_populates="users")
+	# Maintained by the to-do write handlers in the same transaction as the
+	# rows they count.
+	todo_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+	todo_done_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+	todo_favorite_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+	# Last number taken from the user's to-do change sequence, and the highest
+	# one whose tombstone was pruned: older sync watermarks need a full sync.
+	todo_change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+	todo_sync_floor_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+	# The database deletes a user's to-dos (ON DELETE CASCADE); the ORM must
+	# not load and delete them one by one first.
+	todos: list["ToDo"] = Relationship(back_populates="users", passive_deletes="all")
 
 
 class UserPublic(UserBase):
@@ -30,6 +47,34 @@ class UserPublic(UserBase):
 	creation_datetime: str
 
 
+class UserStats(SQLModel):
+	todo_count: int
+	done_count: int
+	pending_count: int
+	favorite_count: int
+
+
+UserDeletionStatus = Literal["pending", "running", "done", "failed"]
+
+
+# Progress of the background purge started by DELETE /users/{user_id}. Kept
+# after the user row is gone, hence no foreign key.
+class UserDeletionJob(SQLModel, table=True):
+	__tablename__ = "user_deletion_jobs"
+	__table_args__ = (
+		Index("ix_user_deletion_jobs_user_id", "user_id"),
+	)
+
+	id: int | None = Field(default=None, primary_key=True)
+	user_id: int
+	status: str = Field(default="pending", max_length=10)
+	deleted_todos: int = Field(default=0)
+	error: str | None = Field(default=None)
+	creation_datetime: datetime = Field(default_factory=datetime.now)
+	write_datetime: datetime = Field(default_factory=datetime.now)
+	finished_datetime: datetime | None = Field(default=None, nullable=True)
+
+
 class UserCreate(UserBase):
 	model_config = {"extra": "forbid"}
 
@@ -55,17 +100,45 @@ class ToDoBase(SQLModel):
 
 class ToDo(ToDoBase, table=True):
 	__tablename__ = "todos"
+	__table_args__ = (
+		Index("ix_todos_user_id", "user_id"),
+		Index("ix_todos_user_id_done", "user_id", "done"),
+		Index("ix_todos_user_id_expiration_datetime", "user_id", "expiration_datetime"),
+		Index("ix_todos_user_id_is_favorite", "user_id", "is_favorite"),
+		Index("ix_todos_user_id_reminder_datetime", "user_id", "reminder_datetime"),
+		Index("ix_todos_reminder_datetime", "reminder_datetime"),
+		Index("ix_todos_expiration_datetime", "expiration_datetime"),
+		Index("ix_todos_user_id_write_datetime", "user_id", "write_datetime"),
+		Index("ix_todos_user_id_change_seq", "user_id", "change_seq"),
+		Index("ix_todos_write_datetime", "write_datetime"),
+	)
 
 	id: int | None = Field(default=None, primary_key=True)
-	user_id: int | None = Field(default=None, foreign_key="users.id")
+	user_id: int | None = Field(default=None, foreign_key="users.id", ondelete="CASCADE")
 	reminder_datetime: datetime | None = Field(default=None, nullable=True)
 	expiration_datetime: datetime | None = Field(default=None, nullable=True)
 	write_datetime: datetime = Field(default_factory=datetime.now)
 	creation_datetime: datetime = Field(default_factory=datetime.now)
+	change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
 	users: User | None = Relationship(back_populates="todos")
 
 
+class ToDoTombstone(SQLModel, table=True):
+	__tablename__ = "todo_tombstones"
+	__table_args__ = (
+		Index("ix_todo_tombstones_user_id_deleted_datetime", "user_id", "deleted_datetime"),
+		Index("ix_todo_tombstones_user_id_change_seq", "user_id", "change_seq"),
+		Index("ix_todo_tombstones_deleted_datetime", "deleted_datetime"),
+	)
+
+	id: int | None = Field(default=None, primary_key=True)
+	todo_id: int
+	user_id: int | None = Field(default=None)
+	deleted_datetime: datetime = Field(default_factory=datetime.now)
+	change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+
 class ToDoCreate(ToDoBase):
 	model_config = {"extra": "forbid"}
 
@@ -79,3 +152,65 @@ class ToDoUpdate(SQLModel):
 	is_favorite: bool | None = False
 	reminder_datetime: str | None = None
 	expiration_datetime: str | None = None
+
+
+class ToDoBatchUpdate(ToDoUpdate):
+	id: int = Field(gt=0)
+
+
+ToDoSort = Literal[
+	"id", "-id",
+	"creation_datetime", "-creation_datetime",
+	"write_datetime", "-write_datetime",
+	"reminder_datetime", "-reminder_datetime",
+	"expiration_datetime", "-expiration_datetime",
+]
+
+
+class ToDoFilter(SQLModel):
+	done: bool | None = None
+	is_favorite: bool | None = None
+	expires_before: datetime | None = None
+	expires_after: datetime | None = None
+	reminder_before: datetime | None = None
+	reminder_after: datetime | None = None
+	q: str | None = Field(default=None, min_length=1, max_length=100)
+	sort: ToDoSort = "id"
+
+
+###############################################################################
+################################# Scheduler ###################################
+###############################################################################
+# Progress of the deadline scheduler: everything due up to
+# dispatched_datetime has been sent, so a restart resumes from there.
+class SchedulerState(SQLModel, table=True):
+	__tablename__ = "scheduler_state"
+
+	name: str = Field(primary_key=True, max_length=50)
+	dispatched_datetime: datetime
+	write_datetime: datetime = Field(default_factory=datetime.now)
+
+
+###############################################################################
+################################### Jobs ######################################
+###############################################################################
+JobStatus = Literal["pending", "running", "failed"]
+
+
+# Durable job queue outbox. Rows are deleted when their job succeeds; failed
+# rows are kept as a dead-letter record.
+class JobOutbox(SQLModel, table=True):
+	__tablename__ = "job_outbox"
+	__table_args__ = (
+		Index("ix_job_outbox_status_available_datetime", "status", "available_datetime"),
+	)
+
+	id: int | None = Field(default=None, primary_key=True)
+	name: str = Field(max_length=50)
+	payload: str
+	status: str = Field(default="pending", max_length=10)
+	attempts: int = Field(default=0)
+	error: str | None = Field(default=None)
+	available_datetime: datetime = Field(default_factory=datetime.now)
+	claimed_datetime: datetime | None = Field(default=None, nullable=True)
+	creation_datetime: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,168 @@
+from time import monotonic
+from collections import OrderedDict
+from logging import Logger, getLogger
+from typing import Any, Protocol
+
+from src.resources.config import (
+	RATE_LIMIT_ENABLED,
+	RATE_LIMIT_BACKEND,
+	RATE_LIMIT_REDIS_URL,
+	RATE_LIMIT_MAX_BUCKETS,
+	RATE_LIMIT_IDLE_SECONDS,
+)
+
+
+logger: Logger = getLogger(__name__)
+
+
+###############################################################################
+################################### Backends ##################################
+###############################################################################
+# acquire() takes one token from the bucket and returns 0.0, or returns the
+# number of seconds until a token is available when the bucket is empty.
+class RateLimitBackend(Protocol):
+	async def acquire(self, key: str, capacity: int, refill_per_second: float) -> float:
+		...
+
+
+# Buckets are (tokens, last update) pairs kept in least recently used order,
+# so idle buckets are always at the front and evicting them is O(1) per call.
+class MemoryRateLimitBackend:
+	def __init__(self, max_buckets: int, idle_seconds: float) -> None:
+		self.max_buckets: int = max_buckets
+		self.idle_seconds: float = idle_seconds
+		self.evictions: int = 0
+		self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+	async def acquire(self, key: str, capacity: int, refill_per_second: float) -> float:
+		now: float = monotonic()
+
+		bucket: tuple[float, float] | None = self.buckets.pop(key, None)
+		if bucket is None:
+			tokens: float = capacity
+		else:
+			tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+
+		retry_after: float = 0.0
+		if tokens >= 1:
+			tokens -= 1
+		else:
+			retry_after = (1 - tokens) / refill_per_second
+
+		self.buckets[key] = (tokens, now)
+		self.evict(now)
+
+		return retry_after
+
+	def evict(self, now: float) -> None:
+		while self.buckets:
+			oldest_key: str = next(iter(self.buckets))
+			if (
+				len(self.buckets) <= self.max_buckets
+				and now - self.buckets[oldest_key][1] < self.idle_seconds
+			):
+				break
+			del self.buckets[oldest_key]
+			self.evictions += 1
+
+
+# Runs the same refill-and-take step atomically inside Redis, on the server
+# clock, so every worker shares one bucket per key. Idle buckets expire once
+# they would be full again.
+REDIS_TOKEN_BUCKET_SCRIPT: str = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local retry_after = 0
+if tokens >= 1 then
+	tokens = tokens - 1
+else
+	retry_after = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+	def __init__(self, url: str) -> None:
+		from redis.asyncio import Redis
+
+		self.client: Redis = Redis.from_url(url)
+		self.script = self.client.register_script(REDIS_TOKEN_BUCKET_SCRIPT)
+
+	async def acquire(self, key: str, capacity: int, refill_per_second: float) -> float:
+		return float(await self.script(
+			keys=[f"rate_limit:{key}"],
+			args=[capacity, refill_per_second]
+		))
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+	if RATE_LIMIT_BACKEND == "redis":
+		return RedisRateLimitBackend(RATE_LIMIT_REDIS_URL)
+
+	return MemoryRateLimitBackend(
+		max_buckets=RATE_LIMIT_MAX_BUCKETS,
+		idle_seconds=RATE_LIMIT_IDLE_SECONDS
+	)
+
+
+###############################################################################
+################################# Rate limiter ################################
+###############################################################################
+class RateLimiter:
+	def __init__(self, backend: RateLimitBackend, enabled: bool = True) -> None:
+		self.backend: RateLimitBackend = backend
+		self.enabled: bool = enabled
+		self.allowed: int = 0
+		self.limited: int = 0
+		self.failures: int = 0
+
+	async def acquire(self, key: str, capacity: int, refill_per_second: float) -> float:
+		if not self.enabled:
+			return 0.0
+
+		# An unreachable shared backend must not take the API down with it.
+		try:
+			retry_after: float = await self.backend.acquire(key, capacity, refill_per_second)
+		except Exception:
+			self.failures += 1
+			logger.exception("Rate limit backend failed, letting the request through")
+			return 0.0
+
+		if retry_after > 0:
+			self.limited += 1
+		else:
+			self.allowed += 1
+
+		return retry_after
+
+	def stats(self) -> dict[str, Any]:
+		stats: dict[str, Any] = {
+			"enabled": self.enabled,
+			"backend": type(self.backend).__name__,
+			"allowed": self.allowed,
+			"limited": self.limited,
+			"failures": self.failures,
+		}
+		if isinstance(self.backend, MemoryRateLimitBackend):
+			stats["buckets"] = len(self.backend.buckets)
+			stats["evictions"] = self.backend.evictions
+
+		return stats
+
+
+rate_limiter: RateLimiter = RateLimiter(
+	backend=get_rate_limit_backend(),
+	enabled=RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,27 @@
+from typing import Any
+from time import perf_counter
+from fastapi.responses import JSONResponse as BaseJSONResponse
+
+from src.resources.metrics import add_serialization_time
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+
+###############################################################################
+#################################### JSON #####################################
+###############################################################################
+class JSONResponse(BaseJSONResponse):
+	# Encodes with orjson when it is installed and falls back to the stdlib
+	# encoder otherwise; the output is the same compact JSON either way.
+	def render(self, content: Any) -> bytes:
+		started: float = perf_counter()
+		if orjson is None:
+			body: bytes = super().render(content)
+		else:
+			body = orjson.dumps(content)
+		add_serialization_time(perf_counter() - started)
+
+		return body
@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.resources.metrics import render_metrics
+from src.jobs.queue import job_queue
+from src.feed.hub import change_hub
+from src.jobs.user_deletion import user_purger
+from src.jobs.tombstones import tombstone_pruner
+from src.scheduler.scheduler import deadline_scheduler
+from src.resources.cache import principal_cache, response_cache
+from src.resources.rate_limit import rate_limiter
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+	return PlainTextResponse(
+		render_metrics({
+			"todo_principal_cache": ("Authenticated principal cache statistics.", principal_cache.stats()),
+			"todo_response_cache": ("List response cache statistics.", response_cache.stats()),
+			"todo_scheduler": ("Deadline scheduler statistics.", deadline_scheduler.stats()),
+			"todo_rate_limiter": ("Rate limiter statistics.", rate_limiter.stats()),
+			"todo_user_purger": ("Background user deletion statistics.", user_purger.stats()),
+			"todo_tombstone_pruner": ("Deleted to-do tombstone pruning statistics.", tombstone_pruner.stats()),
+			"todo_job_queue": ("Background job queue statistics.", job_queue.stats()),
+			"todo_change_feed": ("To-do change feed statistics.", change_hub.stats()),
+		}),
+		media_type="text/plain; version=0.0.4"
+	)
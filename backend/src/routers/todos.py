@@ -1,12 +1,65 @@
-from sqlmodel import select
 from datetime import datetime
-from typing import Any, Annotated, Sequence
-from fastapi.responses import JSONResponse, Response
-from fastapi import APIRouter, Query, Path, Body, Depends, HTTPException, status
-
-from src.resources.models import User, ToDoCreate, ToDo, ToDoUpdate
-from src.resources.functions import format_todo_response, map_todo_list
-from src.resources.dependencies import SessionDep, get_current_active_user
+from operator import attrgetter
+from sqlmodel import select
+from sqlalchemy import Row, delete, func
+from typing import Any, Annotated, Literal, Sequence
+from fastapi.responses import Response, StreamingResponse
+from fastapi import APIRouter, Query, Path, Body, Depends, HTTPException, Request, WebSocket, status
+
+from src import oauth2_scheme
+from src.resources.cache import response_cache
+from src.jobs.events import publish_change, publish_changes
+from src.feed.streams import forward_change_events, stream_change_events
+from src.feed.tickets import issue_feed_ticket
+from src.resources.responses import JSONResponse
+from src.scheduler.scheduler import deadline_scheduler
+from src.resources.config import (
+	TODO_BATCH_MAX_SIZE,
+	TODO_SYNC_MAX_SIZE,
+	CHANGE_FEED_TICKET_TTL_SECONDS,
+)
+from src.resources.models import (
+	User,
+	ToDo,
+	ToDoCreate,
+	ToDoUpdate,
+	ToDoBatchUpdate,
+	ToDoFilter,
+	ToDoTombstone,
+)
+from src.resources.functions import (
+	build_todo,
+	apply_todo_update,
+	format_todo_response,
+	map_todo_list,
+	apply_todo_filters,
+	split_page,
+	next_cursor,
+	page_links,
+	get_narrowing_filters,
+	total_from_counters,
+	get_cached_total,
+	count_all_todos,
+	record_todo_changes,
+	select_todo_rows,
+	stream_todo_export,
+	build_etag,
+	is_not_modified,
+	not_modified_response,
+	validator_headers,
+	decode_sync_watermark,
+	encode_sync_watermark,
+)
+from src.resources.dependencies import (
+	SessionDep,
+	ReadSessionDep,
+	UserAccessDep,
+	ReadUserAccessDep,
+	ToDoAccessDep,
+	ReadToDoAccessDep,
+	FeedAccessDep,
+	get_current_active_user,
+)
 
 
 router = APIRouter()
@@ -15,75 +68,52 @@ router = APIRouter()
 @router.post("/users/{user_id}/todos", response_model=dict[str, Any])
 async def create_todo(
 	user_id: Annotated[int, Path(gt=0)],
-	current_user: Annotated[User, Depends(get_current_active_user)],
+	access: UserAccessDep,
 	session: SessionDep,
 	todo: ToDoCreate
 ) -> JSONResponse:
 
-	if not current_user.is_admin and current_user.id != user_id:
-		raise HTTPException(
-			status_code=status.HTTP_403_FORBIDDEN,
-			detail="Given user does not have the necessary rights for this operation!"
-		)
-
 	ToDoCreate.model_validate(todo)
 
-	user_db: User | None = session.get(User, user_id)
-	if not user_db:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
-		)
+	user_db: User = access.user
 
-	new_reminder_datetime: datetime | None = None
-	new_expiration_datetime: datetime | None = None
-
-	try:
-		if todo.reminder_datetime:
-			new_reminder_datetime = datetime.fromisoformat(todo.reminder_datetime)
-		if todo.expiration_datetime:
-			new_expiration_datetime = datetime.fromisoformat(todo.expiration_datetime)
-
-		if new_reminder_datetime and new_expiration_datetime and new_reminder_datetime > new_expiration_datetime:
-			raise HTTPException(
-				status_code=status.HTTP_400_BAD_REQUEST,
-				detail="Reminder datetime cannot be after expiration datetime."
-			)
-
-	except ValueError as e:
-		raise HTTPException(
-			status_code=status.HTTP_400_BAD_REQUEST,
-			detail=f"Invalid date format: {str(e)}. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SS)."
-		)
-
-	new_todo: ToDo = ToDo(
-		user_id=user_db.id,
-		description=todo.description,
-		done=todo.done,
-		is_favorite=todo.is_favorite,
-		reminder_datetime=new_reminder_datetime if todo.reminder_datetime else None,
-		expiration_datetime=new_expiration_datetime
+	new_todo: ToDo = build_todo(user_db.id, todo)
+	new_todo.change_seq = await record_todo_changes(
+		session,
+		user_db.id,
+		changes=1,
+		todos=1,
+		done=int(new_todo.done),
+		favorites=int(new_todo.is_favorite)
 	)
 	session.add(new_todo)
-	session.commit()
-	session.refresh(new_todo)
+	await session.commit()
+	await session.refresh(new_todo)
+	deadline_scheduler.track(new_todo)
+	await response_cache.invalidate("todos")
+
+	todo_response: dict[str, Any] = format_todo_response(new_todo)
+	await publish_change("todo.created", user_id=user_db.id, todo=todo_response)
 
 	return JSONResponse(
 		status_code=status.HTTP_201_CREATED,
 		content={
 			"status": "Success",
 			"message": "To-do created successfully!",
-			"todo": format_todo_response(new_todo)
+			"todo": todo_response
 		}
 	)
 
 
 @router.get("/todos", response_model=dict[str, Any])
 async def get_todos(
+	request: Request,
 	current_user: Annotated[User, Depends(get_current_active_user)],
-	session: SessionDep,
+	session: ReadSessionDep,
+	filters: Annotated[ToDoFilter, Depends()],
 	offset: Annotated[int, Query(ge=0)] = 0,
-	limit: Annotated[int, Query(ge=1)] = 10
+	limit: Annotated[int, Query(ge=1)] = 10,
+	after: Annotated[str | None, Query()] = None
 ) -> Response | JSONResponse:
 
 	if not current_user.is_admin:
@@ -92,92 +122,124 @@ async def get_todos(
 			detail="Given user does not have the necessary rights for this operation!"
 		)
 
-	todos: Sequence[ToDo] = session.exec(
-		select(ToDo).offset(offset).limit(limit)
-	).all()
+	cache_key: str = await response_cache.key("todos", current_user.id, request)
+	cached_body: bytes | None = await response_cache.get(cache_key)
+	if cached_body is not None:
+		return Response(content=cached_body, media_type="application/json")
+
+	query = apply_todo_filters(select_todo_rows(), filters, after).limit(limit + 1)
+	if after is None:
+		query = query.offset(offset)
+
+	todos, has_more = split_page((await session.execute(query)).all(), limit)
 	if not todos:
 		return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-	return JSONResponse(
+	cursor: str | None = next_cursor(todos, has_more) if filters.sort in ("id", "-id") else None
+	total: int | None = (
+		None if get_narrowing_filters(filters)
+		else await get_cached_total(session, "todos", count_all_todos())
+	)
+
+	response: JSONResponse = JSONResponse(
 		status_code=status.HTTP_200_OK,
 		content={
 			"status": "Success",
 			"message": "To-dos retrieved successfully!",
 			"todos": map_todo_list(todos),
+			"total": total,
+			"has_more": has_more,
+			"next_cursor": cursor,
+			"links": page_links(request, offset, limit, after, cursor, has_more),
 		}
 	)
+	await response_cache.set(cache_key, response.body)
+
+	return response
 
 
 @router.get("/users/{user_id}/todos", response_model=dict[str, Any])
 async def get_user_todos(
+	request: Request,
 	user_id: Annotated[int, Path(gt=0)],
-	current_user: Annotated[User, Depends(get_current_active_user)],
-	session: SessionDep,
+	access: ReadUserAccessDep,
+	session: ReadSessionDep,
+	filters: Annotated[ToDoFilter, Depends()],
 	offset: Annotated[int, Query(ge=0)] = 0,
-	limit: Annotated[int, Query(ge=1)] = 10
+	limit: Annotated[int, Query(ge=1)] = 10,
+	after: Annotated[str | None, Query()] = None
 ) -> Response | JSONResponse:
 
-	if not current_user.is_admin and current_user.id != user_id:
-		raise HTTPException(
-			status_code=status.HTTP_403_FORBIDDEN,
-			detail="Given user does not have the necessary rights for this operation!"
-		)
-
-	user: User | None = session.get(User, user_id)
-	if not user:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
-		)
-
-	if not user.todos:
+	user: User = access.user
+
+	# Every create, patch and delete of a todo of the user takes a change
+	# sequence number; the query string scopes the tag to the page. A delete
+	# leaves no row behind, so its tombstone dates it for Last-Modified.
+	last_written, last_deleted = (await session.execute(select(
+		select(func.max(ToDo.write_datetime))
+		.where(ToDo.user_id == user_id)
+		.scalar_subquery(),
+		select(func.max(ToDoTombstone.deleted_datetime))
+		.where(ToDoTombstone.user_id == user_id)
+		.scalar_subquery(),
+	))).one()
+	last_modified: datetime | None = max(
+		(value for value in (last_written, last_deleted) if value is not None),
+		default=None
+	)
+	etag: str = build_etag("todos", user_id, user.todo_change_seq, request.url.query)
+	if is_not_modified(request, etag, last_modified):
+		return not_modified_response(etag, last_modified)
+
+	query = apply_todo_filters(
+		select_todo_rows().where(ToDo.user_id == user_id),
+		filters,
+		after
+	).limit(limit + 1)
+	if after is None:
+		query = query.offset(offset)
+
+	user_todos, has_more = split_page((await session.execute(query)).all(), limit)
+	if not user_todos:
 		return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-	todos: list[dict[str, Any]] = map_todo_list(user.todos)
-	todos = todos[offset:offset + limit]
+	todos: list[dict[str, Any]] = map_todo_list(user_todos)
+	cursor: str | None = (
+		next_cursor(user_todos, has_more) if filters.sort in ("id", "-id") else None
+	)
 
 	return JSONResponse(
 		status_code=status.HTTP_200_OK,
+		headers=validator_headers(etag, last_modified),
 		content={
 			"status": "Success",
 			"message": "To-dos retrieved successfully!",
 			"todos": todos,
+			"total": total_from_counters(user, filters),
+			"has_more": has_more,
+			"next_cursor": cursor,
+			"links": page_links(request, offset, limit, after, cursor, has_more),
 		}
 	)
 
 
 @router.get("/users/{user_id}/todos/{todo_id}", response_model=dict[str, Any])
 async def get_todo(
+	request: Request,
 	user_id: Annotated[int, Path(gt=0)],
 	todo_id: Annotated[int, Path(gt=0)],
-	current_user: Annotated[User, Depends(get_current_active_user)],
-	session: SessionDep
-) -> JSONResponse:
+	access: ReadToDoAccessDep
+) -> Response | JSONResponse:
 
-	if not current_user.is_admin and current_user.id != user_id:
-		raise HTTPException(
-			status_code=status.HTTP_403_FORBIDDEN,
-			detail="Given user does not have the necessary rights for this operation!"
-		)
+	todo: ToDo = access.todo
 
-	user: User | None = session.get(User, user_id)
-	if not user:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
-		)
-
-	todo: ToDo | None = session.exec(select(ToDo). \
-		where(ToDo.id == todo_id).where(ToDo.user_id == user_id)
-	).first()
-	if not todo:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"To-do with id {todo_id} for user with id {user_id} not found!"
-		)
+	etag: str = build_etag("todo", todo.id, todo.write_datetime)
+	if is_not_modified(request, etag, todo.write_datetime):
+		return not_modified_response(etag, todo.write_datetime)
 
 	return JSONResponse(
 		status_code=status.HTTP_200_OK,
+		headers=validator_headers(etag, todo.write_datetime),
 		content={
 			"status": "Success",
 			"message": "To-do retrieved successfully!",
@@ -191,64 +253,41 @@ async def patch_todo(
 	user_id: Annotated[int, Path(gt=0)],
 	todo_id: Annotated[int, Path(gt=0)],
 	session: SessionDep,
-	current_user: Annotated[User, Depends(get_current_active_user)],
+	access: ToDoAccessDep,
 	todo: Annotated[ToDoUpdate, Body()]
 ) -> JSONResponse:
 
-	if not current_user.is_admin and current_user.id != user_id:
-		raise HTTPException(
-			status_code=status.HTTP_403_FORBIDDEN,
-			detail="Given user does not have the necessary rights for this operation!"
-		)
-
-	user: User | None = session.get(User, user_id)
-	if not user:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
-		)
-
-	todo_db: ToDo | None = session.exec(select(ToDo). \
-		where(ToDo.id == todo_id).where(ToDo.user_id == user_id)
-	).first()
-	if not todo_db:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"To-do with id {todo_id} for user with id {user_id} not found!"
-		)
+	todo_db: ToDo = access.todo
 
 	ToDoUpdate.model_validate(todo)
 
-	change_flag: bool = False
-	if todo.description and todo.description != todo_db.description:
-		change_flag = True
-		todo_db.description = todo.description
-	if todo.done and todo.done != todo_db.done:
-		change_flag = True
-		todo_db.done = todo.done
-	if todo.is_favorite and todo.is_favorite != todo_db.is_favorite:
-		change_flag = True
-		todo_db.is_favorite = todo.is_favorite
-	if todo.reminder_datetime and todo.reminder_datetime != todo_db.reminder_datetime:
-		change_flag = True
-		todo_db.reminder_datetime = datetime.fromisoformat(todo.reminder_datetime)
-	if todo.expiration_datetime and todo.expiration_datetime != todo_db.expiration_datetime:
-		change_flag = True
-		todo_db.expiration_datetime = datetime.fromisoformat(todo.expiration_datetime)
-
-	if change_flag:
-		todo_db.write_datetime = datetime.now()
+	was_done, was_favorite = todo_db.done, todo_db.is_favorite
+	# Not flushed before the sequence number is stamped: one UPDATE per row.
+	with session.no_autoflush:
+		if apply_todo_update(todo_db, todo):
+			todo_db.change_seq = await record_todo_changes(
+				session,
+				user_id,
+				changes=1,
+				done=todo_db.done - was_done,
+				favorites=todo_db.is_favorite - was_favorite
+			)
 
 	session.add(todo_db)
-	session.commit()
-	session.refresh(todo_db)
+	await session.commit()
+	await session.refresh(todo_db)
+	deadline_scheduler.track(todo_db)
+	await response_cache.invalidate("todos")
+
+	todo_response: dict[str, Any] = format_todo_response(todo_db)
+	await publish_change("todo.updated", user_id=user_id, todo=todo_response)
 
 	return JSONResponse(
 		status_code=status.HTTP_201_CREATED,
 		content={
 			"status": "Success",
 			"message": "To-do patched successfully!",
-			"todo": format_todo_response(todo_db)
+			"todo": todo_response
 		}
 	)
 
@@ -257,39 +296,376 @@ async def patch_todo(
 async def delete_todo(
 	user_id: Annotated[int, Path(gt=0)],
 	todo_id: Annotated[int, Path(gt=0)],
-	current_user: Annotated[User, Depends(get_current_active_user)],
+	access: ToDoAccessDep,
 	session: SessionDep
 ) -> JSONResponse:
 
-	if not current_user.is_admin and current_user.id != user_id:
-		raise HTTPException(
-			status_code=status.HTTP_403_FORBIDDEN,
-			detail="Given user does not have the necessary rights for this operation!"
+	todo: ToDo = access.todo
+
+	change_seq: int = await record_todo_changes(
+		session,
+		user_id,
+		changes=1,
+		todos=-1,
+		done=-int(todo.done),
+		favorites=-int(todo.is_favorite)
+	)
+	await session.delete(todo)
+	session.add(ToDoTombstone(todo_id=todo_id, user_id=user_id, change_seq=change_seq))
+	await session.commit()
+	deadline_scheduler.forget(todo_id)
+	await response_cache.invalidate("todos")
+	await publish_change("todo.deleted", user_id=user_id, todo_id=todo_id)
+
+	return JSONResponse(
+		status_code=status.HTTP_200_OK,
+		content={
+			"status": "Success",
+			"message": "To-do deleted successfully!"
+		}
+	)
+
+
+@router.post("/users/{user_id}/todos:batch", response_model=dict[str, Any])
+async def create_todos_batch(
+	user_id: Annotated[int, Path(gt=0)],
+	access: UserAccessDep,
+	session: SessionDep,
+	todos: Annotated[list[ToDoCreate], Body(min_length=1, max_length=TODO_BATCH_MAX_SIZE)]
+) -> JSONResponse:
+
+	results: list[dict[str, Any]] = []
+	new_todos: list[tuple[int, ToDo]] = []
+	for index, todo in enumerate(todos):
+		try:
+			new_todos.append((index, build_todo(user_id, todo)))
+		except HTTPException as e:
+			results.append({"index": index, "status": "Failed", "message": e.detail})
+
+	if new_todos:
+		first_seq: int = await record_todo_changes(
+			session,
+			user_id,
+			changes=len(new_todos),
+			todos=len(new_todos),
+			done=sum(new_todo.done for _, new_todo in new_todos),
+			favorites=sum(new_todo.is_favorite for _, new_todo in new_todos)
 		)
+		for offset, (_, new_todo) in enumerate(new_todos):
+			new_todo.change_seq = first_seq + offset
+
+	# One transaction for the whole batch; the unit of work flushes the rows
+	# as a single multi-row INSERT.
+	session.add_all([new_todo for _, new_todo in new_todos])
+	await session.commit()
+	for _, new_todo in new_todos:
+		deadline_scheduler.track(new_todo)
+	await response_cache.invalidate("todos")
+
+	todo_responses: list[dict[str, Any]] = [format_todo_response(new_todo) for _, new_todo in new_todos]
+	await publish_changes("todo.created", [
+		{"user_id": user_id, "todo": todo_response} for todo_response in todo_responses
+	])
+
+	results.extend(
+		{"index": index, "status": "Success", "todo": todo_response}
+		for (index, _), todo_response in zip(new_todos, todo_responses)
+	)
+	results.sort(key=lambda result: result["index"])
 
-	user: User | None = session.get(User, user_id)
-	if not user:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
+	return JSONResponse(
+		status_code=status.HTTP_201_CREATED,
+		content={
+			"status": "Success",
+			"message": f"{len(new_todos)} of {len(todos)} to-dos created successfully!",
+			"results": results
+		}
+	)
+
+
+@router.patch("/users/{user_id}/todos:batch", response_model=dict[str, Any])
+async def patch_todos_batch(
+	user_id: Annotated[int, Path(gt=0)],
+	access: UserAccessDep,
+	session: SessionDep,
+	todos: Annotated[list[ToDoBatchUpdate], Body(min_length=1, max_length=TODO_BATCH_MAX_SIZE)]
+) -> JSONResponse:
+
+	todos_db: dict[int, ToDo] = {
+		todo_db.id: todo_db
+		for todo_db in (await session.exec(
+			select(ToDo)
+			.where(ToDo.user_id == user_id)
+			.where(ToDo.id.in_({todo.id for todo in todos}))
+		)).all()
+	}
+
+	results: list[dict[str, Any]] = []
+	patched_todos: list[tuple[int, ToDo]] = []
+	changed_todos: list[ToDo] = []
+	done_delta: int = 0
+	favorite_delta: int = 0
+	for index, todo in enumerate(todos):
+		todo_db: ToDo | None = todos_db.get(todo.id)
+		if not todo_db:
+			results.append({
+				"index": index,
+				"status": "Failed",
+				"message": f"To-do with id {todo.id} for user with id {user_id} not found!"
+			})
+			continue
+
+		was_done, was_favorite = todo_db.done, todo_db.is_favorite
+		try:
+			if apply_todo_update(todo_db, todo):
+				changed_todos.append(todo_db)
+		except HTTPException as e:
+			results.append({"index": index, "status": "Failed", "message": e.detail})
+			continue
+
+		done_delta += todo_db.done - was_done
+		favorite_delta += todo_db.is_favorite - was_favorite
+		patched_todos.append((index, todo_db))
+
+	if changed_todos:
+		with session.no_autoflush:
+			first_seq: int = await record_todo_changes(
+				session,
+				user_id,
+				changes=len(changed_todos),
+				done=done_delta,
+				favorites=favorite_delta
+			)
+		for offset, todo_db in enumerate(changed_todos):
+			todo_db.change_seq = first_seq + offset
+	await session.commit()
+	for _, todo_db in patched_todos:
+		deadline_scheduler.track(todo_db)
+	await response_cache.invalidate("todos")
+
+	todo_responses: list[dict[str, Any]] = [format_todo_response(todo_db) for _, todo_db in patched_todos]
+	await publish_changes("todo.updated", [
+		{"user_id": user_id, "todo": todo_response} for todo_response in todo_responses
+	])
+
+	results.extend(
+		{"index": index, "status": "Success", "todo": todo_response}
+		for (index, _), todo_response in zip(patched_todos, todo_responses)
+	)
+	results.sort(key=lambda result: result["index"])
+
+	return JSONResponse(
+		status_code=status.HTTP_201_CREATED,
+		content={
+			"status": "Success",
+			"message": f"{len(patched_todos)} of {len(todos)} to-dos patched successfully!",
+			"results": results
+		}
+	)
+
+
+@router.delete("/users/{user_id}/todos:batch", response_model=dict[str, Any])
+async def delete_todos_batch(
+	user_id: Annotated[int, Path(gt=0)],
+	access: UserAccessDep,
+	session: SessionDep,
+	todo_ids: Annotated[list[int], Body(min_length=1, max_length=TODO_BATCH_MAX_SIZE)]
+) -> JSONResponse:
+
+	deleted_todos: Sequence[Row] = (await session.execute(
+		delete(ToDo)
+		.where(ToDo.user_id == user_id)
+		.where(ToDo.id.in_(set(todo_ids)))
+		.returning(ToDo.id, ToDo.done, ToDo.is_favorite)
+	)).all()
+	deleted_ids: set[int] = {deleted_todo.id for deleted_todo in deleted_todos}
+	if deleted_todos:
+		first_seq: int = await record_todo_changes(
+			session,
+			user_id,
+			changes=len(deleted_todos),
+			todos=-len(deleted_todos),
+			done=-sum(deleted_todo.done for deleted_todo in deleted_todos),
+			favorites=-sum(deleted_todo.is_favorite for deleted_todo in deleted_todos)
 		)
+		session.add_all([
+			ToDoTombstone(todo_id=todo_id, user_id=user_id, change_seq=first_seq + offset)
+			for offset, todo_id in enumerate(sorted(deleted_ids))
+		])
+	await session.commit()
+	for todo_id in deleted_ids:
+		deadline_scheduler.forget(todo_id)
+	await response_cache.invalidate("todos")
+	await publish_changes("todo.deleted", [
+		{"user_id": user_id, "todo_id": todo_id} for todo_id in sorted(deleted_ids)
+	])
+
+	results: list[dict[str, Any]] = [
+		{"index": index, "id": todo_id, "status": "Success"}
+		if todo_id in deleted_ids else
+		{
+			"index": index,
+			"id": todo_id,
+			"status": "Failed",
+			"message": f"To-do with id {todo_id} for user with id {user_id} not found!"
+		}
+		for index, todo_id in enumerate(todo_ids)
+	]
+
+	return JSONResponse(
+		status_code=status.HTTP_200_OK,
+		content={
+			"status": "Success",
+			"message": f"{len(deleted_ids)} of {len(set(todo_ids))} to-dos deleted successfully!",
+			"results": results
+		}
+	)
+
+
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+	"ndjson": "application/x-ndjson",
+	"csv": "text/csv",
+}
 
-	todo: ToDo | None = session.exec(select(ToDo). \
-		where(ToDo.id == todo_id).where(ToDo.user_id == user_id)
-	).first()
-	if not todo:
+
+@router.get("/todos:export", response_class=StreamingResponse)
+async def export_todos(
+	current_user: Annotated[User, Depends(get_current_active_user)],
+	export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson"
+) -> StreamingResponse:
+
+	if not current_user.is_admin:
 		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"To-do with id {todo_id} for user with id {user_id} not found!"
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="Given user does not have the necessary rights for this operation!"
 		)
 
-	session.delete(todo)
-	session.commit()
+	return StreamingResponse(
+		stream_todo_export(select_todo_rows(), export_format),
+		media_type=EXPORT_MEDIA_TYPES[export_format],
+		headers={"Content-Disposition": f'attachment; filename="todos.{export_format}"'}
+	)
+
+
+@router.get("/users/{user_id}/todos:export", response_class=StreamingResponse)
+async def export_user_todos(
+	user_id: Annotated[int, Path(gt=0)],
+	access: ReadUserAccessDep,
+	export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson"
+) -> StreamingResponse:
+
+	return StreamingResponse(
+		stream_todo_export(
+			select_todo_rows().where(ToDo.user_id == user_id),
+			export_format
+		),
+		media_type=EXPORT_MEDIA_TYPES[export_format],
+		headers={
+			"Content-Disposition": f'attachment; filename="user_{user_id}_todos.{export_format}"'
+		}
+	)
+
+
+@router.get("/users/{user_id}/todos:sync", response_model=dict[str, Any])
+async def sync_user_todos(
+	user_id: Annotated[int, Path(gt=0)],
+	access: UserAccessDep,
+	session: SessionDep,
+	watermark: Annotated[str | None, Query()] = None,
+	limit: Annotated[int, Query(ge=1, le=TODO_SYNC_MAX_SIZE)] = 100
+) -> JSONResponse:
+
+	change_seq: int = decode_sync_watermark(watermark, access.user.todo_sync_floor_seq)
+
+	# Both change streams are read in sequence order from their (user_id,
+	# change_seq) indexes, so a sync costs O(changes) regardless of the size
+	# of the account. Each fetches a full page; the merge keeps the first.
+	changed_todos: Sequence[Row] = (await session.execute(
+		select_todo_rows()
+		.add_columns(ToDo.change_seq)
+		.order_by(None)
+		.where(ToDo.user_id == user_id)
+		.where(ToDo.change_seq > change_seq)
+		.order_by(ToDo.change_seq)
+		.limit(limit + 1)
+	)).all()
+	tombstones: Sequence[Row] = (await session.execute(
+		select(ToDoTombstone.todo_id, ToDoTombstone.change_seq)
+		.where(ToDoTombstone.user_id == user_id)
+		.where(ToDoTombstone.change_seq > change_seq)
+		.order_by(ToDoTombstone.change_seq)
+		.limit(limit + 1)
+	)).all()
+
+	changes: list[Row] = sorted(
+		[*changed_todos, *tombstones],
+		key=attrgetter("change_seq")
+	)
+	page: list[Row] = changes[:limit]
+	if page:
+		change_seq = page[-1].change_seq
+
+	page_todos: list[Row] = [row for row in page if "id" in row._fields]
+	# A deleted id that SQLite handed out again is alive in this same page.
+	page_todo_ids: set[int] = {row.id for row in page_todos}
 
 	return JSONResponse(
 		status_code=status.HTTP_200_OK,
 		content={
 			"status": "Success",
-			"message": "To-do deleted successfully!"
+			"message": "To-do changes retrieved successfully!",
+			"todos": map_todo_list(page_todos),
+			"deleted": [
+				row.todo_id for row in page
+				if "todo_id" in row._fields and row.todo_id not in page_todo_ids
+			],
+			"watermark": encode_sync_watermark(change_seq),
+			"has_more": len(changes) > limit,
 		}
 	)
+
+
+# Browsers trade their token for a short-lived, single-use ticket and open
+# the feed with ?ticket=, which keeps the token itself out of URLs and logs.
+@router.post("/users/{user_id}/todos:feed-ticket", response_model=dict[str, Any])
+async def create_feed_ticket(
+	user_id: Annotated[int, Path(gt=0)],
+	access: ReadUserAccessDep,
+	token: Annotated[str, Depends(oauth2_scheme)]
+) -> JSONResponse:
+
+	return JSONResponse(
+		status_code=status.HTTP_201_CREATED,
+		content={
+			"status": "Success",
+			"message": "Feed ticket created successfully!",
+			"ticket": await issue_feed_ticket(token, user_id),
+			"expires_in": CHANGE_FEED_TICKET_TTL_SECONDS,
+		}
+	)
+
+
+# Live counterpart of :sync. Clients sync first, then follow the feed; on a
+# feed.resync event (they fell behind) they sync again from their watermark.
+@router.get("/users/{user_id}/todos:feed", response_class=StreamingResponse)
+async def stream_user_todo_changes(
+	user_id: Annotated[int, Path(gt=0)],
+	access: FeedAccessDep
+) -> StreamingResponse:
+
+	return StreamingResponse(
+		stream_change_events(user_id, access.principal.id, access.expires_at),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	)
+
+
+@router.websocket("/users/{user_id}/todos:feed")
+async def follow_user_todo_changes(
+	websocket: WebSocket,
+	user_id: Annotated[int, Path(gt=0)],
+	access: FeedAccessDep
+) -> None:
+
+	await websocket.accept()
+	await forward_change_events(websocket, user_id, access.principal.id, access.expires_at)
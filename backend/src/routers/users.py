@@ -1,14 +1,44 @@
+from datetime import datetime, timedelta
+from typing import Any, Annotated
 from sqlmodel import select
-from datetime import timedelta
-from typing import Any, Annotated, Sequence
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi import APIRouter, Path, Query, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Path, Query, Body, Depends, HTTPException, Request, status
 
+from src.resources.cache import principal_cache, response_cache
+from src.resources.responses import JSONResponse
 from src.resources.config import ACCESS_TOKEN_EXPIRE_MINUTES
-from src.resources.models import User, UserPublic, UserCreate, UserUpdate
-from src.resources.dependencies import SessionDep, get_current_active_user
-from src.resources.functions import encrypt, create_access_token, authenticate_user
+from src.jobs.events import publish_change
+from src.jobs.user_deletion import user_purger
+from src.feed.hub import change_hub
+from src.resources.models import User, UserCreate, UserUpdate, UserStats, UserDeletionJob
+from src.resources.dependencies import (
+	SessionDep,
+	ReadSessionDep,
+	UserAccessDep,
+	ReadUserAccessDep,
+	get_current_user,
+	get_current_active_user,
+)
+from src.resources.credentials import hash_password
+from src.resources.functions import (
+	create_access_token,
+	authenticate_user,
+	decode_cursor,
+	split_page,
+	next_cursor,
+	page_links,
+	get_cached_total,
+	count_all_users,
+	format_user_response,
+	format_user_deletion_job_response,
+	map_user_list,
+	select_user_public_rows,
+	build_etag,
+	is_not_modified,
+	not_modified_response,
+	validator_headers,
+)
 
 
 router = APIRouter()
@@ -18,19 +48,23 @@ router = APIRouter()
 async def create_user(user: UserCreate, session: SessionDep) -> JSONResponse:
 	user_db: User = User.model_validate(user)
 
-	encrypted_password: bytes = encrypt(user.password)
-	user_db.password = encrypted_password
+	hashed_password: bytes = await hash_password(user.password)
+	user_db.password = hashed_password
 
 	session.add(user_db)
-	session.commit()
-	session.refresh(user_db)
+	await session.commit()
+	await session.refresh(user_db)
+	await response_cache.invalidate("users")
+
+	user_response: dict[str, Any] = format_user_response(user_db)
+	await publish_change("user.created", user=user_response)
 
 	return JSONResponse(
 		status_code=status.HTTP_201_CREATED,
 		content={
 			"status": "Success",
 			"message": "User created successfully!",
-			"user": UserPublic(**user_db.model_dump()).model_dump()
+			"user": user_response
 		}
 	)
 
@@ -41,7 +75,7 @@ async def auth_user(
 	form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> JSONResponse:
 
-	user: User | bool = authenticate_user(
+	user: User | bool = await authenticate_user(
 		session,
 		form_data.username,
 		form_data.password
@@ -72,10 +106,12 @@ async def auth_user(
 
 @router.get("/", response_model=dict[str, Any])
 async def get_users(
+	request: Request,
 	current_user: Annotated[User, Depends(get_current_active_user)],
-	session: SessionDep,
+	session: ReadSessionDep,
 	offset: Annotated[int, Query(ge=0)] = 0,
-	limit: Annotated[int, Query(ge=1)] = 10
+	limit: Annotated[int, Query(ge=1)] = 10,
+	after: Annotated[str | None, Query()] = None
 ) -> Response | JSONResponse:
 
 	if not current_user.is_admin:
@@ -84,52 +120,81 @@ async def get_users(
 			detail="Given user does not have the necessary rights for this operation!"
 		)
 
-	users: Sequence[User] = session.exec(
-		select(User).offset(offset).limit(limit)
-	).all()
-	users_list = list(
-		map(
-			lambda user: UserPublic(**user.model_dump()).model_dump(),
-			users
-		)
-	)
+	cache_key: str = await response_cache.key("users", current_user.id, request)
+	cached_body: bytes | None = await response_cache.get(cache_key)
+	if cached_body is not None:
+		return Response(content=cached_body, media_type="application/json")
 
-	return JSONResponse(
+	query = select_user_public_rows().limit(limit + 1)
+	if after is not None:
+		query = query.where(User.id > decode_cursor(after))
+	else:
+		query = query.offset(offset)
+
+	users, has_more = split_page((await session.execute(query)).all(), limit)
+	cursor: str | None = next_cursor(users, has_more)
+
+	response: JSONResponse = JSONResponse(
 		status_code=status.HTTP_200_OK,
 		content={
 			"status": "Success",
 			"message": "Items retrieved successfully!",
-			"items": users_list,
+			"items": map_user_list(users),
+			"total": await get_cached_total(session, "users", count_all_users()),
+			"has_more": has_more,
+			"next_cursor": cursor,
+			"links": page_links(request, offset, limit, after, cursor, has_more),
 		}
 	)
+	await response_cache.set(cache_key, response.body)
+
+	return response
 
 
 @router.get("/{user_id}", response_model=dict[str, Any])
 async def get_user(
+	request: Request,
 	user_id: Annotated[int, Path(gt=0)],
-	current_user: Annotated[User, Depends(get_current_active_user)],
-	session: SessionDep
-) -> JSONResponse:
+	access: ReadUserAccessDep
+) -> Response | JSONResponse:
 
-	if not current_user.is_admin and current_user.id != user_id:
-		raise HTTPException(
-			status_code=status.HTTP_403_FORBIDDEN,
-			detail="Given user does not have the necessary rights for this operation!"
-		)
+	user_db: User = access.user
 
-	user_db: User | None = session.get(User, user_id)
-	if not user_db:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
-		)
+	etag: str = build_etag("user", user_db.id, user_db.write_datetime)
+	if is_not_modified(request, etag, user_db.write_datetime):
+		return not_modified_response(etag, user_db.write_datetime)
 
 	return JSONResponse(
 		status_code=status.HTTP_200_OK,
+		headers=validator_headers(etag, user_db.write_datetime),
 		content={
 			"status": "Success",
 			"message": "User retrieved successfully!",
-			"user": UserPublic(**user_db.model_dump()).model_dump()
+			"user": format_user_response(user_db)
+		}
+	)
+
+
+@router.get("/{user_id}/stats", response_model=dict[str, Any])
+async def get_user_stats(
+	user_id: Annotated[int, Path(gt=0)],
+	access: ReadUserAccessDep
+) -> JSONResponse:
+
+	user: User = access.user
+	stats: UserStats = UserStats(
+		todo_count=user.todo_count,
+		done_count=user.todo_done_count,
+		pending_count=user.todo_count - user.todo_done_count,
+		favorite_count=user.todo_favorite_count,
+	)
+
+	return JSONResponse(
+		status_code=status.HTTP_200_OK,
+		content={
+			"status": "Success",
+			"message": "User stats retrieved successfully!",
+			"stats": stats.model_dump()
 		}
 	)
 
@@ -137,23 +202,12 @@ async def get_user(
 @router.patch("/{user_id}", response_model=dict[str, Any])
 async def patch_user(
 	user_id: Annotated[int, Path(gt=0)],
-	current_user: Annotated[User, Depends(get_current_active_user)],
+	access: UserAccessDep,
 	user: Annotated[UserUpdate, Body()],
 	session: SessionDep
 ) -> JSONResponse:
 
-	if not current_user.is_admin and current_user.id != user_id:
-		raise HTTPException(
-			status_code=status.HTTP_403_FORBIDDEN,
-			detail="Given user does not have the necessary rights for this operation!"
-		)
-
-	user_db: User | None = session.get(User, user_id)
-	if not user_db:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
-		)
+	user_db: User = access.user
 
 	user_data: dict[str, Any] = user.model_dump(exclude_unset=True)
 	if not user_data:
@@ -162,17 +216,27 @@ async def patch_user(
 			detail="No data provided to update user!"
 		)
 
+	if user_data.get("password") is not None:
+		user_data["password"] = await hash_password(user_data["password"])
+
+	previous: tuple[str, bool, bool] = (user_db.username, user_db.disabled, user_db.is_admin)
 	user_db.sqlmodel_update(user_data)
+	user_db.write_datetime = datetime.now()
 	session.add(user_db)
-	session.commit()
-	session.refresh(user_db)
+	await session.commit()
+	await session.refresh(user_db)
+	await principal_cache.invalidate(previous[0], user_db.username)
+	await response_cache.invalidate("users")
+	# Open change feeds were authorized with the old account state.
+	if previous != (user_db.username, user_db.disabled, user_db.is_admin):
+		await change_hub.close_user(user_id)
 
 	return JSONResponse(
 		status_code=status.HTTP_200_OK,
 		content={
 			"status": "Success",
 			"message": "User patched successfully!",
-			"user": UserPublic(**user_db.model_dump()).model_dump()
+			"user": format_user_response(user_db)
 		}
 	)
 
@@ -180,30 +244,80 @@ async def patch_user(
 @router.delete("/{user_id}", response_model=dict[str, Any])
 async def delete_user(
 	user_id: Annotated[int, Path(gt=0)],
-	current_user: Annotated[User, Depends(get_current_active_user)],
+	access: UserAccessDep,
 	session: SessionDep
 ) -> JSONResponse:
 
+	user: User = access.user
+
+	# The user is disabled at once and removed by a background purge, so a
+	# user with many to-dos never holds the write lock for long. Repeated
+	# requests return the job already in progress.
+	job: UserDeletionJob | None = (await session.exec(
+		select(UserDeletionJob)
+		.where(UserDeletionJob.user_id == user_id)
+		.where(UserDeletionJob.status.in_(("pending", "running")))
+	)).first()
+	if job is None:
+		user.disabled = True
+		user.write_datetime = datetime.now()
+		job = UserDeletionJob(user_id=user_id)
+		session.add(user)
+		session.add(job)
+		await session.commit()
+		await session.refresh(job)
+		await principal_cache.invalidate(user.username)
+		await response_cache.invalidate("users")
+		await change_hub.close_user(user_id)
+		user_purger.start(job.id, user_id)
+
+	return JSONResponse(
+		status_code=status.HTTP_202_ACCEPTED,
+		headers={"Location": f"/users/{user_id}/deletion"},
+		content={
+			"status": "Success",
+			"message": "User deletion started!",
+			"job": format_user_deletion_job_response(job)
+		}
+	)
+
+
+# Open to disabled users, since deleting an account disables it first. Once
+# the purge is done the user's own token no longer resolves.
+@router.get("/{user_id}/deletion", response_model=dict[str, Any])
+async def get_user_deletion(
+	user_id: Annotated[int, Path(gt=0)],
+	current_user: Annotated[User, Depends(get_current_user)],
+	session: ReadSessionDep
+) -> JSONResponse:
+
 	if not current_user.is_admin and current_user.id != user_id:
 		raise HTTPException(
 			status_code=status.HTTP_403_FORBIDDEN,
 			detail="Given user does not have the necessary rights for this operation!"
 		)
 
-	user: User | None = session.get(User, user_id)
-	if not user:
+	# SQLite may hand a deleted user's id to a new user: ignore the jobs of
+	# whoever held it before.
+	query = select(UserDeletionJob).where(UserDeletionJob.user_id == user_id)
+	user: User | None = await session.get(User, user_id)
+	if user is not None:
+		query = query.where(UserDeletionJob.creation_datetime >= user.creation_datetime)
+
+	job: UserDeletionJob | None = (await session.exec(
+		query.order_by(UserDeletionJob.id.desc())
+	)).first()
+	if not job:
 		raise HTTPException(
 			status_code=status.HTTP_404_NOT_FOUND,
-			detail=f"User with id {user_id} not found!"
+			detail=f"No deletion job found for user with id {user_id}!"
 		)
 
-	session.delete(user)
-	session.commit()
-
 	return JSONResponse(
 		status_code=status.HTTP_200_OK,
 		content={
 			"status": "Success",
-			"message": "User deleted successfully!"
+			"message": "User deletion job retrieved successfully!",
+			"job": format_user_deletion_job_response(job)
 		}
 	)
@@ -0,0 +1,365 @@
+from time import perf_counter
+from heapq import heappop, heappush
+from logging import Logger, getLogger
+from typing import Any, Literal, Sequence
+from datetime import datetime, timedelta
+from asyncio import CancelledError, Task, create_task, sleep
+
+from sqlalchemy import Row, insert, select, tuple_, update
+
+from src.db.db import async_engine
+from src.resources.models import ToDo, SchedulerState
+from src.scheduler.sinks import DeadlineSink, get_sink
+from src.resources.config import (
+	SCHEDULER_TICK_SECONDS,
+	SCHEDULER_HORIZON_SECONDS,
+	SCHEDULER_LOAD_BATCH_SIZE,
+	SCHEDULER_RESCAN_OVERLAP_SECONDS,
+	SCHEDULER_CATCH_UP_SECONDS,
+	SCHEDULER_STATE_SAVE_SECONDS,
+)
+
+
+logger: Logger = getLogger(__name__)
+
+DeadlineKind = Literal["reminder", "expiration"]
+DEADLINE_COLUMNS: dict[DeadlineKind, Any] = {
+	"reminder": ToDo.reminder_datetime,
+	"expiration": ToDo.expiration_datetime,
+}
+DEADLINE_ROW_COLUMNS: tuple[Any, ...] = (
+	ToDo.id,
+	ToDo.user_id,
+	ToDo.description,
+	ToDo.done,
+	ToDo.reminder_datetime,
+	ToDo.expiration_datetime,
+)
+
+
+###############################################################################
+################################## Scheduler ##################################
+###############################################################################
+# Keeps a min-heap of the deadlines that fall inside [now, window_end]. Each
+# tick pops the due entries and extends the window with a keyset query on the
+# deadline indexes, so its cost depends on the number of due and newly
+# windowed deadlines, never on the size of the todos table.
+#
+# Heap entries are invalidated lazily: `scheduled` holds the current deadline
+# per (kind, todo_id) and popped entries that no longer match it are dropped.
+#
+# track() and forget() only see the writes of this process. Writes made by
+# other workers are picked up by re-reading the to-dos written since the last
+# tick, and due entries are checked against the database before they fire, so
+# a to-do completed, moved or deleted elsewhere is never dispatched stale.
+# Everything due up to `dispatched_until` has been sent; it is saved in
+# scheduler_state so a restart fires the deadlines that passed meanwhile.
+class DeadlineScheduler:
+	def __init__(
+		self,
+		sink: DeadlineSink,
+		tick_seconds: float = SCHEDULER_TICK_SECONDS,
+		horizon_seconds: float = SCHEDULER_HORIZON_SECONDS,
+		batch_size: int = SCHEDULER_LOAD_BATCH_SIZE,
+		rescan_overlap_seconds: float = SCHEDULER_RESCAN_OVERLAP_SECONDS,
+		catch_up_seconds: float = SCHEDULER_CATCH_UP_SECONDS,
+		state_save_seconds: float = SCHEDULER_STATE_SAVE_SECONDS,
+		name: str = "deadline_scheduler"
+	) -> None:
+		self.sink: DeadlineSink = sink
+		self.tick_seconds: float = tick_seconds
+		self.horizon: timedelta = timedelta(seconds=horizon_seconds)
+		self.batch_size: int = batch_size
+		self.rescan_overlap: timedelta = timedelta(seconds=rescan_overlap_seconds)
+		self.catch_up: timedelta = timedelta(seconds=catch_up_seconds)
+		self.state_save: timedelta = timedelta(seconds=state_save_seconds)
+		self.name: str = name
+
+		self.heap: list[tuple[datetime, int, DeadlineKind]] = []
+		self.scheduled: dict[tuple[DeadlineKind, int], tuple[datetime, dict[str, Any]]] = {}
+		self.window_end: datetime = datetime.now()
+		self.dispatched_until: datetime = self.window_end
+		self.rescanned_until: datetime = self.window_end
+		self.saved_until: datetime | None = None
+		self.loaded_until: dict[DeadlineKind, tuple[datetime, int]] = {
+			kind: (self.window_end, 0) for kind in DEADLINE_COLUMNS
+		}
+		self.task: Task | None = None
+
+		self.dispatched: int = 0
+		self.failed: int = 0
+		self.stale: int = 0
+		self.loaded: int = 0
+		self.rescanned: int = 0
+		self.ticks: int = 0
+		self.last_tick_seconds: float = 0.0
+		self.max_tick_seconds: float = 0.0
+		self.total_lag_seconds: float = 0.0
+		self.max_lag_seconds: float = 0.0
+
+	###########################################################################
+	################################ Lifecycle ################################
+	###########################################################################
+	def start(self) -> None:
+		if self.task is None:
+			self.task = create_task(self.run())
+
+	async def stop(self) -> None:
+		if self.task is None:
+			return
+
+		self.task.cancel()
+		try:
+			await self.task
+		except CancelledError:
+			pass
+		self.task = None
+
+	async def run(self) -> None:
+		while True:
+			try:
+				await self.tick()
+			except CancelledError:
+				raise
+			except Exception:
+				logger.exception("Deadline scheduler tick failed")
+			await sleep(self.tick_seconds)
+
+	###########################################################################
+	############################### Write hooks ###############################
+	###########################################################################
+	# Accepts a ToDo or a row of DEADLINE_ROW_COLUMNS.
+	def track(self, todo: ToDo | Row) -> None:
+		for kind in DEADLINE_COLUMNS:
+			due: datetime | None = getattr(todo, f"{kind}_datetime")
+			key: tuple[DeadlineKind, int] = (kind, todo.id)
+
+			# Deadlines past the window are left to the loader; those up to
+			# dispatched_until have been sent already.
+			if (
+				todo.done or due is None
+				or due <= self.dispatched_until or due > self.window_end
+			):
+				self.scheduled.pop(key, None)
+				continue
+
+			self.push(kind, due, {
+				"todo_id": todo.id,
+				"user_id": todo.user_id,
+				"description": todo.description,
+			})
+
+	def forget(self, todo_id: int) -> None:
+		for kind in DEADLINE_COLUMNS:
+			self.scheduled.pop((kind, todo_id), None)
+
+	def push(self, kind: DeadlineKind, due: datetime, payload: dict[str, Any]) -> None:
+		key: tuple[DeadlineKind, int] = (kind, payload["todo_id"])
+		current: tuple[datetime, dict[str, Any]] | None = self.scheduled.get(key)
+
+		self.scheduled[key] = (due, payload)
+		if current is None or current[0] != due:
+			heappush(self.heap, (due, payload["todo_id"], kind))
+
+	###########################################################################
+	################################## Ticks ##################################
+	###########################################################################
+	async def tick(self, now: datetime | None = None) -> None:
+		started: float = perf_counter()
+		now = now or datetime.now()
+
+		if self.saved_until is None:
+			await self.restore(now)
+		await self.extend_window(now + self.horizon)
+		await self.rescan_writes(now)
+
+		dispatched: int = self.dispatched
+		await self.dispatch_due(now)
+		if (
+			self.dispatched != dispatched
+			or self.dispatched_until - self.saved_until >= self.state_save
+		):
+			await self.save()
+
+		self.ticks += 1
+		self.last_tick_seconds = perf_counter() - started
+		self.max_tick_seconds = max(self.max_tick_seconds, self.last_tick_seconds)
+
+	async def extend_window(self, window_end: datetime) -> None:
+		# Publish the new window first so writes racing with the load are
+		# pushed by track(); duplicates collapse on the scheduled key.
+		self.window_end = max(self.window_end, window_end)
+
+		async with async_engine.connect() as connection:
+			for kind, column in DEADLINE_COLUMNS.items():
+				while True:
+					rows: Sequence[Row] = (await connection.execute(
+						select(ToDo.id, ToDo.user_id, ToDo.description, column)
+						.where(tuple_(column, ToDo.id) > tuple_(*self.loaded_until[kind]))
+						.where(column <= self.window_end)
+						.where(ToDo.done == False)  # noqa: E712
+						.order_by(column, ToDo.id)
+						.limit(self.batch_size)
+					)).all()
+
+					for todo_id, user_id, description, due in rows:
+						self.push(kind, due, {
+							"todo_id": todo_id,
+							"user_id": user_id,
+							"description": description,
+						})
+					self.loaded += len(rows)
+
+					if rows:
+						self.loaded_until[kind] = (rows[-1][3], rows[-1][0])
+					if len(rows) < self.batch_size:
+						break
+
+	async def rescan_writes(self, now: datetime) -> None:
+		position: tuple[datetime, int] = (self.rescanned_until - self.rescan_overlap, 0)
+
+		async with async_engine.connect() as connection:
+			while True:
+				rows: Sequence[Row] = (await connection.execute(
+					select(*DEADLINE_ROW_COLUMNS, ToDo.write_datetime)
+					.where(tuple_(ToDo.write_datetime, ToDo.id) > tuple_(*position))
+					.order_by(ToDo.write_datetime, ToDo.id)
+					.limit(self.batch_size)
+				)).all()
+
+				for row in rows:
+					self.track(row)
+				self.rescanned += len(rows)
+
+				if rows:
+					position = (rows[-1].write_datetime, rows[-1].id)
+				if len(rows) < self.batch_size:
+					break
+
+		self.rescanned_until = now
+
+	async def dispatch_due(self, now: datetime) -> None:
+		due_entries: list[tuple[datetime, int, DeadlineKind]] = []
+		while self.heap and self.heap[0][0] <= now:
+			due, todo_id, kind = heappop(self.heap)
+			current: tuple[datetime, dict[str, Any]] | None = self.scheduled.get((kind, todo_id))
+			if current is None or current[0] != due:
+				continue
+
+			del self.scheduled[(kind, todo_id)]
+			due_entries.append((due, todo_id, kind))
+
+		for start in range(0, len(due_entries), self.batch_size):
+			await self.dispatch_batch(due_entries[start:start + self.batch_size], now)
+
+		self.dispatched_until = max(self.dispatched_until, now)
+
+	async def dispatch_batch(
+		self,
+		due_entries: list[tuple[datetime, int, DeadlineKind]],
+		now: datetime
+	) -> None:
+
+		# One query re-reads every due to-do: what fires is the current row.
+		async with async_engine.connect() as connection:
+			todos: dict[int, Row] = {
+				row.id: row
+				for row in (await connection.execute(
+					select(*DEADLINE_ROW_COLUMNS)
+					.where(ToDo.id.in_({todo_id for _, todo_id, _ in due_entries}))
+				)).all()
+			}
+
+		for due, todo_id, kind in due_entries:
+			todo: Row | None = todos.get(todo_id)
+			if todo is None or todo.done or getattr(todo, f"{kind}_datetime") != due:
+				self.stale += 1
+				if todo is not None:
+					self.track(todo)
+				continue
+
+			lag_seconds: float = (now - due).total_seconds()
+			event: dict[str, Any] = {
+				"todo_id": todo.id,
+				"user_id": todo.user_id,
+				"description": todo.description,
+				"kind": kind,
+				"due_datetime": due.isoformat(),
+				"fired_datetime": now.isoformat(),
+			}
+
+			try:
+				await self.sink.send(event)
+			except Exception:
+				self.failed += 1
+				logger.exception("Failed to dispatch %s for to-do %s", kind, todo_id)
+				continue
+
+			self.dispatched += 1
+			self.total_lag_seconds += lag_seconds
+			self.max_lag_seconds = max(self.max_lag_seconds, lag_seconds)
+
+	###########################################################################
+	################################ Progress #################################
+	###########################################################################
+	async def restore(self, now: datetime) -> None:
+		async with async_engine.begin() as connection:
+			saved: datetime | None = (await connection.execute(
+				select(SchedulerState.dispatched_datetime)
+				.where(SchedulerState.name == self.name)
+			)).scalar()
+			if saved is None:
+				await connection.execute(insert(SchedulerState).values(
+					name=self.name,
+					dispatched_datetime=now,
+					write_datetime=datetime.now()
+				))
+
+		# Deadlines missed while stopped fire on the first tick, unless they
+		# are older than the catch-up limit.
+		resume_from: datetime = now if saved is None else max(saved, now - self.catch_up)
+		if resume_from < now:
+			logger.info("Deadline scheduler catching up from %s", resume_from.isoformat())
+
+		# The loader reads the current rows from resume_from on, so writes made
+		# while stopped need no rescan.
+		self.dispatched_until = resume_from
+		self.rescanned_until = now
+		self.saved_until = resume_from
+		self.window_end = max(self.window_end, resume_from)
+		self.loaded_until = {kind: (resume_from, 0) for kind in DEADLINE_COLUMNS}
+
+	async def save(self) -> None:
+		async with async_engine.begin() as connection:
+			await connection.execute(
+				update(SchedulerState)
+				.where(SchedulerState.name == self.name)
+				.values(dispatched_datetime=self.dispatched_until, write_datetime=datetime.now())
+			)
+		self.saved_until = self.dispatched_until
+
+	###########################################################################
+	################################# Metrics #################################
+	###########################################################################
+	def stats(self) -> dict[str, Any]:
+		return {
+			"scheduled": len(self.scheduled),
+			"heap_size": len(self.heap),
+			"window_end": self.window_end.isoformat(),
+			"loaded": self.loaded,
+			"dispatched": self.dispatched,
+			"failed": self.failed,
+			"stale": self.stale,
+			"rescanned": self.rescanned,
+			"dispatched_until": self.dispatched_until.isoformat(),
+			"ticks": self.ticks,
+			"last_tick_seconds": self.last_tick_seconds,
+			"max_tick_seconds": self.max_tick_seconds,
+			"avg_lag_seconds": (
+				self.total_lag_seconds / self.dispatched if self.dispatched else 0.0
+			),
+			"max_lag_seconds": self.max_lag_seconds,
+		}
+
+
+deadline_scheduler: DeadlineScheduler = DeadlineScheduler(sink=get_sink())
@@ -0,0 +1,46 @@
+from logging import Logger, getLogger
+from typing import Any, Protocol
+from httpx import AsyncClient
+
+from src.resources.config import SCHEDULER_SINK, SCHEDULER_WEBHOOK_URL
+
+
+logger: Logger = getLogger(__name__)
+
+
+###############################################################################
+#################################### Sinks ####################################
+###############################################################################
+class DeadlineSink(Protocol):
+	async def send(self, event: dict[str, Any]) -> None:
+		...
+
+
+class LogSink:
+	async def send(self, event: dict[str, Any]) -> None:
+		logger.info(
+			"%s due for to-do %s of user %s at %s",
+			event["kind"].capitalize(),
+			event["todo_id"],
+			event["user_id"],
+			event["due_datetime"]
+		)
+
+
+class WebhookSink:
+	def __init__(self, url: str) -> None:
+		self.url: str = url
+		self.client: AsyncClient = AsyncClient(timeout=5.0)
+
+	async def send(self, event: dict[str, Any]) -> None:
+		response = await self.client.post(self.url, json=event)
+		response.raise_for_status()
+
+
+def get_sink() -> DeadlineSink:
+	if SCHEDULER_SINK == "webhook":
+		if not SCHEDULER_WEBHOOK_URL:
+			raise ValueError("SCHEDULER_WEBHOOK_URL must be set to use the webhook sink.")
+		return WebhookSink(SCHEDULER_WEBHOOK_URL)
+
+	return LogSink()
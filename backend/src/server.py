@@ -0,0 +1,190 @@
+import signal
+import socket
+from os import environ, setpgrp
+from types import FrameType
+from logging import Logger, basicConfig, getLogger, INFO
+from argparse import ArgumentParser, Namespace
+from multiprocessing import get_context
+from multiprocessing.context import SpawnContext, SpawnProcess
+from multiprocessing.connection import wait
+
+import uvicorn
+
+from src.db.db import engine, create_db_and_tables
+from src.resources.config import (
+	SCHEDULER_ENABLED,
+	SERVER_HOST,
+	SERVER_PORT,
+	SERVER_WORKERS,
+	SERVER_BACKLOG,
+	SERVER_KEEPALIVE_SECONDS,
+	SERVER_LIMIT_CONCURRENCY,
+	SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+	USER_PURGE_RESUME_ON_STARTUP,
+	TODO_TOMBSTONE_PRUNER_ENABLED,
+	CHANGE_FEED_BROKER,
+)
+
+
+logger: Logger = getLogger(__name__)
+
+# Workers are spawned, not forked, so each one imports the application (and
+# reads its configuration) fresh, with the environment set up for it below.
+spawn_context: SpawnContext = get_context("spawn")
+
+
+###############################################################################
+################################### Sockets ###################################
+###############################################################################
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+	family: socket.AddressFamily = socket.AF_INET6 if ":" in host else socket.AF_INET
+	sock: socket.socket = socket.socket(family, socket.SOCK_STREAM)
+	sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	if reuse_port:
+		sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+	sock.bind((host, port))
+	sock.set_inheritable(True)
+	return sock
+
+
+###############################################################################
+################################### Workers ###################################
+###############################################################################
+# With SO_REUSEPORT every worker binds its own listening socket and the kernel
+# spreads incoming connections across them; otherwise all workers accept from
+# one socket bound by the supervisor.
+def run_worker(args: Namespace, shared_socket: socket.socket | None) -> None:
+	# Leave the terminal's process group: a Ctrl-C must reach the supervisor
+	# only, since uvicorn treats a second signal as "exit without draining".
+	setpgrp()
+
+	sock: socket.socket = shared_socket or bind_socket(args.host, args.port, reuse_port=True)
+
+	config: uvicorn.Config = uvicorn.Config(
+		"main:app",
+		loop="uvloop",
+		http="httptools",
+		lifespan="on",
+		backlog=SERVER_BACKLOG,
+		timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+		timeout_graceful_shutdown=SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+		limit_concurrency=SERVER_LIMIT_CONCURRENCY,
+		access_log=args.access_log,
+		log_level=args.log_level,
+	)
+	uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+	def __init__(self, args: Namespace) -> None:
+		self.args: Namespace = args
+		self.reuse_port: bool = args.reuse_port and hasattr(socket, "SO_REUSEPORT")
+		self.shared_socket: socket.socket | None = None
+		self.workers: dict[int, SpawnProcess] = {}
+		self.stopping: bool = False
+
+	def spawn(self, index: int) -> None:
+		# The deadline scheduler must run in exactly one process, and only one
+		# process resumes interrupted user deletions or prunes tombstones.
+		environ["SCHEDULER_ENABLED"] = str(SCHEDULER_ENABLED and index == 0).lower()
+		environ["USER_PURGE_RESUME_ON_STARTUP"] = str(
+			USER_PURGE_RESUME_ON_STARTUP and index == 0
+		).lower()
+		environ["TODO_TOMBSTONE_PRUNER_ENABLED"] = str(
+			TODO_TOMBSTONE_PRUNER_ENABLED and index == 0
+		).lower()
+		environ["DB_MIGRATE_ON_STARTUP"] = "false"
+
+		worker: SpawnProcess = spawn_context.Process(
+			target=run_worker,
+			args=(self.args, self.shared_socket),
+			name=f"worker-{index}"
+		)
+		worker.start()
+		self.workers[index] = worker
+		logger.info("Started %s (pid %s)", worker.name, worker.pid)
+
+	def handle_signal(self, signum: int, frame: FrameType | None) -> None:
+		self.stopping = True
+
+	def run(self) -> None:
+		if not self.reuse_port:
+			self.shared_socket = bind_socket(self.args.host, self.args.port, reuse_port=False)
+
+		signal.signal(signal.SIGTERM, self.handle_signal)
+		signal.signal(signal.SIGINT, self.handle_signal)
+
+		for index in range(self.args.workers):
+			self.spawn(index)
+		logger.info(
+			"Serving on %s:%s with %s workers (%s)",
+			self.args.host,
+			self.args.port,
+			self.args.workers,
+			"SO_REUSEPORT" if self.reuse_port else "shared socket"
+		)
+		if self.args.workers > 1 and CHANGE_FEED_BROKER == "local":
+			logger.warning(
+				"The local change feed broker only reaches subscribers of the same "
+				"worker; configure a shared broker to run the feed on %s workers",
+				self.args.workers
+			)
+
+		# Replace workers that die while the server is up.
+		while not self.stopping:
+			wait([worker.sentinel for worker in self.workers.values()], timeout=1.0)
+			for index, worker in list(self.workers.items()):
+				if not worker.is_alive() and not self.stopping:
+					logger.warning("%s exited with code %s, restarting", worker.name, worker.exitcode)
+					self.spawn(index)
+
+		self.shutdown()
+
+	def shutdown(self) -> None:
+		# Workers stop accepting, drain in-flight requests for up to the
+		# graceful timeout, then run the shutdown hooks (engine disposal).
+		for worker in self.workers.values():
+			if worker.is_alive():
+				worker.terminate()
+
+		for worker in self.workers.values():
+			worker.join(SERVER_GRACEFUL_SHUTDOWN_SECONDS + 5)
+			if worker.is_alive():
+				logger.warning("%s did not stop in time, killing it", worker.name)
+				worker.kill()
+				worker.join()
+
+		if self.shared_socket is not None:
+			self.shared_socket.close()
+		logger.info("All workers stopped")
+
+
+def parse_args() -> Namespace:
+	parser: ArgumentParser = ArgumentParser(
+		prog="python -m src.server",
+		description="Run the API with several uvicorn workers (uvloop, httptools)."
+	)
+	parser.add_argument("--host", default=SERVER_HOST)
+	parser.add_argument("--port", type=int, default=SERVER_PORT)
+	parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+	parser.add_argument(
+		"--no-reuse-port", dest="reuse_port", action="store_false",
+		help="accept from one shared socket instead of one SO_REUSEPORT socket per worker"
+	)
+	parser.add_argument("--access-log", action="store_true")
+	parser.add_argument("--log-level", default="warning")
+	return parser.parse_args()
+
+
+# Usage (from the backend directory): python -m src.server --workers 4
+if __name__ == "__main__":
+	basicConfig(level=INFO, format="%(levelname)s: %(message)s")
+	arguments: Namespace = parse_args()
+
+	applied_versions: list[int] = create_db_and_tables()
+	if applied_versions:
+		logger.info("Applied migrations: %s", ", ".join(map(str, applied_versions)))
+	# Workers open their own pools; do not keep the supervisor's connections.
+	engine.dispose()
+
+	Supervisor(arguments).run()
@@ -0,0 +1,71 @@
+from os import environ
+from os.path import join
+from tempfile import mkdtemp
+from uuid import uuid4
+from typing import Any, Iterator
+
+import pytest
+
+
+# The application reads its configuration on first import, so the test
+# database and switches must be in place before anything imports src.
+TEST_DIR: str = mkdtemp(prefix="todo-tests-")
+environ["DATABASE_URL"] = f"sqlite:///{join(TEST_DIR, 'test.db')}"
+environ.pop("DATABASE_ASYNC_URL", None)
+environ.pop("DATABASE_READ_URL", None)
+environ.setdefault("JWT_SECRET", "test-secret")
+environ["SCHEDULER_ENABLED"] = "false"
+environ["RATE_LIMIT_ENABLED"] = "false"
+environ["USER_PURGE_RESUME_ON_STARTUP"] = "false"
+environ["TODO_TOMBSTONE_PRUNER_ENABLED"] = "false"
+
+TEST_PASSWORD: str = "password"
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[Any]:
+	from fastapi.testclient import TestClient
+
+	from main import app
+
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+def create_user(client: Any, is_admin: bool = False) -> tuple[int, dict[str, str]]:
+	username: str = f"u{uuid4().hex[:12]}"
+	response = client.post("/users/", json={
+		"username": username,
+		"email": f"{username}@example.com",
+		"password": TEST_PASSWORD,
+		"is_admin": is_admin,
+	})
+	assert response.status_code == 201, response.text
+
+	token: str = client.post(
+		"/users/auth",
+		data={"username": username, "password": TEST_PASSWORD}
+	).json()["access_token"]
+	return response.json()["user"]["id"], {"Authorization": f"Bearer {token}"}
+
+
+def create_todos(client: Any, user: tuple[int, dict[str, str]], count: int) -> list[int]:
+	user_id, headers = user
+	return [
+		client.post(
+			f"/users/{user_id}/todos",
+			headers=headers,
+			json={"description": f"todo {index}"}
+		).json()["todo"]["id"]
+		for index in range(count)
+	]
+
+
+@pytest.fixture
+def user(client: Any) -> tuple[int, dict[str, str]]:
+	return create_user(client)
+
+
+@pytest.fixture
+def other_user(client: Any) -> tuple[int, dict[str, str]]:
+	return create_user(client)
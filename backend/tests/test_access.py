@@ -0,0 +1,131 @@
+from typing import Any, Callable
+
+import pytest
+from sqlalchemy import text
+
+from conftest import create_todos, create_user
+from src.db.db import engine
+from src.resources.cache import principal_cache
+
+
+Users = tuple[tuple[int, dict[str, str]], tuple[int, dict[str, str]]]
+
+# Database queries each route may issue per request with the principal cache
+# warm and cold, as reported by the Server-Timing header.
+ACCESS_CASES: dict[str, tuple[str, Callable[[Any, Users], tuple[str, Any]], int, int, int]] = {
+	"get_todo": ("GET", lambda client, users: (
+		f"/users/{users[0][0]}/todos/{create_todos(client, users[0], 1)[0]}", None
+	), 200, 1, 1),
+	"patch_todo": ("PATCH", lambda client, users: (
+		f"/users/{users[0][0]}/todos/{create_todos(client, users[0], 1)[0]}",
+		{"description": "patched"}
+	), 201, 4, 4),
+	"create_todo": ("POST", lambda client, users: (
+		f"/users/{users[0][0]}/todos", {"description": "created"}
+	), 201, 4, 4),
+	"delete_todo": ("DELETE", lambda client, users: (
+		f"/users/{users[0][0]}/todos/{create_todos(client, users[0], 1)[0]}", None
+	), 200, 4, 4),
+	"get_user": ("GET", lambda client, users: (f"/users/{users[0][0]}", None), 200, 1, 1),
+	# An account with to-dos, so the page is not an empty 204.
+	"get_user_todos": ("GET", lambda client, users: (
+		f"/users/{users[0][0]}/todos?limit={len(create_todos(client, users[0], 2))}", None
+	), 200, 3, 3),
+	# Forbidden requests are answered from the cached principal alone.
+	"forbidden": ("GET", lambda client, users: (
+		f"/users/{users[1][0]}/todos/{create_todos(client, users[1], 1)[0]}", None
+	), 403, 0, 1),
+	"foreign_todo": ("GET", lambda client, users: (
+		f"/users/{users[0][0]}/todos/{create_todos(client, users[1], 1)[0]}", None
+	), 404, 1, 1),
+}
+
+
+def query_count(response: Any) -> int:
+	# Server-Timing carries db;dur=...;desc="<n> queries".
+	for metric in response.headers["Server-Timing"].split(","):
+		if metric.strip().startswith("db;"):
+			return int(metric.split('desc="')[1].split()[0])
+	raise AssertionError(f"no db metric in {response.headers['Server-Timing']!r}")
+
+
+@pytest.mark.parametrize("cached", [True, False], ids=["warm", "cold"])
+@pytest.mark.parametrize("case", ACCESS_CASES)
+def test_query_count_per_route(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch,
+	case: str,
+	cached: bool
+) -> None:
+
+	method, build, expected_status, warm_budget, cold_budget = ACCESS_CASES[case]
+	user_id, headers = user
+	path, body = build(client, (user, other_user))
+
+	principal_cache.clear()
+	monkeypatch.setattr(principal_cache.entries, "enabled", cached)
+	if cached:
+		client.get(f"/users/{user_id}", headers=headers)
+
+	response = client.request(method, path, headers=headers, json=body)
+
+	assert response.status_code == expected_status, response.text
+	assert query_count(response) <= (warm_budget if cached else cold_budget)
+
+
+def test_a_missing_user_costs_one_query_for_an_admin(client: Any) -> None:
+	_, admin_headers = create_user(client, is_admin=True)
+
+	response = client.get("/users/999999999/todos/1", headers=admin_headers)
+
+	assert response.status_code == 404
+	assert query_count(response) <= 1
+
+
+###############################################################################
+################################### Ordering ##################################
+###############################################################################
+# Checks run in a fixed order: 401, inactive 400, 403, then the 404s, so a
+# non-owner learns nothing about which users or to-dos exist.
+def test_a_missing_token_is_rejected_first(client: Any) -> None:
+	assert client.get("/users/999999999/todos/1").status_code == 401
+	assert client.get(
+		"/users/999999999/todos/1",
+		headers={"Authorization": "Bearer invalid"}
+	).status_code == 401
+
+
+def test_an_inactive_principal_is_rejected_before_ownership(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	other_user_id, _ = other_user
+	with engine.begin() as connection:
+		connection.execute(text("UPDATE users SET disabled = 1 WHERE id = :id"), {"id": user_id})
+	principal_cache.clear()
+
+	assert client.get(f"/users/{other_user_id}/todos/1", headers=headers).status_code == 400
+
+
+def test_a_non_owner_gets_403_even_for_missing_users_and_todos(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	_, headers = user
+	other_user_id, _ = other_user
+
+	assert client.get(f"/users/{other_user_id}/todos/999999999", headers=headers).status_code == 403
+	assert client.get("/users/999999999/todos/1", headers=headers).status_code == 403
+
+
+def test_an_owner_gets_404_for_a_missing_todo(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+
+	assert client.get(f"/users/{user_id}/todos/999999999", headers=headers).status_code == 404
@@ -0,0 +1,186 @@
+from typing import Any
+
+import pytest
+
+from conftest import create_todos
+from src.resources.config import TODO_BATCH_MAX_SIZE
+
+
+def not_found(todo_id: int, user_id: int) -> str:
+	return f"To-do with id {todo_id} for user with id {user_id} not found!"
+
+
+###############################################################################
+############################### Partial failures ##############################
+###############################################################################
+# One invalid item fails on its own; the rest of the batch is still written
+# and every result keeps the index of its item.
+def test_a_batch_create_reports_invalid_items_and_creates_the_rest(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	response = client.post(f"/users/{user_id}/todos:batch", headers=headers, json=[
+		{"description": "first"},
+		{
+			"description": "backwards",
+			"reminder_datetime": "2031-01-02T09:00:00",
+			"expiration_datetime": "2031-01-01T09:00:00",
+		},
+		{"description": "third"},
+	])
+
+	assert response.status_code == 201
+	body: dict[str, Any] = response.json()
+	assert body["message"] == "2 of 3 to-dos created successfully!"
+	assert [(result["index"], result["status"]) for result in body["results"]] == [
+		(0, "Success"), (1, "Failed"), (2, "Success")
+	]
+	assert body["results"][1]["message"] == "Reminder datetime cannot be after expiration datetime."
+
+	descriptions: list[str] = [
+		todo["description"]
+		for todo in client.get(f"/users/{user_id}/todos", headers=headers).json()["todos"]
+	]
+	assert descriptions == ["first", "third"]
+
+
+def test_a_batch_patch_skips_foreign_and_missing_todos(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	other_user_id, other_headers = other_user
+	(owned,) = create_todos(client, user, 1)
+	(foreign,) = create_todos(client, other_user, 1)
+
+	response = client.patch(f"/users/{user_id}/todos:batch", headers=headers, json=[
+		{"id": owned, "done": True},
+		{"id": foreign, "done": True},
+		{"id": 999999999, "done": True},
+	])
+
+	assert response.status_code == 201
+	body: dict[str, Any] = response.json()
+	assert body["message"] == "1 of 3 to-dos patched successfully!"
+	assert body["results"] == [
+		{"index": 0, "status": "Success", "todo": body["results"][0]["todo"]},
+		{"index": 1, "status": "Failed", "message": not_found(foreign, user_id)},
+		{"index": 2, "status": "Failed", "message": not_found(999999999, user_id)},
+	]
+	assert body["results"][0]["todo"]["done"] is True
+
+	assert client.get(
+		f"/users/{other_user_id}/todos/{foreign}", headers=other_headers
+	).json()["todo"]["done"] is False
+
+
+def test_a_batch_delete_skips_foreign_and_missing_todos(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	other_user_id, other_headers = other_user
+	first, second = create_todos(client, user, 2)
+	(foreign,) = create_todos(client, other_user, 1)
+
+	response = client.request("DELETE", f"/users/{user_id}/todos:batch", headers=headers, json=[
+		first, foreign, 999999999, first
+	])
+
+	assert response.status_code == 200
+	body: dict[str, Any] = response.json()
+	# Repeated ids count once.
+	assert body["message"] == "1 of 3 to-dos deleted successfully!"
+	assert body["results"] == [
+		{"index": 0, "id": first, "status": "Success"},
+		{"index": 1, "id": foreign, "status": "Failed", "message": not_found(foreign, user_id)},
+		{"index": 2, "id": 999999999, "status": "Failed", "message": not_found(999999999, user_id)},
+		{"index": 3, "id": first, "status": "Success"},
+	]
+
+	assert client.get(f"/users/{user_id}/todos/{second}", headers=headers).status_code == 200
+	assert client.get(f"/users/{other_user_id}/todos/{foreign}", headers=other_headers).status_code == 200
+
+
+def test_a_batch_for_another_user_is_forbidden_as_a_whole(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	_, headers = user
+	other_user_id, _ = other_user
+	(foreign,) = create_todos(client, other_user, 1)
+
+	response = client.request(
+		"DELETE", f"/users/{other_user_id}/todos:batch", headers=headers, json=[foreign]
+	)
+
+	assert response.status_code == 403
+	assert response.json()["status"] == "Failed"
+
+
+###############################################################################
+################################## Validation #################################
+###############################################################################
+@pytest.mark.parametrize(("method", "item"), [
+	("POST", {"description": "todo"}),
+	("PATCH", {"id": 1, "done": True}),
+	("DELETE", 1),
+])
+@pytest.mark.parametrize(("size", "error"), [
+	(0, "too_short"),
+	(TODO_BATCH_MAX_SIZE + 1, "too_long"),
+], ids=["empty", "over_limit"])
+def test_batch_sizes_outside_the_limits_are_rejected(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	method: str,
+	item: Any,
+	size: int,
+	error: str
+) -> None:
+
+	user_id, headers = user
+
+	response = client.request(method, f"/users/{user_id}/todos:batch", headers=headers, json=[item] * size)
+
+	assert response.status_code == 422
+	assert [(detail["type"], detail["loc"]) for detail in response.json()["detail"]] == [(error, ["body"])]
+
+
+def test_a_batch_at_the_limit_is_accepted(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+
+	response = client.post(
+		f"/users/{user_id}/todos:batch",
+		headers=headers,
+		json=[{"description": f"todo {index}"} for index in range(TODO_BATCH_MAX_SIZE)]
+	)
+
+	assert response.status_code == 201
+	assert response.json()["message"] == (
+		f"{TODO_BATCH_MAX_SIZE} of {TODO_BATCH_MAX_SIZE} to-dos created successfully!"
+	)
+
+
+# Malformed items fail the whole request, pointing at the offending field.
+def test_a_malformed_item_rejects_the_batch(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+
+	response = client.post(f"/users/{user_id}/todos:batch", headers=headers, json=[
+		{"description": "fine"},
+		{"description": "x" * 101},
+	])
+
+	assert response.status_code == 422
+	assert [(detail["type"], detail["loc"]) for detail in response.json()["detail"]] == [
+		("string_too_long", ["body", 1, "description"])
+	]
+	assert client.get(f"/users/{user_id}/todos", headers=headers).status_code == 204
@@ -0,0 +1,74 @@
+from time import sleep
+from typing import Any
+
+import pytest
+
+import src.routers.todos
+
+
+def list_todos(client: Any, user: tuple[int, dict[str, str]], **headers: str) -> Any:
+	user_id, auth = user
+	return client.get(f"/users/{user_id}/todos", headers={**auth, **headers})
+
+
+def create_todos(client: Any, user: tuple[int, dict[str, str]], count: int) -> list[int]:
+	user_id, headers = user
+	return [
+		client.post(
+			f"/users/{user_id}/todos",
+			headers=headers,
+			json={"description": f"todo {index}"}
+		).json()["todo"]["id"]
+		for index in range(count)
+	]
+
+
+def test_not_modified_skips_serialization(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	create_todos(client, user, 2)
+	response = list_todos(client, user)
+	assert response.status_code == 200
+
+	def fail(*_: Any) -> Any:
+		raise AssertionError("a 304 must not serialize the page")
+
+	monkeypatch.setattr(src.routers.todos, "map_todo_list", fail)
+	assert list_todos(
+		client, user, **{"If-None-Match": response.headers["ETag"]}
+	).status_code == 304
+	assert list_todos(
+		client, user, **{"If-Modified-Since": response.headers["Last-Modified"]}
+	).status_code == 304
+
+
+def test_a_delete_changes_the_validators(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	first, _ = create_todos(client, user, 2)
+	response = list_todos(client, user)
+
+	# Last-Modified has a resolution of one second.
+	sleep(1.1)
+	client.delete(f"/users/{user_id}/todos/{first}", headers=headers)
+
+	assert list_todos(
+		client, user, **{"If-None-Match": response.headers["ETag"]}
+	).status_code == 200
+	assert list_todos(
+		client, user, **{"If-Modified-Since": response.headers["Last-Modified"]}
+	).status_code == 200
+
+
+def test_a_patch_changes_the_etag(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	(todo_id,) = create_todos(client, user, 1)
+	response = list_todos(client, user)
+
+	client.patch(f"/users/{user_id}/todos/{todo_id}", headers=headers, json={"description": "edited"})
+
+	assert list_todos(
+		client, user, **{"If-None-Match": response.headers["ETag"]}
+	).status_code == 200
@@ -0,0 +1,173 @@
+from time import sleep
+from typing import Any
+
+import pytest
+from sqlalchemy import func, select
+
+from conftest import create_user
+from src.db.db import engine
+from src.jobs.user_deletion import user_purger
+from src.resources.cache import total_count_cache
+from src.resources.models import ToDo, User
+
+
+FILTERS: tuple[dict[str, bool], ...] = (
+	{},
+	{"done": True},
+	{"done": False},
+	{"is_favorite": True},
+	{"is_favorite": False},
+)
+
+
+def real_counts(user_id: int) -> tuple[int, int, int]:
+	with engine.connect() as connection:
+		return tuple(
+			connection.execute(
+				select(func.count()).select_from(ToDo).where(ToDo.user_id == user_id, *conditions)
+			).scalar_one()
+			for conditions in ((), (ToDo.done,), (ToDo.is_favorite,))
+		)
+
+
+def stored_counters(user_id: int) -> tuple[int, int, int]:
+	with engine.connect() as connection:
+		return tuple(connection.execute(
+			select(User.todo_count, User.todo_done_count, User.todo_favorite_count)
+			.where(User.id == user_id)
+		).one())
+
+
+# The totals the list route reports from the counters, next to the lengths
+# of the same lists.
+def reported_totals(client: Any, user: tuple[int, dict[str, str]]) -> list[tuple[int, int]]:
+	user_id, headers = user
+	totals: list[tuple[int, int]] = []
+	for filters in FILTERS:
+		response = client.get(f"/users/{user_id}/todos", headers=headers, params={"limit": 1000, **filters})
+		if response.status_code == 204:
+			totals.append((0, 0))
+		else:
+			body: dict[str, Any] = response.json()
+			totals.append((body["total"], len(body["todos"])))
+
+	return totals
+
+
+def assert_counters_match(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	count, done, favorites = real_counts(user_id)
+
+	assert stored_counters(user_id) == (count, done, favorites)
+	assert client.get(f"/users/{user_id}/stats", headers=headers).json()["stats"] == {
+		"todo_count": count,
+		"done_count": done,
+		"pending_count": count - done,
+		"favorite_count": favorites,
+	}
+	assert all(total == listed for total, listed in reported_totals(client, user))
+
+
+def create_batch(client: Any, user: tuple[int, dict[str, str]], todos: list[dict[str, Any]]) -> list[int]:
+	user_id, headers = user
+	response = client.post(f"/users/{user_id}/todos:batch", headers=headers, json=todos)
+	return [result["todo"]["id"] for result in response.json()["results"]]
+
+
+def admin_total(client: Any, admin_headers: dict[str, str]) -> int:
+	total_count_cache.clear()
+	return client.get("/todos", headers=admin_headers, params={"limit": 1}).json()["total"]
+
+
+def count_all_rows() -> int:
+	with engine.connect() as connection:
+		return connection.execute(select(func.count()).select_from(ToDo)).scalar_one()
+
+
+def test_counters_follow_creates_patches_and_deletes(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	(foreign,) = create_batch(client, other_user, [{"description": "foreign"}])
+
+	single: int = client.post(
+		f"/users/{user_id}/todos", headers=headers, json={"description": "single", "done": True}
+	).json()["todo"]["id"]
+	batch: list[int] = create_batch(client, user, [
+		{"description": f"batch {index}", "done": index % 2 == 0, "is_favorite": index % 3 == 0}
+		for index in range(9)
+	])
+	assert_counters_match(client, user)
+
+	client.patch(f"/users/{user_id}/todos/{single}", headers=headers, json={"is_favorite": True})
+	client.patch(f"/users/{user_id}/todos:batch", headers=headers, json=[
+		{"id": todo_id, "done": True, "is_favorite": True} for todo_id in batch[:4]
+	])
+	assert_counters_match(client, user)
+
+	client.delete(f"/users/{user_id}/todos/{single}", headers=headers)
+	# Foreign, missing and repeated ids must not move the counters.
+	client.request("DELETE", f"/users/{user_id}/todos:batch", headers=headers, json=[
+		*batch[:5], batch[0], foreign, 999999999
+	])
+	assert_counters_match(client, user)
+	assert_counters_match(client, other_user)
+	assert real_counts(user_id)[0] == 4
+
+
+def test_the_global_total_follows_batch_deletes(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	_, admin_headers = create_user(client, is_admin=True)
+	created: list[int] = create_batch(client, user, [{"description": f"todo {index}"} for index in range(6)])
+	total: int = admin_total(client, admin_headers)
+	rows: int = count_all_rows()
+
+	client.request("DELETE", f"/users/{user_id}/todos:batch", headers=headers, json=created[:4])
+
+	assert (admin_total(client, admin_headers), count_all_rows()) == (total - 4, rows - 4)
+
+
+def test_counters_stay_in_step_during_a_purge(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	user_id, headers = user
+	_, admin_headers = create_user(client, is_admin=True)
+	create_batch(client, user, [
+		{"description": f"todo {index}", "done": index % 2 == 0, "is_favorite": index % 5 == 0}
+		for index in range(30)
+	])
+	total: int = admin_total(client, admin_headers)
+	rows: int = count_all_rows()
+	monkeypatch.setattr(user_purger, "batch_size", 10)
+	monkeypatch.setattr(user_purger, "pause_seconds", 0.3)
+
+	client.delete(f"/users/{user_id}", headers=headers)
+	for _ in range(500):
+		if 0 < stored_counters(user_id)[0] < 30:
+			break
+		sleep(0.01)
+	client.portal.call(user_purger.stop)
+
+	# Part of the to-dos are gone; the counters of the disabled user agree.
+	assert 0 < real_counts(user_id)[0] < 30
+	assert stored_counters(user_id) == real_counts(user_id)
+	assert admin_total(client, admin_headers) == total - (30 - real_counts(user_id)[0])
+
+	monkeypatch.setattr(user_purger, "pause_seconds", 0.0)
+	client.portal.call(user_purger.resume)
+	for _ in range(500):
+		if real_counts(user_id)[0] == 0 and admin_total(client, admin_headers) == total - 30:
+			break
+		sleep(0.01)
+
+	assert (admin_total(client, admin_headers), count_all_rows()) == (total - 30, rows - 30)
@@ -0,0 +1,118 @@
+from os import getpid
+from datetime import datetime
+from typing import Any, Iterator
+
+import pytest
+from sqlalchemy import insert
+
+from benchmarks.runner import peak_rss_bytes, reset_peak_rss
+from src.db.db import db_profile, engine
+from src.resources.models import ToDo
+
+
+EXPORT_ROWS: int = 1_000_000
+EXPORT_CHUNK_SIZE: int = 50_000
+# The NDJSON body of a million to-dos is a few hundred MB; a stream that
+# buffered it, or the rows behind it, would blow well past this. SQLite's
+# page cache is part of the allowance. Its memory-mapped database pages are
+# not: a full scan maps up to mmap_size bytes of the file, and they count as
+# resident.
+EXPORT_PEAK_RSS_GROWTH_BYTES: int = 96 * 1024 * 1024
+EXPORT_MMAP_BYTES: int = int(db_profile["pragmas"].get("mmap_size", 0))
+
+
+def generate_todos(user_id: int) -> Iterator[list[dict[str, Any]]]:
+	# Old enough to stay out of the scheduler's rescans in later tests.
+	written: datetime = datetime(2020, 1, 1)
+	for start in range(0, EXPORT_ROWS, EXPORT_CHUNK_SIZE):
+		yield [
+			{
+				"user_id": user_id,
+				"description": f"export {index}",
+				"done": False,
+				"is_favorite": False,
+				"write_datetime": written,
+				"creation_datetime": written,
+				"change_seq": index + 1,
+			}
+			for index in range(start, min(start + EXPORT_CHUNK_SIZE, EXPORT_ROWS))
+		]
+
+
+# Drives the application as a server would and drops every body chunk as it
+# arrives, so the only memory measured is the application's own. The test
+# client and httpx's ASGI transport would collect the whole body first.
+async def drain_export(path: str, headers: dict[str, str]) -> tuple[int, int]:
+	from main import app
+
+	status_code: int = 0
+	lines: int = 0
+
+	async def receive() -> dict[str, Any]:
+		return {"type": "http.request", "body": b"", "more_body": False}
+
+	async def send(message: dict[str, Any]) -> None:
+		nonlocal status_code, lines
+		if message["type"] == "http.response.start":
+			status_code = message["status"]
+		elif message["type"] == "http.response.body":
+			lines += message.get("body", b"").count(b"\n")
+
+	await app({
+		"type": "http",
+		# 2.4 servers report disconnects on send, so Starlette does not poll receive().
+		"asgi": {"version": "3.0", "spec_version": "2.4"},
+		"http_version": "1.1",
+		"method": "GET",
+		"scheme": "http",
+		"server": ("testserver", 80),
+		"client": ("testclient", 50000),
+		"root_path": "",
+		"path": path,
+		"raw_path": path.encode(),
+		"query_string": b"format=ndjson",
+		"headers": [
+			(name.lower().encode(), value.encode()) for name, value in headers.items()
+		],
+	}, receive, send)
+	return status_code, lines
+
+
+def test_exporting_a_million_todos_keeps_memory_bounded(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	for chunk in generate_todos(user_id):
+		with engine.begin() as connection:
+			connection.execute(insert(ToDo), chunk)
+
+	pids: list[int] = [getpid()]
+	reset_peak_rss(pids)
+	baseline: int | None = peak_rss_bytes(pids)
+	if baseline is None:
+		pytest.skip("peak RSS is read from /proc")
+
+	status_code, lines = client.portal.call(drain_export, f"/users/{user_id}/todos:export", headers)
+	growth: int = peak_rss_bytes(pids) - baseline
+
+	assert status_code == 200
+	assert lines == EXPORT_ROWS
+	assert growth < EXPORT_PEAK_RSS_GROWTH_BYTES + EXPORT_MMAP_BYTES, (
+		f"peak RSS grew by {growth / 2**20:.1f} MiB"
+	)
+
+
+def test_a_non_owner_cannot_export_todos(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, _ = user
+	_, other_headers = other_user
+
+	response = client.get(f"/users/{user_id}/todos:export", headers=other_headers)
+
+	assert response.status_code == 403
@@ -0,0 +1,118 @@
+from os import environ
+from time import time
+from json import loads
+from typing import Any
+
+import pytest
+from jwt import encode
+from starlette.websockets import WebSocketDisconnect
+
+from src.resources.config import ALGORITHM
+from conftest import create_user
+
+
+def feed_ticket(client: Any, user: tuple[int, dict[str, str]], user_id: int | None = None) -> Any:
+	owner_id, headers = user
+	return client.post(f"/users/{user_id or owner_id}/todos:feed-ticket", headers=headers)
+
+
+def username_of(client: Any, user: tuple[int, dict[str, str]]) -> str:
+	user_id, headers = user
+	return client.get(f"/users/{user_id}", headers=headers).json()["user"]["username"]
+
+
+def assert_rejected(client: Any, url: str, **kwargs: Any) -> None:
+	with pytest.raises(WebSocketDisconnect) as rejected:
+		with client.websocket_connect(url, **kwargs) as websocket:
+			websocket.receive_text()
+	assert rejected.value.code == 1008
+
+
+###############################################################################
+#################################### Tickets ##################################
+###############################################################################
+def test_a_ticket_opens_the_feed_once(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	response = feed_ticket(client, user)
+	assert response.status_code == 201
+	ticket: str = response.json()["ticket"]
+
+	with client.websocket_connect(f"/users/{user_id}/todos:feed?ticket={ticket}") as websocket:
+		client.post(f"/users/{user_id}/todos", headers=headers, json={"description": "live"})
+		assert loads(websocket.receive_text())["event"] == "todo.created"
+
+	assert_rejected(client, f"/users/{user_id}/todos:feed?ticket={ticket}")
+
+
+def test_tokens_are_not_accepted_in_the_url(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	token: str = headers["Authorization"].removeprefix("Bearer ")
+
+	assert_rejected(client, f"/users/{user_id}/todos:feed?token={token}")
+
+
+def test_a_ticket_only_opens_its_own_feed(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	assert feed_ticket(client, user, other_user[0]).status_code == 403
+
+	ticket: str = feed_ticket(client, user).json()["ticket"]
+	assert_rejected(client, f"/users/{other_user[0]}/todos:feed?ticket={ticket}")
+
+
+###############################################################################
+################################## Revocation #################################
+###############################################################################
+def test_an_expired_token_ends_the_stream(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, _ = user
+	token: str = encode(
+		{"sub": username_of(client, user), "exp": int(time()) + 2},
+		environ["JWT_SECRET"],
+		algorithm=ALGORITHM
+	)
+
+	response = client.get(
+		f"/users/{user_id}/todos:feed",
+		headers={"Authorization": f"Bearer {token}"}
+	)
+	assert response.status_code == 200
+	assert response.text.endswith('data: {"event": "feed.expired"}\n\n')
+
+
+def test_disabling_a_user_closes_their_feed(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+
+	with client.websocket_connect(f"/users/{user_id}/todos:feed", headers=headers) as websocket:
+		client.post(f"/users/{user_id}/todos", headers=headers, json={"description": "live"})
+		assert loads(websocket.receive_text())["event"] == "todo.created"
+
+		client.patch(f"/users/{user_id}", headers=headers, json={"disabled": True})
+		assert loads(websocket.receive_text())["event"] == "feed.closed"
+		with pytest.raises(WebSocketDisconnect) as closed:
+			websocket.receive_text()
+		assert closed.value.code == 1008
+
+
+
+def test_deleting_a_user_closes_their_feed(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+
+	with client.websocket_connect(f"/users/{user_id}/todos:feed", headers=headers) as websocket:
+		client.delete(f"/users/{user_id}", headers=headers)
+		assert loads(websocket.receive_text())["event"] == "feed.closed"
+
+
+def test_disabling_an_admin_closes_the_feeds_they_follow(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, _ = user
+	admin_id, admin_headers = create_user(client, is_admin=True)
+
+	with client.websocket_connect(f"/users/{user_id}/todos:feed", headers=admin_headers) as websocket:
+		client.patch(f"/users/{admin_id}", headers=admin_headers, json={"disabled": True})
+		assert loads(websocket.receive_text())["event"] == "feed.closed"
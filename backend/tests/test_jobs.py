@@ -0,0 +1,157 @@
+from uuid import uuid4
+from asyncio import Event, sleep
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+import pytest
+from sqlalchemy import select, update
+
+from src.db.db import async_engine
+from src.jobs import queue as job_queue_module
+from src.jobs.queue import JobQueue
+from src.jobs.events import ChangeEventDelivery
+from src.resources.models import JobOutbox
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+	monkeypatch.setattr(job_queue_module, "JOB_QUEUE_RETRY_BASE_SECONDS", 0.01)
+	monkeypatch.setattr(job_queue_module, "JOB_QUEUE_OUTBOX_POLL_SECONDS", 0.01)
+
+
+async def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+	for _ in range(int(timeout / 0.01)):
+		if condition():
+			return
+		await sleep(0.01)
+	raise AssertionError("condition not met in time")
+
+
+async def outbox_rows(name: str) -> list[Any]:
+	async with async_engine.connect() as connection:
+		return list((await connection.execute(
+			select(JobOutbox.id, JobOutbox.status, JobOutbox.attempts)
+			.where(JobOutbox.name == name)
+			.order_by(JobOutbox.id)
+		)).all())
+
+
+def test_a_failing_job_is_retried_then_marked_failed(client: Any) -> None:
+	name: str = f"test.{uuid4().hex}"
+	attempts: list[dict[str, Any]] = []
+
+	async def failing(payload: dict[str, Any]) -> None:
+		attempts.append(payload)
+		raise RuntimeError("receiver is down")
+
+	async def scenario(durable: bool) -> JobQueue:
+		queue: JobQueue = JobQueue(workers=1, max_backlog=10, max_attempts=3, durable=durable, enabled=True)
+		queue.register(name, failing)
+		queue.start()
+		await queue.enqueue(name, {"n": 1})
+		await wait_until(lambda: queue.failed == 1)
+		await queue.stop()
+		return queue
+
+	queue: JobQueue = client.portal.call(scenario, False)
+	assert (len(attempts), queue.retried, queue.failed, queue.completed) == (3, 2, 1, 0)
+
+	attempts.clear()
+	queue = client.portal.call(scenario, True)
+	assert (len(attempts), queue.retried, queue.failed) == (3, 2, 1)
+	rows: list[Any] = client.portal.call(outbox_rows, name)
+	assert [(row.status, row.attempts) for row in rows] == [("failed", 3)]
+
+
+def test_a_full_backlog_drops_and_counts_jobs(client: Any) -> None:
+	# No workers are started, so nothing leaves the backlog.
+	queue: JobQueue = JobQueue(workers=1, max_backlog=2, durable=False, enabled=True)
+
+	client.portal.call(queue.enqueue_many, "test.dropped", [{"n": index} for index in range(5)])
+
+	stats: dict[str, Any] = queue.stats()
+	assert (stats["enqueued"], stats["backlog"], stats["dropped"]) == (5, 2, 3)
+
+
+def test_stop_drains_pending_jobs(client: Any) -> None:
+	name: str = f"test.{uuid4().hex}"
+	handled: list[int] = []
+
+	async def slow(payload: dict[str, Any]) -> None:
+		await sleep(0.01)
+		handled.append(payload["n"])
+
+	async def scenario() -> JobQueue:
+		queue: JobQueue = JobQueue(workers=1, max_backlog=10, durable=False, enabled=True)
+		queue.register(name, slow)
+		queue.start()
+		await queue.enqueue_many(name, [{"n": index} for index in range(5)])
+		await queue.stop(drain_seconds=5.0)
+		return queue
+
+	queue: JobQueue = client.portal.call(scenario)
+
+	assert handled == [0, 1, 2, 3, 4]
+	assert (queue.completed, queue.stats()["backlog"]) == (5, 0)
+
+
+# A stop without drain time stands in for a process that dies: the job being
+# run stays claimed, the queued one goes back to pending, and both are run
+# by the next queue once their lease expires or at once.
+def test_outbox_jobs_survive_a_stop_and_are_reclaimed(client: Any) -> None:
+	name: str = f"test.{uuid4().hex}"
+	never: Event = Event()
+	handled: list[int] = []
+
+	async def stuck(payload: dict[str, Any]) -> None:
+		await never.wait()
+
+	async def succeeding(payload: dict[str, Any]) -> None:
+		handled.append(payload["n"])
+
+	async def interrupted() -> None:
+		queue: JobQueue = JobQueue(workers=1, max_backlog=10, durable=True, enabled=True)
+		queue.register(name, stuck)
+		queue.start()
+		await queue.enqueue_many(name, [{"n": 1}, {"n": 2}])
+		await wait_until(lambda: queue.active == 1)
+		await queue.stop(drain_seconds=0.0)
+
+	client.portal.call(interrupted)
+	rows: list[Any] = client.portal.call(outbox_rows, name)
+	assert [row.status for row in rows] == ["running", "pending"]
+
+	async def resumed() -> JobQueue:
+		queue: JobQueue = JobQueue(workers=1, max_backlog=10, durable=True, enabled=True)
+		queue.register(name, succeeding)
+		queue.start()
+		await wait_until(lambda: handled == [2])
+
+		# The running row is still leased to the stopped queue.
+		await sleep(0.05)
+		assert handled == [2]
+
+		async with async_engine.begin() as connection:
+			await connection.execute(
+				update(JobOutbox)
+				.where(JobOutbox.id == rows[0].id)
+				.values(claimed_datetime=datetime.now() - timedelta(
+					seconds=job_queue_module.JOB_QUEUE_OUTBOX_LEASE_SECONDS + 1
+				))
+			)
+		await wait_until(lambda: handled == [2, 1])
+		await queue.stop()
+		return queue
+
+	queue: JobQueue = client.portal.call(resumed)
+
+	assert queue.completed == 2
+	assert client.portal.call(outbox_rows, name) == []
+
+
+def test_change_event_delivery_closes_its_client(client: Any) -> None:
+	delivery: ChangeEventDelivery = ChangeEventDelivery("http://127.0.0.1:9/events")
+
+	client.portal.call(delivery.close)
+
+	assert delivery.client is not None and delivery.client.is_closed
@@ -0,0 +1,68 @@
+from re import fullmatch
+from typing import Any
+
+from conftest import create_todos, create_user
+from src.resources.metrics import LATENCY_BUCKETS, Histogram
+
+
+def test_metrics_are_served_to_admins_only(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	_, headers = user
+	_, admin_headers = create_user(client, is_admin=True)
+
+	assert client.get("/metrics").status_code == 401
+	assert client.get("/metrics", headers=headers).status_code == 403
+
+	response = client.get("/metrics", headers=admin_headers)
+	assert response.status_code == 200
+	assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+
+
+def test_responses_carry_a_server_timing_header(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	(todo_id,) = create_todos(client, user, 1)
+
+	response = client.get(f"/users/{user_id}/todos/{todo_id}", headers=headers)
+
+	metrics: list[str] = [metric.strip() for metric in response.headers["Server-Timing"].split(",")]
+	assert [metric.split(";")[0] for metric in metrics] == ["db", "auth", "serialize", "total"]
+	assert fullmatch(r'db;dur=\d+\.\d{2};desc="[1-9]\d* queries"', metrics[0])
+	assert all(fullmatch(r"\w+;dur=\d+\.\d{2}", metric) for metric in metrics[1:])
+
+
+def test_request_histograms_are_exposed_with_buckets_sum_and_count(client: Any) -> None:
+	_, admin_headers = create_user(client, is_admin=True)
+	client.get("/")
+
+	lines: list[str] = client.get("/metrics", headers=admin_headers).text.splitlines()
+	values: dict[str, float] = {
+		line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+		for line in lines if line and not line.startswith("#")
+	}
+	name: str = "todo_http_request_duration_seconds"
+	labels: str = 'method="GET",route="/",status="200"'
+	buckets: list[float] = [
+		value for series, value in values.items() if series.startswith(f"{name}_bucket{{{labels},le=")
+	]
+
+	assert f"# TYPE {name} histogram" in lines
+	assert len(buckets) == len(LATENCY_BUCKETS) + 1
+	assert buckets == sorted(buckets)
+	assert buckets[-1] == values[f'{name}_bucket{{{labels},le="+Inf"}}']
+	assert buckets[-1] == values[f"{name}_count{{{labels}}}"] >= 1
+	assert values[f"{name}_sum{{{labels}}}"] > 0
+
+
+def test_series_without_labels_render_without_braces() -> None:
+	histogram: Histogram = Histogram("test_seconds", "Test latency.", (0.1, 1.0))
+	histogram.observe(0.05)
+	histogram.observe(0.5)
+
+	assert list(histogram.render()) == [
+		"# HELP test_seconds Test latency.",
+		"# TYPE test_seconds histogram",
+		'test_seconds_bucket{le="0.1"} 1',
+		'test_seconds_bucket{le="1.0"} 2',
+		'test_seconds_bucket{le="+Inf"} 2',
+		"test_seconds_sum 0.55",
+		"test_seconds_count 2",
+	]
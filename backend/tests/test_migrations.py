@@ -0,0 +1,189 @@
+from datetime import datetime
+from os.path import join
+from tempfile import mkdtemp
+from typing import Any
+
+import pytest
+from sqlalchemy import Connection, Engine, Select, create_engine, func, select, text
+from sqlmodel import SQLModel
+
+from src.db.migrations import MIGRATIONS, run_migrations
+from src.resources.models import ToDo, ToDoTombstone, User
+from src.resources.functions import select_todo_rows
+from src.resources.dependencies import SELECT_PRINCIPAL_TARGET, SELECT_PRINCIPAL_TARGET_TODO
+
+
+# Schema created by the baseline models: no username index, no counters and
+# no ON DELETE CASCADE.
+BASELINE_SCHEMA: tuple[str, ...] = (
+	"CREATE TABLE users ("
+	"username VARCHAR(20) NOT NULL, "
+	"email VARCHAR(50) NOT NULL, "
+	"disabled BOOLEAN NOT NULL, "
+	"is_admin BOOLEAN NOT NULL, "
+	"id INTEGER NOT NULL, "
+	"password BLOB NOT NULL, "
+	"write_datetime DATETIME NOT NULL, "
+	"creation_datetime DATETIME NOT NULL, "
+	"PRIMARY KEY (id), "
+	"UNIQUE (email))",
+	"CREATE TABLE todos ("
+	"description VARCHAR(100) NOT NULL, "
+	"done BOOLEAN NOT NULL, "
+	"is_favorite BOOLEAN NOT NULL, "
+	"id INTEGER NOT NULL, "
+	"user_id INTEGER, "
+	"reminder_datetime DATETIME, "
+	"expiration_datetime DATETIME, "
+	"write_datetime DATETIME NOT NULL, "
+	"creation_datetime DATETIME NOT NULL, "
+	"PRIMARY KEY (id), "
+	"FOREIGN KEY(user_id) REFERENCES users (id))",
+)
+
+
+def create_baseline_database(users: list[tuple[int, str]]) -> Engine:
+	engine: Engine = create_engine(f"sqlite:///{join(mkdtemp(), 'baseline.db')}")
+	now: datetime = datetime.now()
+	with engine.begin() as connection:
+		for statement in BASELINE_SCHEMA:
+			connection.execute(text(statement))
+		for user_id, username in users:
+			connection.execute(
+				text(
+					"INSERT INTO users VALUES "
+					"(:username, :email, 0, 0, :id, x'00', :now, :now)"
+				),
+				{"username": username, "email": f"{user_id}@example.com", "id": user_id, "now": now}
+			)
+			connection.execute(
+				text(
+					"INSERT INTO todos VALUES "
+					"('todo', :done, 0, NULL, :user_id, NULL, NULL, :now, :now)"
+				),
+				[{"done": done, "user_id": user_id, "now": now} for done in (False, True)]
+			)
+	return engine
+
+
+def migrate(engine: Engine) -> list[int]:
+	SQLModel.metadata.create_all(engine)
+	return run_migrations(engine)
+
+
+###############################################################################
+################################## Upgrades ###################################
+###############################################################################
+def test_baseline_database_migrates() -> None:
+	engine: Engine = create_baseline_database([(1, "alice"), (2, "bob")])
+
+	assert migrate(engine) == [version for version, _, _ in MIGRATIONS]
+	assert migrate(engine) == []
+
+	with engine.connect() as connection:
+		assert connection.execute(
+			text("SELECT id, todo_count, todo_done_count FROM users ORDER BY id")
+		).all() == [(1, 2, 1), (2, 2, 1)]
+		assert connection.execute(text("SELECT COUNT(*) FROM todos")).scalar() == 4
+		assert connection.execute(
+			text("SELECT user_id, id, change_seq FROM todos ORDER BY id")
+		).all() == [(1, 1, 1), (1, 2, 2), (2, 3, 1), (2, 4, 2)]
+		assert connection.execute(
+			text("SELECT todo_change_seq, todo_sync_floor_seq FROM users ORDER BY id")
+		).all() == [(2, 0), (2, 0)]
+
+
+def test_duplicate_usernames_are_renamed_and_disabled() -> None:
+	engine: Engine = create_baseline_database([(1, "dup"), (2, "dup"), (3, "other"), (4, "dup")])
+
+	migrate(engine)
+
+	with engine.connect() as connection:
+		assert connection.execute(
+			text("SELECT id, username, disabled FROM users ORDER BY id")
+		).all() == [(1, "dup", 0), (2, "dup~2", 1), (3, "other", 0), (4, "dup~4", 1)]
+		assert connection.execute(text(
+			"SELECT \"unique\" FROM pragma_index_list('users') WHERE name = 'ix_users_username'"
+		)).scalar() == 1
+
+
+def test_long_duplicate_usernames_still_fit() -> None:
+	engine: Engine = create_baseline_database([(1, "x" * 20), (12, "x" * 20)])
+
+	migrate(engine)
+
+	with engine.connect() as connection:
+		assert connection.execute(
+			text("SELECT username FROM users WHERE id = 12")
+		).scalar() == "x" * 17 + "~12"
+
+
+###############################################################################
+################################# Query plans #################################
+###############################################################################
+def explain(connection: Connection, statement: Select, parameters: dict[str, Any]) -> str:
+	compiled = statement.compile(dialect=connection.dialect)
+	values: dict[str, Any] = compiled.construct_params(parameters)
+	plan = connection.exec_driver_sql(
+		f"EXPLAIN QUERY PLAN {compiled}",
+		tuple(values[name] for name in compiled.positiontup)
+	).all()
+	return "\n".join(row[-1] for row in plan)
+
+
+@pytest.fixture(scope="module")
+def migrated_connection() -> Any:
+	engine: Engine = create_baseline_database([(1, "alice")])
+	migrate(engine)
+	with engine.connect() as connection:
+		yield connection
+
+
+@pytest.mark.parametrize("statement, parameters", [
+	(select(User).where(User.username == "alice"), {}),
+	(SELECT_PRINCIPAL_TARGET, {"username": "alice", "user_id": 1}),
+	(SELECT_PRINCIPAL_TARGET_TODO, {"username": "alice", "user_id": 1, "todo_id": 1}),
+])
+def test_username_lookups_use_the_unique_index(
+	migrated_connection: Connection,
+	statement: Select,
+	parameters: dict[str, Any]
+) -> None:
+
+	plan: str = explain(migrated_connection, statement, parameters)
+	assert "USING INDEX ix_users_username (username=?)" in plan, plan
+	assert "SCAN" not in plan, plan
+
+
+@pytest.mark.parametrize("statement, index", [
+	(select_todo_rows().where(ToDo.user_id == 1).limit(11), "ix_todos_user_id"),
+	(select_todo_rows().where(ToDo.user_id == 1).where(ToDo.done).limit(11), "ix_todos_user_id_done"),
+	(
+		select(func.max(ToDo.write_datetime)).where(ToDo.user_id == 1),
+		"ix_todos_user_id_write_datetime"
+	),
+	(
+		select(func.max(ToDoTombstone.deleted_datetime)).where(ToDoTombstone.user_id == 1),
+		"ix_todo_tombstones_user_id_deleted_datetime"
+	),
+	(
+		select_todo_rows().order_by(None).where(ToDo.user_id == 1)
+		.where(ToDo.change_seq > 0).order_by(ToDo.change_seq).limit(11),
+		"ix_todos_user_id_change_seq"
+	),
+	(
+		select(ToDoTombstone.todo_id, ToDoTombstone.change_seq)
+		.where(ToDoTombstone.user_id == 1).where(ToDoTombstone.change_seq > 0)
+		.order_by(ToDoTombstone.change_seq).limit(11),
+		"ix_todo_tombstones_user_id_change_seq"
+	),
+])
+def test_per_user_lookups_use_the_user_indexes(
+	migrated_connection: Connection,
+	statement: Select,
+	index: str
+) -> None:
+
+	plan: str = explain(migrated_connection, statement, {})
+	assert f"INDEX {index} (user_id=?" in plan, plan
+	assert "SCAN" not in plan and "TEMP B-TREE" not in plan, plan
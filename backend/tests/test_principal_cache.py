@@ -0,0 +1,81 @@
+from time import monotonic
+from typing import Any
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from src.db.db import engine
+from src.resources import cache as cache_module
+from src.resources.cache import MemoryCacheBackend, PrincipalCache, TTLCache, principal_cache
+from src.resources.models import User
+
+
+def disable_in_database(user_id: int) -> None:
+	with engine.begin() as connection:
+		connection.execute(text("UPDATE users SET disabled = 1 WHERE id = :id"), {"id": user_id})
+
+
+# Another worker commits the change and bumps the shared generation; this
+# process never sees its local invalidate() call.
+def test_a_user_changed_elsewhere_is_not_served_from_the_cache(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	username: str = client.get(f"/users/{user_id}", headers=headers).json()["user"]["username"]
+	assert client.get(f"/users/{user_id}/todos", headers=headers).status_code in (200, 204)
+
+	disable_in_database(user_id)
+	assert client.get(f"/users/{user_id}/todos", headers=headers).status_code in (200, 204)
+
+	client.portal.call(principal_cache.backend.incr, f"generation:principal:{username}")
+	assert client.get(f"/users/{user_id}/todos", headers=headers).status_code == 400
+
+
+def test_patching_a_user_bumps_its_generation(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	username: str = client.get(f"/users/{user_id}", headers=headers).json()["user"]["username"]
+	generation: int = client.portal.call(principal_cache.generation, username)
+
+	client.patch(f"/users/{user_id}", headers=headers, json={"email": f"new-{username}@example.com"})
+
+	assert client.portal.call(principal_cache.generation, username) == generation + 1
+
+
+def test_principal_generations_outlive_the_principal_entries() -> None:
+	assert isinstance(principal_cache.backend, MemoryCacheBackend)
+	assert principal_cache.backend.counter_idle_seconds >= principal_cache.entries.ttl_seconds
+
+
+# Generations of users no longer seen are dropped, and the entry cached
+# under a dropped generation has expired before it could match again.
+def test_idle_principal_generations_are_dropped(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	user_id, _ = user
+	now: list[float] = [monotonic()]
+	monkeypatch.setattr(cache_module, "monotonic", lambda: now[0])
+	cache: PrincipalCache = PrincipalCache(
+		entries=TTLCache(max_size=10, ttl_seconds=10),
+		backend=MemoryCacheBackend(max_size=10, ttl_seconds=30, counter_idle_seconds=10)
+	)
+	with Session(engine) as session:
+		principal: User = session.get(User, user_id)
+
+	for index in range(50):
+		client.portal.call(cache.invalidate, f"idle{index}")
+	client.portal.call(cache.invalidate, principal.username)
+	generation: int = client.portal.call(cache.generation, principal.username)
+	cache.set(principal, generation)
+
+	now[0] += 11
+	assert client.portal.call(cache.generation, principal.username) == 0
+	assert len(cache.backend.counters) == 0
+
+	client.portal.call(cache.invalidate, principal.username)
+	assert client.portal.call(cache.get, principal.username) == (None, generation)
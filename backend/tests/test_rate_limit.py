@@ -0,0 +1,132 @@
+from typing import Any
+
+import pytest
+
+from src.resources import rate_limit as rate_limit_module
+from src.resources.config import RATE_LIMITS
+from src.resources.rate_limit import MemoryRateLimitBackend, rate_limiter
+
+
+ROUTE_KEY: str = "GET /users/{user_id}"
+
+
+class Clock:
+	def __init__(self) -> None:
+		self.now: float = 1000.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+class FailingBackend:
+	async def acquire(self, key: str, capacity: int, refill_per_second: float) -> float:
+		raise ConnectionError("rate limit backend is down")
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+	clock: Clock = Clock()
+	monkeypatch.setattr(rate_limit_module, "monotonic", clock)
+	return clock
+
+
+# The suite runs with the limiter off; these tests turn it on with a fresh
+# bucket store and a small budget for one route: 3 requests, then one token
+# every 2 seconds.
+@pytest.fixture(autouse=True)
+def limited(monkeypatch: pytest.MonkeyPatch) -> None:
+	monkeypatch.setattr(rate_limiter, "enabled", True)
+	monkeypatch.setattr(rate_limiter, "backend", MemoryRateLimitBackend(max_buckets=100, idle_seconds=600.0))
+	monkeypatch.setitem(RATE_LIMITS, ROUTE_KEY, (3, 0.5))
+
+
+def test_an_exhausted_bucket_answers_429_with_retry_after(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	clock: Clock
+) -> None:
+
+	user_id, headers = user
+	limited: int = rate_limiter.limited
+
+	assert [client.get(f"/users/{user_id}", headers=headers).status_code for _ in range(3)] == [200] * 3
+
+	response = client.get(f"/users/{user_id}", headers=headers)
+	assert response.status_code == 429
+	assert response.headers["Retry-After"] == "2"
+	assert rate_limiter.limited == limited + 1
+
+
+def test_buckets_are_kept_per_principal(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]],
+	clock: Clock
+) -> None:
+
+	user_id, headers = user
+	other_user_id, other_headers = other_user
+	for _ in range(3):
+		client.get(f"/users/{user_id}", headers=headers)
+
+	assert client.get(f"/users/{user_id}", headers=headers).status_code == 429
+	assert client.get(f"/users/{other_user_id}", headers=other_headers).status_code == 200
+
+
+def test_tokens_refill_as_time_passes(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	clock: Clock
+) -> None:
+
+	user_id, headers = user
+	for _ in range(3):
+		client.get(f"/users/{user_id}", headers=headers)
+	assert client.get(f"/users/{user_id}", headers=headers).status_code == 429
+
+	clock.now += 1.0
+	response = client.get(f"/users/{user_id}", headers=headers)
+	assert response.status_code == 429
+	assert response.headers["Retry-After"] == "1"
+
+	clock.now += 1.0
+	assert client.get(f"/users/{user_id}", headers=headers).status_code == 200
+	assert client.get(f"/users/{user_id}", headers=headers).status_code == 429
+
+	# A long pause refills the bucket up to its capacity, not beyond.
+	clock.now += 60.0
+	assert [client.get(f"/users/{user_id}", headers=headers).status_code for _ in range(4)] == [
+		200, 200, 200, 429
+	]
+
+
+def test_a_failing_backend_lets_requests_through(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	user_id, headers = user
+	monkeypatch.setattr(rate_limiter, "backend", FailingBackend())
+	failures: int = rate_limiter.failures
+
+	assert [client.get(f"/users/{user_id}", headers=headers).status_code for _ in range(5)] == [200] * 5
+	assert rate_limiter.failures == failures + 5
+
+
+def test_an_unreachable_redis_lets_requests_through(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	pytest.importorskip("redis")
+	user_id, headers = user
+	# Nothing listens on the discard port.
+	monkeypatch.setattr(
+		rate_limiter, "backend", rate_limit_module.RedisRateLimitBackend("redis://127.0.0.1:9/0")
+	)
+	failures: int = rate_limiter.failures
+
+	assert client.get(f"/users/{user_id}", headers=headers).status_code == 200
+	assert rate_limiter.failures == failures + 1
@@ -0,0 +1,72 @@
+from contextlib import closing
+from os.path import join
+from sqlite3 import connect
+from typing import Any, Iterator
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from conftest import TEST_DIR, create_todos
+from src.db import db as db_module
+from src.db.db import engine
+from src.resources import dependencies as dependencies_module
+
+
+def copy_primary(path: str) -> None:
+	with closing(connect(engine.url.database)) as primary, closing(connect(path)) as replica:
+		primary.backup(replica)
+
+
+def set_description(path: str, todo_id: int, description: str) -> None:
+	with closing(connect(path)) as replica, replica:
+		replica.execute("UPDATE todos SET description = ? WHERE id = ?", (description, todo_id))
+
+
+def primary_done(todo_id: int) -> bool:
+	with engine.connect() as connection:
+		return bool(connection.execute(
+			text("SELECT done FROM todos WHERE id = :id"), {"id": todo_id}
+		).scalar_one())
+
+
+# Points the read session at a copy of the primary taken when the fixture
+# runs, standing in for a replica that has not caught up yet.
+@pytest.fixture
+def replica(client: Any, monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+	path: str = join(TEST_DIR, f"replica-{uuid4().hex[:8]}.db")
+	read_async_engine: AsyncEngine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+	monkeypatch.setattr(db_module, "read_async_engine", read_async_engine)
+	monkeypatch.setattr(dependencies_module, "read_async_engine", read_async_engine)
+	yield path
+	client.portal.call(read_async_engine.dispose)
+
+
+def test_read_routes_use_the_replica_and_writes_the_primary(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	replica: str
+) -> None:
+
+	user_id, headers = user
+	(todo_id,) = create_todos(client, user, 1)
+	copy_primary(replica)
+	set_description(replica, todo_id, "from the replica")
+	(unreplicated,) = create_todos(client, user, 1)
+
+	def read_todo(todo_id: int) -> Any:
+		return client.get(f"/users/{user_id}/todos/{todo_id}", headers=headers)
+
+	assert read_todo(todo_id).json()["todo"]["description"] == "from the replica"
+	assert read_todo(unreplicated).status_code == 404
+	listed: list[dict[str, Any]] = client.get(f"/users/{user_id}/todos", headers=headers).json()["todos"]
+	assert [(todo["id"], todo["description"]) for todo in listed] == [(todo_id, "from the replica")]
+
+	patched: dict[str, Any] = client.patch(
+		f"/users/{user_id}/todos/{todo_id}", headers=headers, json={"done": True}
+	).json()["todo"]
+	assert (patched["description"], patched["done"]) == ("todo 0", True)
+	assert primary_done(todo_id) is True
+	# The write never reached the replica.
+	assert read_todo(todo_id).json()["todo"]["done"] is False
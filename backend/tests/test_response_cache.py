@@ -0,0 +1,97 @@
+from typing import Any
+
+import pytest
+
+from conftest import create_todos, create_user
+from src.resources import cache as cache_module
+from src.resources.cache import MemoryCacheBackend, response_cache
+from src.resources.functions import encode_cursor
+
+
+class Clock:
+	def __init__(self) -> None:
+		self.now: float = 1000.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def test_a_write_invalidates_the_cached_user_list(client: Any) -> None:
+	admin_id, admin_headers = create_user(client, is_admin=True)
+	# The page holding only the admin itself.
+	params: dict[str, Any] = {"after": encode_cursor(admin_id - 1), "limit": 1}
+
+	def listed_email() -> str:
+		response = client.get("/users/", headers=admin_headers, params=params)
+		users: list[dict[str, Any]] = response.json()["items"]
+		assert [listed_user["id"] for listed_user in users] == [admin_id]
+		return users[0]["email"]
+
+	email: str = listed_email()
+	hits: int = response_cache.hits
+	assert listed_email() == email
+	assert response_cache.hits == hits + 1
+
+	client.patch(f"/users/{admin_id}", headers=admin_headers, json={"email": f"new-{email}"})
+
+	misses: int = response_cache.misses
+	assert listed_email() == f"new-{email}"
+	assert response_cache.misses == misses + 1
+
+
+def test_a_write_invalidates_the_cached_todo_list(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	_, admin_headers = create_user(client, is_admin=True)
+	params: dict[str, Any] = {"limit": 1, "sort": "-id"}
+	(first,) = create_todos(client, user, 1)
+
+	def listed_id() -> int:
+		return client.get("/todos", headers=admin_headers, params=params).json()["todos"][0]["id"]
+
+	assert listed_id() == first
+	hits: int = response_cache.hits
+	assert listed_id() == first
+	assert response_cache.hits == hits + 1
+
+	(created,) = create_todos(client, user, 1)
+
+	assert listed_id() == created
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+	clock: Clock = Clock()
+	monkeypatch.setattr(cache_module, "monotonic", clock)
+	return clock
+
+
+# Generations used within the idle time are kept however many there are;
+# idle ones are dropped and start again from 0.
+def test_idle_generations_are_dropped(client: Any, clock: Clock) -> None:
+	backend: MemoryCacheBackend = MemoryCacheBackend(max_size=10, ttl_seconds=30, counter_idle_seconds=30)
+
+	for index in range(100):
+		client.portal.call(backend.incr, f"generation:{index}")
+	assert len(backend.counters) == 100
+
+	clock.now += 20
+	assert client.portal.call(backend.get, "generation:0") == b"1"
+	clock.now += 20
+	assert client.portal.call(backend.incr, "generation:1") == 1
+
+	assert list(backend.counters) == ["generation:0", "generation:1"]
+	assert backend.counter_evictions == 99
+	assert client.portal.call(backend.get, "generation:2") is None
+
+
+# A generation outlives every entry cached under it, so dropping it never
+# revives a stale response.
+def test_a_dropped_generation_revives_no_entry(client: Any, clock: Clock) -> None:
+	backend: MemoryCacheBackend = MemoryCacheBackend(max_size=10, ttl_seconds=30, counter_idle_seconds=30)
+
+	client.portal.call(backend.incr, "generation:todos")
+	client.portal.call(backend.set, "response:todos:1:page", b"stale")
+	clock.now += 31
+
+	assert client.portal.call(backend.get, "generation:todos") is None
+	assert client.portal.call(backend.incr, "generation:todos") == 1
+	assert client.portal.call(backend.get, "response:todos:1:page") is None
@@ -0,0 +1,98 @@
+from uuid import uuid4
+from datetime import datetime, timedelta
+from typing import Any
+
+from src.scheduler.scheduler import DeadlineScheduler
+
+
+class RecordingSink:
+	def __init__(self) -> None:
+		self.events: list[dict[str, Any]] = []
+
+	async def send(self, event: dict[str, Any]) -> None:
+		self.events.append(event)
+
+
+# Stands in for the scheduler of another worker: the API's track() and
+# forget() calls never reach it, only the database does.
+def new_scheduler(name: str | None = None) -> tuple[DeadlineScheduler, RecordingSink]:
+	sink: RecordingSink = RecordingSink()
+	return DeadlineScheduler(sink=sink, name=name or f"test-{uuid4().hex}"), sink
+
+
+def create_todo(client: Any, user: tuple[int, dict[str, str]], reminder: datetime) -> int:
+	user_id, headers = user
+	return client.post(
+		f"/users/{user_id}/todos",
+		headers=headers,
+		json={"description": "remind me", "reminder_datetime": reminder.isoformat()}
+	).json()["todo"]["id"]
+
+
+# Other tests share the database, so only the given user's events count.
+def fired(sink: RecordingSink, user: tuple[int, dict[str, str]]) -> list[int]:
+	return [event["todo_id"] for event in sink.events if event["user_id"] == user[0]]
+
+
+def test_deadlines_written_behind_the_loader_fire(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	now: datetime = datetime.now()
+	scheduler, sink = new_scheduler()
+	later: int = create_todo(client, user, now + timedelta(seconds=120))
+	client.portal.call(scheduler.tick, now)
+
+	# The loader has already read past this deadline.
+	earlier: int = create_todo(client, user, now + timedelta(seconds=60))
+	client.portal.call(scheduler.tick, now + timedelta(seconds=1))
+	client.portal.call(scheduler.tick, now + timedelta(seconds=61))
+
+	assert earlier in fired(sink, user)
+	assert later not in fired(sink, user)
+
+
+def test_completed_moved_and_deleted_todos_do_not_fire(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	now: datetime = datetime.now()
+	done, moved, deleted, kept = (
+		create_todo(client, user, now + timedelta(seconds=60)) for _ in range(4)
+	)
+	scheduler, sink = new_scheduler()
+	client.portal.call(scheduler.tick, now)
+
+	client.patch(f"/users/{user_id}/todos/{done}", headers=headers, json={"done": True})
+	client.patch(
+		f"/users/{user_id}/todos/{moved}",
+		headers=headers,
+		json={"reminder_datetime": (now + timedelta(hours=2)).isoformat()}
+	)
+	client.delete(f"/users/{user_id}/todos/{deleted}", headers=headers)
+	# Skip the rescan: only the check at dispatch time stands in the way.
+	scheduler.rescanned_until = now + timedelta(days=1)
+	client.portal.call(scheduler.tick, now + timedelta(seconds=61))
+
+	assert fired(sink, user) == [kept]
+
+
+def test_a_restarted_scheduler_fires_missed_deadlines(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	name: str = f"test-{uuid4().hex}"
+	now: datetime = datetime.now()
+	scheduler, _ = new_scheduler(name)
+	client.portal.call(scheduler.tick, now)
+
+	missed: int = create_todo(client, user, now + timedelta(seconds=60))
+
+	restarted, sink = new_scheduler(name)
+	client.portal.call(restarted.tick, now + timedelta(seconds=600))
+	assert fired(sink, user) == [missed]
+
+	# Progress is saved, so the next restart does not fire it again.
+	again, sink = new_scheduler(name)
+	client.portal.call(again.tick, now + timedelta(seconds=601))
+	assert fired(sink, user) == []
@@ -0,0 +1,196 @@
+from typing import Any
+
+import pytest
+from sqlalchemy import text
+
+from src.db.db import engine
+from src.resources import functions as functions_module
+
+
+def create(client: Any, user: tuple[int, dict[str, str]], description: str, **fields: Any) -> int:
+	user_id, headers = user
+	response = client.post(
+		f"/users/{user_id}/todos", headers=headers, json={"description": description, **fields}
+	)
+	assert response.status_code == 201, response.text
+	return response.json()["todo"]["id"]
+
+
+def listed(client: Any, user: tuple[int, dict[str, str]], **params: Any) -> list[int]:
+	user_id, headers = user
+	response = client.get(f"/users/{user_id}/todos", headers=headers, params={"limit": 100, **params})
+	if response.status_code == 204:
+		return []
+
+	assert response.status_code == 200, response.text
+	return [todo["id"] for todo in response.json()["todos"]]
+
+
+def check_search_index() -> None:
+	# Raises if the external-content index disagrees with the todos table.
+	with engine.begin() as connection:
+		connection.execute(text("INSERT INTO todos_fts (todos_fts) VALUES ('integrity-check')"))
+
+
+###############################################################################
+#################################### Search ###################################
+###############################################################################
+def test_search_matches_word_prefixes_of_every_term(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	groceries: int = create(client, user, "Buy groceries")
+	invoice: int = create(client, user, "Pay invoice")
+	draft: int = create(client, user, "Review invoice draft")
+
+	assert listed(client, user, q="inv") == [invoice, draft]
+	assert listed(client, user, q="INVOICE rev") == [draft]
+	assert listed(client, user, q="gro") == [groceries]
+	# Mid-word fragments are not word prefixes.
+	assert listed(client, user, q="voice") == []
+
+
+# Operators and quotes are searched as plain words: punctuation is dropped by
+# the tokenizer and OR, NOT are terms like any other.
+@pytest.mark.parametrize(("q", "expected"), [
+	('"', []),
+	('invoice"', ["Pay invoice"]),
+	("(pay", ["Pay invoice"]),
+	("desc*ription:", []),
+	("buy OR pay", []),
+	("NOT buy", []),
+])
+def test_search_input_is_never_parsed_as_query_syntax(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	q: str,
+	expected: list[str]
+) -> None:
+
+	todos: dict[int, str] = {
+		create(client, user, description): description
+		for description in ("Buy groceries", "Pay invoice")
+	}
+
+	assert [todos[todo_id] for todo_id in listed(client, user, q=q)] == expected
+
+
+def test_search_only_returns_the_users_own_todos(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	other_user: tuple[int, dict[str, str]]
+) -> None:
+
+	own: int = create(client, user, "Renew passport")
+	create(client, other_user, "Renew passport")
+
+	assert listed(client, user, q="passport") == [own]
+
+
+def test_the_search_index_follows_patches_and_deletes(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	invoice: int = create(client, user, "Pay invoice")
+	draft: int = create(client, user, "Review invoice draft")
+
+	client.patch(f"/users/{user_id}/todos/{invoice}", headers=headers, json={"description": "Pay rent"})
+	assert listed(client, user, q="invoice") == [draft]
+	assert listed(client, user, q="rent") == [invoice]
+
+	client.patch(f"/users/{user_id}/todos:batch", headers=headers, json=[
+		{"id": draft, "description": "Review contract"}
+	])
+	assert listed(client, user, q="invoice") == []
+	assert listed(client, user, q="contract") == [draft]
+
+	client.delete(f"/users/{user_id}/todos/{invoice}", headers=headers)
+	client.request("DELETE", f"/users/{user_id}/todos:batch", headers=headers, json=[draft])
+	assert listed(client, user, q="rent") == []
+	assert listed(client, user, q="contract") == []
+
+	check_search_index()
+
+
+# Backends without FTS5 fall back to a case-insensitive substring match.
+def test_search_falls_back_to_ilike_off_sqlite(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	invoice: int = create(client, user, "Pay invoice")
+	create(client, user, "Buy groceries")
+	monkeypatch.setattr(functions_module, "DB_BACKEND", "postgresql")
+
+	assert listed(client, user, q="VOICE") == [invoice]
+	assert listed(client, user, q="pay inv") == [invoice]
+	assert listed(client, user, q="invoice pay") == []
+
+
+###############################################################################
+############################### Filters and sort ##############################
+###############################################################################
+def test_filters_narrow_the_list_and_combine_with_search(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	early: int = create(
+		client, user, "Pay invoice", done=True,
+		reminder_datetime="2031-01-01T09:00:00", expiration_datetime="2031-01-10T09:00:00"
+	)
+	late: int = create(
+		client, user, "Pay rent", is_favorite=True,
+		reminder_datetime="2031-02-01T09:00:00", expiration_datetime="2031-02-10T09:00:00"
+	)
+	undated: int = create(client, user, "Review invoice draft", is_favorite=True)
+
+	assert listed(client, user, done=True) == [early]
+	assert listed(client, user, done=False) == [late, undated]
+	assert listed(client, user, is_favorite=True) == [late, undated]
+	assert listed(client, user, expires_before="2031-02-01T00:00:00") == [early]
+	assert listed(client, user, expires_after="2031-02-01T00:00:00") == [late]
+	assert listed(client, user, reminder_before="2031-01-15T00:00:00") == [early]
+	assert listed(client, user, reminder_after="2031-01-15T00:00:00") == [late]
+	assert listed(client, user, q="invoice", is_favorite=True) == [undated]
+	assert listed(client, user, q="pay", done=False, expires_after="2031-01-15T00:00:00") == [late]
+
+
+def test_filtered_lists_report_no_total(client: Any, user: tuple[int, dict[str, str]]) -> None:
+	user_id, headers = user
+	create(client, user, "Pay invoice", done=True)
+	create(client, user, "Pay rent")
+
+	assert client.get(f"/users/{user_id}/todos", headers=headers).json()["total"] == 2
+	assert client.get(
+		f"/users/{user_id}/todos", headers=headers, params={"q": "pay"}
+	).json()["total"] is None
+
+
+def test_lists_sort_by_any_datetime_with_ties_broken_by_id(
+	client: Any,
+	user: tuple[int, dict[str, str]]
+) -> None:
+
+	user_id, headers = user
+	february: int = create(client, user, "February", reminder_datetime="2031-02-01T09:00:00")
+	january: int = create(client, user, "January", reminder_datetime="2031-01-01T09:00:00")
+	tied: int = create(client, user, "Also January", reminder_datetime="2031-01-01T09:00:00")
+
+	assert listed(client, user, sort="reminder_datetime") == [january, tied, february]
+	assert listed(client, user, sort="-reminder_datetime") == [february, tied, january]
+	assert listed(client, user, sort="-id") == [tied, january, february]
+
+	# Pages of a datetime sort are reached by offset only.
+	response = client.get(
+		f"/users/{user_id}/todos", headers=headers, params={"sort": "reminder_datetime", "limit": 2}
+	)
+	assert response.json()["next_cursor"] is None
+	assert client.get(
+		f"/users/{user_id}/todos",
+		headers=headers,
+		params={"sort": "reminder_datetime", "after": "MQ"}
+	).status_code == 400
+	assert client.get(
+		f"/users/{user_id}/todos", headers=headers, params={"sort": "description"}
+	).status_code == 422
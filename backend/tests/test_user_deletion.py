@@ -0,0 +1,146 @@
+from time import sleep
+from datetime import datetime
+from typing import Any
+
+import pytest
+from sqlalchemy import func, insert, select, text
+
+from conftest import create_todos, create_user
+from src.db.db import engine
+from src.jobs.user_deletion import user_purger
+from src.resources.models import ToDo, ToDoTombstone, User
+from src.resources.config import USER_PURGE_BATCH_SIZE
+
+
+def insert_todos(user_id: int, count: int) -> None:
+	written: datetime = datetime.now()
+	with engine.begin() as connection:
+		connection.execute(insert(ToDo), [
+			{
+				"user_id": user_id,
+				"description": f"bulk {index}",
+				"done": False,
+				"is_favorite": False,
+				"write_datetime": written,
+				"creation_datetime": written,
+			}
+			for index in range(count)
+		])
+
+
+def count_rows(user_id: int) -> tuple[int, int, int]:
+	with engine.connect() as connection:
+		return (
+			connection.execute(select(func.count()).where(User.id == user_id)).scalar_one(),
+			connection.execute(select(func.count()).where(ToDo.user_id == user_id)).scalar_one(),
+			connection.execute(
+				select(func.count()).where(ToDoTombstone.user_id == user_id)
+			).scalar_one(),
+		)
+
+
+def wait_for_status(client: Any, user_id: int, headers: dict[str, str], status: str) -> dict[str, Any]:
+	for _ in range(500):
+		job: dict[str, Any] = client.get(f"/users/{user_id}/deletion", headers=headers).json()["job"]
+		if job["status"] == status:
+			return job
+		sleep(0.01)
+	raise AssertionError(f"deletion job never reached {status!r}, last {job}")
+
+
+def test_deleting_a_user_purges_every_todo_and_tombstone_in_batches(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	user_id, headers = user
+	_, admin_headers = create_user(client, is_admin=True)
+	for todo_id in create_todos(client, user, 3):
+		client.delete(f"/users/{user_id}/todos/{todo_id}", headers=headers)
+	insert_todos(user_id, USER_PURGE_BATCH_SIZE * 2 + 500)
+	assert count_rows(user_id) == (1, USER_PURGE_BATCH_SIZE * 2 + 500, 3)
+
+	batches: list[int] = []
+	delete_todo_batch = user_purger.delete_todo_batch
+
+	async def counting_batch(job_id: int, batch_user_id: int) -> int:
+		deleted: int = await delete_todo_batch(job_id, batch_user_id)
+		batches.append(deleted)
+		return deleted
+
+	monkeypatch.setattr(user_purger, "delete_todo_batch", counting_batch)
+
+	response = client.delete(f"/users/{user_id}", headers=headers)
+	assert response.status_code == 202
+	assert response.headers["Location"] == f"/users/{user_id}/deletion"
+
+	job: dict[str, Any] = wait_for_status(client, user_id, admin_headers, "done")
+	assert job["deleted_todos"] == USER_PURGE_BATCH_SIZE * 2 + 500
+	assert batches == [USER_PURGE_BATCH_SIZE, USER_PURGE_BATCH_SIZE, 500]
+	assert count_rows(user_id) == (0, 0, 0)
+
+
+def test_deletion_status_moves_from_pending_to_running_to_done(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	user_id, headers = user
+	_, admin_headers = create_user(client, is_admin=True)
+	insert_todos(user_id, 30)
+	monkeypatch.setattr(user_purger, "batch_size", 10)
+	monkeypatch.setattr(user_purger, "pause_seconds", 0.3)
+
+	response = client.delete(f"/users/{user_id}", headers=headers)
+	assert response.json()["job"]["status"] == "pending"
+
+	# The user is disabled at once, but may still follow the deletion.
+	job: dict[str, Any] = wait_for_status(client, user_id, headers, "running")
+	assert 0 < job["deleted_todos"] < 30
+	assert job["finished_datetime"] is None
+
+	job = wait_for_status(client, user_id, admin_headers, "done")
+	assert job["deleted_todos"] == 30
+	assert job["finished_datetime"] is not None
+
+
+def test_an_interrupted_deletion_resumes(
+	client: Any,
+	user: tuple[int, dict[str, str]],
+	monkeypatch: pytest.MonkeyPatch
+) -> None:
+
+	user_id, headers = user
+	_, admin_headers = create_user(client, is_admin=True)
+	insert_todos(user_id, 30)
+	monkeypatch.setattr(user_purger, "batch_size", 10)
+	monkeypatch.setattr(user_purger, "pause_seconds", 0.3)
+
+	client.delete(f"/users/{user_id}", headers=headers)
+	wait_for_status(client, user_id, admin_headers, "running")
+	# A shutdown mid-purge leaves the job running with its progress stored.
+	client.portal.call(user_purger.stop)
+	job: dict[str, Any] = client.get(f"/users/{user_id}/deletion", headers=admin_headers).json()["job"]
+	assert job["status"] == "running"
+	assert count_rows(user_id)[:2] == (1, 30 - job["deleted_todos"])
+
+	monkeypatch.setattr(user_purger, "pause_seconds", 0.0)
+	client.portal.call(user_purger.resume)
+
+	job = wait_for_status(client, user_id, admin_headers, "done")
+	assert job["deleted_todos"] == 30
+	assert count_rows(user_id) == (0, 0, 0)
+
+
+# To-dos written while a purge runs are left to the ON DELETE CASCADE that
+# the todos table was rebuilt with.
+def test_deleting_the_user_row_cascades_to_its_todos(user: tuple[int, dict[str, str]]) -> None:
+	user_id, _ = user
+	insert_todos(user_id, 5)
+
+	with engine.begin() as connection:
+		connection.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+	assert count_rows(user_id) == (0, 0, 0)